@@ -40,12 +40,17 @@ def runModel(arg_list: list[str] | None = None) -> TemoaModel | None:
     :return: A TemoaModel instance (if asked for), more likely None
     """
     options = parse_args(arg_list=arg_list)
-    mode = TemoaMode.BUILD_ONLY if options.build_only else None
+    mode = None
+    if options.build_only:
+        mode = TemoaMode.BUILD_ONLY
+    elif options.tune:
+        mode = TemoaMode.TUNE
     ts = TemoaSequencer(
         config_file=options.config_file,
         output_path=options.output_path,
         mode_override=mode,
         silent=options.silent,
+        use_cache=not options.no_cache,
     )
     result = ts.start()
     return result
@@ -71,6 +76,12 @@ def parse_args(arg_list: list[str] | None) -> argparse.Namespace:
         action='store_true',
         dest='build_only',
     )
+    parser.add_argument(
+        '--tune',
+        help='Build the model once and rank the solve times of the solver profiles.',
+        action='store_true',
+        dest='tune',
+    )
     parser.add_argument(
         '-s', '--silent', help='Silent run.  No prompts.', action='store_true', dest='silent'
     )
@@ -81,6 +92,12 @@ def parse_args(arg_list: list[str] | None) -> argparse.Namespace:
         action='store_true',
         dest='debug',
     )
+    parser.add_argument(
+        '--no-cache',
+        help='Bypass the data cache (if enabled in the config) and load all data from the database.',
+        action='store_true',
+        dest='no_cache',
+    )
     parser.add_argument(
         '-o',
         '--output_path',
@@ -146,6 +163,8 @@ def parse_args(arg_list: list[str] | None) -> argparse.Namespace:
 
     if options.build_only:
         logger.info('Build-only selected.')
+    elif options.tune:
+        logger.info('Solver tuning selected.')
     return options
 
 
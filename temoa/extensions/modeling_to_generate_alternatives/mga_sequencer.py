@@ -39,7 +39,6 @@ import pyomo.contrib.appsi as pyomo_appsi
 import pyomo.environ as pyo
 from pyomo.contrib.appsi.base import Results
 from pyomo.core import Expression
-from pyomo.dataportal import DataPortal
 
 # from temoa.extensions.modeling_to_generate_alternatives.worker import Worker
 from temoa.extensions.modeling_to_generate_alternatives.manager_factory import get_manager
@@ -82,31 +81,27 @@ class MgaSequencer:
 
         # get handle on solver instance
         # TODO:  Check that solver is a persistent solver
+        # the options come from the solver profile selected in the config
+        self.options = dict(self.config.solver_options)
         if self.config.solver_name == 'appsi_highs':
             self.opt = pyomo_appsi.solvers.highs.Highs()
+            self.opt.highs_options = self.options
             self.std_opt = pyo.SolverFactory('appsi_highs')
         elif self.config.solver_name == 'gurobi':
             # self.opt = pyomo_appsi.solvers.Gurobi()
             self.opt = pyo.SolverFactory('gurobi')
+            # dev note:  options used here in the past, which may be put in a profile:
             # self.options = {
             #     # 'LogFile': './my_gurobi_log.log',
             #     'LPWarmStart': 2,  # pass basis
-            #     'TimeLimit': 3600 * 4,  # seconds = 4hr
+            #     'Threads': 4,
+            #     'TimeLimit': 3600 * 2,  # 2 hrs
             #     'FeasibilityTol': 1e-4,  # default = 1e-6, we only need 'rough' solutions
-            #     # 'Crossover': 0,  # disabled
-            #     # 'Method': 2,  # Barrier ONLY
             # }
-            self.options = {
-                # 'Method': 2,  # Barrier ONLY
-                'Threads': 4,
-                # 'FeasibilityTol': 1e-3,  # pretty 'loose'
-                # 'Crossover': 0,  # Disabled
-                'TimeLimit': 3600 * 2,  # 2 hrs
-            }
-            self.opt.gurobi_options = self.options
+            self.opt.options.update(self.options)
         elif self.config.solver_name == 'cbc':
             self.opt = pyo.SolverFactory('cbc')
-            self.options = {}
+            self.opt.options.update(self.options)
 
         # some defaults, etc.
         self.internal_stop = False
@@ -150,9 +145,13 @@ class MgaSequencer:
 
         # 1. Load data
         hybrid_loader = HybridLoader(db_connection=self.con, config=self.config)
-        data_portal: DataPortal = hybrid_loader.load_data_portal(myopic_index=None)
+        data = hybrid_loader.create_data_dict(myopic_index=None)
         instance: TemoaModel = build_instance(
-            loaded_portal=data_portal, model_name=self.config.scenario, silent=self.config.silent
+            loaded_portal=data,
+            model_name=self.config.scenario,
+            silent=self.config.silent,
+            check_domains=not self.config.source_trace,
+            profile_path=self.config.output_path if self.config.build_profile else None,
         )
 
         # 2. Base solve
@@ -302,6 +301,7 @@ class MgaSequencer:
         # listener.join()
 
         # 8. Wrap it up
+        self.writer.finish()
         vector_manager.finalize_tracker()
 
     def solve_instance(self, instance: TemoaModel) -> bool:
@@ -348,6 +348,7 @@ class MgaSequencer:
     def process_solve_results(self, instance):
         # cheap label...
         self.writer.write_capacity_tables(M=instance, iteration=self.solve_count)
+        self.writer.commit_write()
 
     def __del__(self):
         self.con.close()
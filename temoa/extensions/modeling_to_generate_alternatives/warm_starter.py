@@ -35,7 +35,6 @@ import pyomo.contrib.appsi as pyomo_appsi
 import pyomo.environ as pyo
 from pyomo.contrib.appsi.base import Results
 from pyomo.core import Expression
-from pyomo.dataportal import DataPortal
 
 from temoa.extensions.modeling_to_generate_alternatives.manager_factory import get_manager
 from temoa.extensions.modeling_to_generate_alternatives.mga_constants import MgaAxis, MgaWeighting
@@ -75,13 +74,16 @@ class WarmStarter:
 
         # get handle on solver instance
         # TODO:  Check that solver is a persistent solver
+        # the options come from the solver profile selected in the config
+        self.options = dict(self.config.solver_options)
         if self.config.solver_name == 'appsi_highs':
             self.opt = pyomo_appsi.solvers.highs.Highs()
+            self.opt.highs_options = self.options
             self.std_opt = pyo.SolverFactory('appsi_highs')
         elif self.config.solver_name == 'gurobi':
             self.opt = pyomo_appsi.solvers.Gurobi()
             self.std_opt = pyo.SolverFactory('gurobi_direct')
-            self.options = {'LogFile': './my_gurobi_log.log'}
+            self.options.setdefault('LogFile', './my_gurobi_log.log')
         elif self.config.solver_name == 'cbc':
             self.std_opt = pyo.SolverFactory('cbc')
 
@@ -121,9 +123,12 @@ class WarmStarter:
 
         # 1. Load data
         hybrid_loader = HybridLoader(db_connection=self.con, config=self.config)
-        data_portal: DataPortal = hybrid_loader.load_data_portal(myopic_index=None)
+        data = hybrid_loader.create_data_dict(myopic_index=None)
         instance: TemoaModel = build_instance(
-            loaded_portal=data_portal, model_name=self.config.scenario, silent=self.config.silent
+            loaded_portal=data,
+            model_name=self.config.scenario,
+            silent=self.config.silent,
+            check_domains=not self.config.source_trace,
         )
 
         # 2.  Instantiate the vector manager
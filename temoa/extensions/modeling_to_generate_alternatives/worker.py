@@ -67,8 +67,9 @@ class Worker(Process):
         self.model_queue: Queue = model_queue
         self.results_queue: Queue = results_queue
         self.solver_name = kwargs['solver_name']
-        # self.solver_options = kwargs["solver_options"]
-        self.opt = SolverFactory(self.solver_name)  # , options=self.solver_options)
+        self.solver_options = kwargs.get('solver_options') or {}
+        self.opt = SolverFactory(self.solver_name)
+        self.opt.options.update(self.solver_options)
 
     def run(self):
         # self.logger.info('Worker %d spun up', self.worker_number)
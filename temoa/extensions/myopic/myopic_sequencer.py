@@ -33,12 +33,15 @@ from collections import deque
 from pathlib import Path
 from sqlite3 import Connection
 from sys import stderr as SE
+from time import time
 
 import definitions
 from temoa.extensions.myopic.myopic_index import MyopicIndex
 from temoa.extensions.myopic.myopic_progress_mapper import MyopicProgressMapper
+from temoa.extensions.myopic.persistent_window_solver import PersistentWindowSolver
 from temoa.temoa_model import run_actions
-from temoa.temoa_model.hybrid_loader import HybridLoader
+from temoa.temoa_model.background_writer import BUSY_TIMEOUT
+from temoa.temoa_model.hybrid_loader import DeferredQuery, HybridLoader
 from temoa.temoa_model.model_checking.pricing_check import price_checker
 from temoa.temoa_model.table_writer import TableWriter
 from temoa.temoa_model.temoa_config import TemoaConfig
@@ -98,6 +101,8 @@ class MyopicSequencer:
         self.cursor = self.output_con.cursor()
         self.progress_mapper: MyopicProgressMapper | None = None
         self.table_writer = TableWriter(self.config)
+        # un-screened data that is the same in every window, shared by the loaders
+        self.window_cache: dict[DeferredQuery, list[tuple]] = {}
         # break out what is needed from the config
         myopic_options = config.myopic_inputs
         if not myopic_options:
@@ -119,6 +124,12 @@ class MyopicSequencer:
                     f'is larger than the view depth ({self.view_depth}).  '
                     f'Check config'
                 )
+            # keep one persistent solver through the windows, updated with the changes only
+            self.persistent_solver: PersistentWindowSolver | None = None
+            if myopic_options.get('persistent_solver'):
+                self.persistent_solver = PersistentWindowSolver(
+                    config.solver_name, config.solver_options
+                )
 
     def get_connection(self) -> Connection:
         """
@@ -152,6 +163,10 @@ class MyopicSequencer:
             logger.error('Run aborted.  I/O database pointers are different')
             sys.exit(-1)
 
+        if self.config.background_write:
+            # the results are written on the connection of a writer thread (see TableWriter), so
+            # wait out its locks
+            con.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT * 1000}')
         return con
 
     def start(self):
@@ -181,6 +196,7 @@ class MyopicSequencer:
         # 11.  compact the db
 
         last_instance_status = None  # solve status
+        total_solve_time = 0.0
         last_base_year = None
         idx: MyopicIndex | None = None  # just a type-hint
         logger.info('Starting Myopic Sequence')
@@ -215,21 +231,27 @@ class MyopicSequencer:
                 self.progress_mapper.report(idx, 'load')
 
             # 4. update the MyopicEfficiency table so it is ready for the upcoming data pull.
+            # this reads the capacity results of the previous window, which may still be in the
+            # queue of the background writer
+            self.table_writer.wait_for_capacity()
             self.update_myopic_efficiency_table(myopic_index=idx, prev_base=last_base_year)
 
             # 5. pull the data
-            # make a data loader
-            data_loader = HybridLoader(self.output_con, self.config)
-            data_portal = data_loader.load_data_portal(myopic_index=idx)
+            # make a data loader.  The window-invariant tables are only read in the first window.
+            data_loader = HybridLoader(self.output_con, self.config, window_cache=self.window_cache)
+            data = data_loader.create_data_dict(myopic_index=idx)
 
             # 6. build
+            window_path = self.config.output_path / ''.join(('LP', str(idx.base_year)))
             instance = run_actions.build_instance(
-                loaded_portal=data_portal,
+                loaded_portal=data,
                 model_name=self.config.scenario,
                 silent=True,  # override this, we do our own reporting...
                 keep_lp_file=self.config.save_lp_file,
-                lp_path=self.config.output_path
-                / ''.join(('LP', str(idx.base_year))),  # base year folder
+                lp_path=window_path,  # base year folder
+                check_domains=False,  # myopic data is always screened
+                profile_path=window_path if self.config.build_profile else None,
+                lp_export=self.config.lp_export,
             )
 
             # 7.  Run checks...
@@ -241,11 +263,21 @@ class MyopicSequencer:
             # 8.  Run the model and assess solve status
             if not self.config.silent:
                 self.progress_mapper.report(idx, 'solve')
-            model, results = run_actions.solve_instance(
-                instance=instance, solver_name=self.config.solver_name, silent=True
-            )
-
-            optimal, status = run_actions.check_solve_status(results)
+            tic = time()
+            if self.persistent_solver:
+                model = instance
+                optimal, status = self.persistent_solver.solve(instance)
+            else:
+                model, results = run_actions.solve_instance(
+                    instance=instance,
+                    solver_name=self.config.solver_name,
+                    silent=True,
+                    solver_options=self.config.solver_options,
+                )
+                optimal, status = run_actions.check_solve_status(results)
+            solve_time = time() - tic
+            total_solve_time += solve_time
+            logger.info('Myopic window %d solve time: %0.2f seconds', idx.base_year, solve_time)
             if not optimal:
                 logger.warning('FAILED myopic iteration on %s', idx)
                 logger.warning('Status: %s', status)
@@ -259,6 +291,8 @@ class MyopicSequencer:
 
             # 9, 10.  Update the output tables...
             # first, clear any possible previous results that overlap, we might have been backtracking...
+            # (once the previous results are all in the db, if they are written in the background)
+            self.table_writer.flush()
             self.clear_results_after(idx.base_year)
             # add the new results...
             if not self.config.silent:
@@ -270,11 +304,13 @@ class MyopicSequencer:
             last_base_year = idx.base_year  # update
 
             # delete anything in the OutputObjective table, it is nonsensical...
-            self.output_con.execute('DELETE FROM OutputObjective WHERE 1')
-            self.output_con.commit()
+            self.table_writer.execute('DELETE FROM OutputObjective WHERE 1')
+
+            # 11.  The db is compacted by the table writer (lots of writes/deletes leads to bloat),
+            #      per the vacuum_policy in the config
 
-            # 11.  Compact the db...  lots of writes/deletes leads to bloat
-            self.output_con.execute('VACUUM;')
+        self.table_writer.finish()
+        logger.info('Myopic sequence total solve time: %0.2f seconds', total_solve_time)
 
     def initialize_myopic_efficiency_table(self):
         """
@@ -532,6 +568,7 @@ class MyopicSequencer:
             (period, self.config.scenario),
         )
         self.output_con.commit()
+        self.table_writer.clear_parquet_periods_after(period)
 
     def __del__(self):
         """ensure the connection is closed when destructor is called."""
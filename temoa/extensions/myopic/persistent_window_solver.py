@@ -0,0 +1,233 @@
+"""
+A persistent solver carried through the myopic windows, which is updated with the changes between
+windows rather than handed a whole new model for each window
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+The solver holds a "host" model of plain (linear) rows over variables keyed by the name and index
+of the model variable they stand for, so V_Capacity[r, p, t, v] in one window is the same solver
+column as in the next.  Each window is still built as a TemoaModel (the index sets all come from
+the window data), but only its differences with the previous window go to the solver:
+
+  - rows that are identical (same variables, coefficients and bounds) are kept
+  - rows that are new, or changed (for instance, the rows holding the ExistingCapacity that is
+    carried from the last window's results) are (re)added, and those no longer present are removed
+  - columns follow the rows:  the solver drops the retired ones as they are no longer referenced
+
+So the solver keeps its model (and its basis, for a warm start) from window to window.
+"""
+
+from logging import getLogger
+from time import time
+
+import pyomo.contrib.appsi as pyomo_appsi
+from pyomo.contrib.appsi.base import TerminationCondition
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.environ import Any, ConcreteModel, Constraint, Objective, Var
+from pyomo.repn.linear import LinearRepnVisitor
+
+from temoa.temoa_model.temoa_model import TemoaModel
+
+logger = getLogger(__name__)
+
+PERSISTENT_SOLVERS = {
+    'appsi_highs': pyomo_appsi.solvers.Highs,
+    'gurobi': pyomo_appsi.solvers.Gurobi,
+}
+"""the solvers (by config solver name) that may be used persistently"""
+
+CONSTANT_ROW_TOL = 1e-6
+"""the (relative) tolerance on the bounds of a row with no variables"""
+
+
+class PersistentWindowSolver:
+    """A persistent solver, and the host model it holds, for a sequence of myopic windows"""
+
+    def __init__(self, solver_name: str, solver_options: dict | None = None):
+        if solver_name not in PERSISTENT_SOLVERS:
+            logger.error(
+                'The persistent myopic solve requires one of %s.  Received: %s',
+                list(PERSISTENT_SOLVERS),
+                solver_name,
+            )
+            raise ValueError(f'Solver {solver_name} cannot be used as a persistent solver')
+        self.opt = PERSISTENT_SOLVERS[solver_name]()
+        if solver_name == 'appsi_highs':
+            self.opt.highs_options = dict(solver_options or {})
+        else:
+            self.opt.gurobi_options = dict(solver_options or {})
+        self.opt.config.load_solution = False
+        # the changes are handed to the solver explicitly, so it need not search the model for them
+        update_config = self.opt.update_config
+        update_config.check_for_new_or_removed_constraints = False
+        update_config.check_for_new_or_removed_vars = False
+        update_config.check_for_new_or_removed_params = False
+        update_config.check_for_new_objective = False
+        update_config.update_constraints = False
+        update_config.update_vars = False
+        update_config.update_params = False
+        update_config.update_named_expressions = False
+        update_config.update_objective = False
+
+        self.host = ConcreteModel(name='myopic_host')
+        self.host.x = Var(Any, dense=False)
+        self.host.c = Constraint(Any)
+        self.host.obj = Objective(expr=0)
+        # row key: (variable keys and coefficients, lower bound, upper bound)
+        self._rows: dict[tuple, tuple] = {}
+        self._started = False
+        # the window variables (by key) sent to the solver, to receive the solution
+        self._window_vars: dict[tuple, Var] = {}
+        # the rows of the last window with no variables, whose constant violates their bounds
+        self.infeasible_rows: list[tuple] = []
+
+    @staticmethod
+    def _key(component) -> tuple:
+        return component.parent_component().local_name, component.index()
+
+    def update(self, M: TemoaModel) -> None:
+        """
+        Bring the solver model up to date with the window instance
+        :param M: the built instance for the window
+        :return: None
+        """
+        tic = time()
+        var_map = {}
+        var_keys: dict[int, tuple] = {}
+        visitor = LinearRepnVisitor({}, var_map, {}, None)
+
+        def terms(expr) -> tuple[tuple, float]:
+            repn = visitor.walk_expression(expr)
+            if repn.nonlinear is not None:
+                raise ValueError('The persistent myopic solve requires a linear model')
+            for vid in repn.linear:
+                if vid not in var_keys:
+                    var_keys[vid] = self._key(var_map[vid])
+            return tuple((var_keys[vid], coef) for vid, coef in repn.linear.items()), repn.constant
+
+        rows = {}
+        self.infeasible_rows = []
+        for con in M.component_data_objects(Constraint, active=True):
+            lb, body, ub = con.to_bounded_expression(evaluate_bounds=True)
+            linear, constant = terms(body)
+            if not linear:
+                # a row of constants is not sent to the solver, but it must still hold
+                tol = CONSTANT_ROW_TOL * max(1.0, abs(constant))
+                if (lb is not None and constant < lb - tol) or (
+                    ub is not None and constant > ub + tol
+                ):
+                    logger.error(
+                        'Row %s has no variables and its value %s is outside its bounds [%s, %s]',
+                        con.name,
+                        constant,
+                        lb,
+                        ub,
+                    )
+                    self.infeasible_rows.append(self._key(con))
+                continue
+            if constant:
+                lb = None if lb is None else lb - constant
+                ub = None if ub is None else ub - constant
+            rows[self._key(con)] = (linear, lb, ub)
+        objective = next(M.component_data_objects(Objective, active=True))
+        obj_linear, obj_constant = terms(objective.expr)
+
+        # the columns:  new ones get their bounds, kept ones are checked for changed bounds
+        self._window_vars = {key: var_map[vid] for vid, key in var_keys.items()}
+        changed_vars = []
+        for key, var in self._window_vars.items():
+            is_new = key not in self.host.x
+            host_var = self.host.x[key]
+            if is_new or host_var.bounds != var.bounds:
+                host_var.setlb(var.lb)
+                host_var.setub(var.ub)
+                if not is_new:
+                    changed_vars.append(host_var)
+
+        # the rows
+        removed = [key for key, row in self._rows.items() if rows.get(key) != row]
+        added = [key for key, row in rows.items() if self._rows.get(key) != row]
+        if self._started:
+            if changed_vars:
+                self.opt.update_variables(changed_vars)
+            self.opt.remove_constraints([self.host.c[key] for key in removed])
+        for key in removed:
+            del self.host.c[key]
+            del self._rows[key]
+        for key in added:
+            linear, lb, ub = rows[key]
+            expr = self._linear_expression(linear)
+            self.host.c[key] = expr == lb if lb == ub else (lb, expr, ub)
+            self._rows[key] = rows[key]
+
+        self.host.del_component(self.host.obj)
+        self.host.obj = Objective(
+            expr=self._linear_expression(obj_linear, obj_constant), sense=objective.sense
+        )
+        if self._started:
+            self.opt.add_constraints([self.host.c[key] for key in added])
+            self.opt.set_objective(self.host.obj)
+        else:
+            self.opt.set_instance(self.host)
+            self._started = True
+        # the retired columns are no longer referenced and have been dropped by the solver
+        for key in [key for key in self.host.x if key not in self._window_vars]:
+            del self.host.x[key]
+        logger.info(
+            'Updated the persistent solver in %0.2f seconds.  Rows kept: %d, removed: %d, added: '
+            '%d.  Columns: %d',
+            time() - tic,
+            len(rows) - len(added),
+            len(removed),
+            len(added),
+            len(self._window_vars),
+        )
+
+    def _linear_expression(self, linear: tuple, constant: float = 0) -> LinearExpression:
+        return LinearExpression(
+            constant=constant,
+            linear_coefs=[coef for _, coef in linear],
+            linear_vars=[self.host.x[key] for key, _ in linear],
+        )
+
+    def solve(self, M: TemoaModel) -> tuple[bool, str]:
+        """
+        Update the solver with the window instance, solve, and load the solution into the instance
+        :param M: the built instance for the window
+        :return: tuple of (optimal?, the termination condition)
+        """
+        self.update(M)
+        if self.infeasible_rows:
+            return False, f'infeasible:  {len(self.infeasible_rows)} constant rows violate bounds'
+        tic = time()
+        res = self.opt.solve(self.host)
+        status = res.termination_condition
+        logger.info('Persistent solve time: %0.2f seconds.  Status: %s', time() - tic, status.name)
+        if status != TerminationCondition.optimal:
+            return False, f'{status.name} was returned from solve'
+        self.opt.load_vars()
+        for key, var in self._window_vars.items():
+            var.set_value(self.host.x[key].value, skip_validation=True)
+        return True, ''
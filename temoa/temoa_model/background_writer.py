@@ -0,0 +1,123 @@
+"""
+A background writer for the output db:  write jobs are run in order on a dedicated thread that
+owns its own connection, so an iterative sequencer can move on while the results are written
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+A job is a callable that takes the (writer's) connection.  Jobs must only hold plain data (rows
+of values), never the model, which the sequencer goes on to modify or replace.  At most
+max_pending jobs are queued:  a submit beyond that waits for the oldest job (backpressure).  If a
+job fails, the later jobs are dropped, and the failure is raised (as a RuntimeError) in the
+submitting thread at the next submit, wait or flush, so the run aborts.
+"""
+
+import sqlite3
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import getLogger
+from pathlib import Path
+
+logger = getLogger(__name__)
+
+MAX_PENDING_WRITES = 2
+"""the number of write jobs that may be queued before a submit waits"""
+
+BUSY_TIMEOUT = 600
+"""seconds to wait on a lock held by another connection to the db"""
+
+
+class BackgroundWriter:
+    """Runs write jobs on the output db, in order, on a dedicated thread"""
+
+    def __init__(self, database: Path, max_pending: int = MAX_PENDING_WRITES):
+        """
+        :param database: the output database
+        :param max_pending: the number of jobs that may be queued before a submit waits
+        """
+        self.database = database
+        self.max_pending = max_pending
+        # opened on (and only used by) the writer thread
+        self.con: sqlite3.Connection | None = None
+        self._pending: deque[Future] = deque()
+        self._failed = False
+        self._pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='temoa_writer', initializer=self._connect
+        )
+
+    def _connect(self) -> None:
+        self.con = sqlite3.connect(self.database, timeout=BUSY_TIMEOUT)
+
+    def _run(self, job: Callable[[sqlite3.Connection], None]) -> None:
+        if self._failed:
+            return  # an earlier job failed:  drop the rest
+        try:
+            job(self.con)
+        except BaseException:
+            self._failed = True
+            if self.con.in_transaction:
+                self.con.rollback()
+            raise
+
+    def submit(self, job: Callable[[sqlite3.Connection], None]) -> Future:
+        """
+        Queue a job, waiting on the oldest queued job if max_pending are already queued
+        :param job: callable that takes the connection
+        :return: the future of the job
+        """
+        while self._pending and self._pending[0].done():
+            self.wait(self._pending.popleft())
+        while len(self._pending) >= self.max_pending:
+            self.wait(self._pending.popleft())
+        future = self._pool.submit(self._run, job)
+        self._pending.append(future)
+        return future
+
+    @staticmethod
+    def wait(future: Future) -> None:
+        """wait for a job, raising its failure (if any)"""
+        try:
+            future.result()
+        except Exception as e:
+            logger.error('A background write to the output db failed: %s', e)
+            raise RuntimeError('Background write to the output db failed.  See log.') from e
+
+    def flush(self) -> None:
+        """wait for all queued jobs"""
+        while self._pending:
+            self.wait(self._pending.popleft())
+
+    def close(self) -> None:
+        """flush, and close the connection and the thread"""
+        try:
+            self.flush()
+        finally:
+            self._pool.submit(self._close).result()
+            self._pool.shutdown(wait=True)
+
+    def _close(self) -> None:
+        if self.con:
+            self.con.close()
+            self.con = None
@@ -0,0 +1,154 @@
+"""
+An (opt-in) profiler for the construction of the model components
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+Pyomo constructs the components of a block in declaration order, skipping any that are already
+constructed.  The profiler takes advantage of that by constructing each component of the model
+itself (in the same order) and measuring it, and then handing the model to pyomo to finish the
+construction of the block.  The memory is measured with tracemalloc, which slows the build
+considerably, so the times are best used in comparison with each other.
+"""
+
+import json
+import tracemalloc
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from pathlib import Path
+from time import perf_counter
+
+from temoa.temoa_model.temoa_model import TemoaModel
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class ComponentProfile:
+    """The construction measurements of one model component"""
+
+    name: str
+    ctype: str
+    seconds: float
+    indices: int
+    memory_kb: float
+    """the memory still allocated after the construction"""
+    peak_memory_kb: float
+    """the peak memory allocated during the construction"""
+
+
+class BuildProfiler:
+    """
+    Construct a model component-by-component and record the time, size and memory of each
+    """
+
+    def __init__(self):
+        self.profiles: list[ComponentProfile] = []
+
+    def construct(self, model: TemoaModel, data: dict) -> None:
+        """
+        Construct the model in place while profiling the components
+        :param model: the (unconstructed) model
+        :param data: the data dictionary, keyed by component name
+        :return: None
+        """
+        self.profiles.clear()
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            # anonymous sets (set products, etc.) are constructed first by pyomo
+            if model._anonymous_sets is not None:
+                self._measure('(anonymous sets)', 'Set', model._anonymous_sets, None)
+            for name, component in list(model.component_map().items()):
+                if not component.is_constructed():
+                    self._measure(name, component.ctype.__name__, (component,), data.get(name))
+            model.construct(data={None: data})
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+    def _measure(self, name: str, ctype: str, components, data) -> None:
+        tracemalloc.reset_peak()
+        mem_start = tracemalloc.get_traced_memory()[0]
+        start = perf_counter()
+        for component in components:
+            component.construct(data)
+        seconds = perf_counter() - start
+        mem_end, mem_peak = tracemalloc.get_traced_memory()
+        try:
+            indices = sum(len(component) for component in components)
+        except TypeError:  # no length (a BuildAction, for instance)
+            indices = 0
+        self.profiles.append(
+            ComponentProfile(
+                name=name,
+                ctype=ctype,
+                seconds=seconds,
+                indices=indices,
+                memory_kb=(mem_end - mem_start) / 1024,
+                peak_memory_kb=(mem_peak - mem_start) / 1024,
+            )
+        )
+
+    def table(self, sort_by: str = 'seconds') -> str:
+        """
+        A text table of the profiles, sorted in descending order
+        :param sort_by: the field to sort by
+        :return: the table
+        """
+        rows = sorted(self.profiles, key=lambda prof: getattr(prof, sort_by), reverse=True)
+        width = max((len(prof.name) for prof in rows), default=10)
+        header = '{:<{}s}  {:<12s} {:>10s} {:>10s} {:>12s} {:>12s}\n'.format(
+            'Component', width, 'Type', 'Seconds', 'Indices', 'Memory (KB)', 'Peak (KB)'
+        )
+        lines = [header, '-' * (len(header) - 1) + '\n']
+        for prof in rows:
+            lines.append(
+                '{:<{}s}  {:<12s} {:>10.4f} {:>10d} {:>12.1f} {:>12.1f}\n'.format(
+                    prof.name,
+                    width,
+                    prof.ctype,
+                    prof.seconds,
+                    prof.indices,
+                    prof.memory_kb,
+                    prof.peak_memory_kb,
+                )
+            )
+        total = sum(prof.seconds for prof in rows)
+        lines.append('{:<{}s}  {:<12s} {:>10.4f}\n'.format('Total', width, '', total))
+        return ''.join(lines)
+
+    def write(self, folder: Path) -> None:
+        """
+        Write the sorted table and the (json) profiles to the folder
+        :param folder: the folder for the build_profile.txt and build_profile.json files
+        :return: None
+        """
+        folder.mkdir(parents=True, exist_ok=True)
+        with open(folder / 'build_profile.txt', 'w') as f:
+            f.write(self.table())
+        with open(folder / 'build_profile.json', 'w') as f:
+            json.dump([asdict(prof) for prof in self.profiles], f, indent=2)
+        logger.info('Wrote model build profile to %s', folder)
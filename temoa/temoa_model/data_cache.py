@@ -0,0 +1,192 @@
+"""
+A content-addressed, on-disk cache of the data dictionary produced by the HybridLoader
+"""
+
+import hashlib
+import os
+import pickle
+from logging import getLogger
+from pathlib import Path
+from sqlite3 import Connection
+
+from definitions import PROJECT_ROOT
+from temoa.extensions.myopic.myopic_index import MyopicIndex
+from temoa.temoa_model.temoa_config import TemoaConfig
+
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+The cache key is a hash of the contents of the input tables in the database and the settings that
+change what is loaded.  Any change to the data produces a new key, so stale entries are never
+served.  They are simply aged out of the cache by the size limit (least recently used first).
+"""
+
+logger = getLogger(__name__)
+
+# bump this if the structure of the cached data changes to invalidate all existing entries
+CACHE_VERSION = '2'
+
+DEFAULT_CACHE_DIR = Path(PROJECT_ROOT, 'output_files', 'data_cache')
+
+# the rows of a table hashed at a time for the cache key
+KEY_BATCH_ROWS = 10_000
+
+# output tables that are read by the loader (myopic mode only)
+myopic_output_tables = ('OutputNetCapacity',)
+
+
+class DataCache:
+    """
+    A cache of loaded data dictionaries, stored as pickle files and limited in total size
+    """
+
+    suffix = '.pkl'
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_size_mb: float = 1000):
+        """
+        Make a cache
+        :param cache_dir: the directory to hold the cache files.  It will be created if needed.
+        :param max_size_mb: the limit on the total size of the cache files, in MB
+        """
+        if max_size_mb <= 0:
+            raise ValueError(
+                f'The data cache size limit must be positive.  Received: {max_size_mb}'
+            )
+        self.cache_dir = Path(cache_dir)
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        con: Connection,
+        config: TemoaConfig,
+        myopic_index: MyopicIndex | None = None,
+        aggregate: bool = True,
+    ) -> str:
+        """
+        Make a key for the data that would be loaded from the database with the current settings
+        :param con: connection to the database the data is loaded from
+        :param config: the config for the run
+        :param myopic_index: the myopic index, if any
+        :param aggregate: True if the time slice aggregation (if any) is applied to the data
+        :return: a hex digest
+        """
+        digest = hashlib.sha256()
+        settings = (
+            CACHE_VERSION,
+            config.scenario_mode.name,
+            config.source_trace,
+            # the scenario name is used to pull prior results in myopic runs
+            config.scenario,
+            repr(myopic_index),
+            sorted(config.time_slice_aggregation.items())
+            if aggregate and config.time_slice_aggregation
+            else None,
+            config.presolve,
+            config.presolve_merge_pass_through,
+        )
+        digest.update(repr(settings).encode())
+
+        cur = con.cursor()
+        tables = cur.execute(
+            "SELECT name, sql FROM main.sqlite_master WHERE type = 'table' ORDER BY name"
+        ).fetchall()
+        for name, sql in tables:
+            if name.startswith('Output') and not (myopic_index and name in myopic_output_tables):
+                continue
+            digest.update(repr((name, sql)).encode())
+            # stream the rows into the digest, in a fixed order, without holding the table
+            order = '' if 'WITHOUT ROWID' in sql.upper() else ' ORDER BY rowid'
+            cur.execute(f'SELECT * FROM main.{name}{order}')
+            while rows := cur.fetchmany(KEY_BATCH_ROWS):
+                digest.update(repr(rows).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / (key + self.suffix)
+
+    def get(self, key: str) -> dict | None:
+        """
+        Retrieve data from the cache
+        :param key: the key for the data
+        :return: the data, or None if not in the cache (or not readable)
+        """
+        path = self._path(key)
+        if not path.is_file():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            logger.warning('Unable to read data cache file %s.  Removing it.  %s', path, e)
+            path.unlink(missing_ok=True)
+            return None
+        # touch the file to mark it as recently used
+        os.utime(path)
+        return data
+
+    def put(self, key: str, data: dict) -> None:
+        """
+        Store data in the cache and evict the least recently used entries beyond the size limit
+        :param key: the key for the data
+        :param data: the data dictionary
+        :return: None
+        """
+        path = self._path(key)
+        # write to a temp file first so an interrupted write is never read as a cache entry
+        temp_path = path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=5)
+        os.replace(temp_path, path)
+        self.evict(keep=path)
+
+    def evict(self, keep: Path | None = None) -> None:
+        """
+        Remove the least recently used entries until the cache is within its size limit
+        :param keep: an entry that should not be removed (the one just written)
+        :return: None
+        """
+        entries = sorted(self.cache_dir.glob('*' + self.suffix), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entries)
+        for entry in entries:
+            if total <= self.max_size:
+                break
+            if entry == keep:
+                continue
+            total -= entry.stat().st_size
+            entry.unlink()
+            logger.info('Evicted data cache entry: %s', entry.name)
+        if total > self.max_size:
+            logger.warning(
+                'The data cache entry %s alone exceeds the cache size limit of %d bytes',
+                keep,
+                self.max_size,
+            )
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+        for entry in self.cache_dir.glob('*' + self.suffix):
+            entry.unlink()
@@ -0,0 +1,808 @@
+"""
+A fast path from a built model to the solver that bypasses the pyomo expressions (and the pyomo LP
+writer) for the objective and the largest constraint families
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+The components in FAST_COMPONENTS are removed from the model before it is constructed.  Their rows
+(and the objective coefficients) are generated here directly from the sparse index dictionaries
+built in temoa_initialize, and all remaining constraints are compiled from their pyomo expressions.
+The result is a matrix in CSR form with the row/column names kept on the side, which is written to
+a (free) MPS file for cbc, or handed to HiGHS in memory (see highs_backend.py).  The solution is
+loaded back into the model variables, and the duals are placed in a SolverResults object in the
+same structure that the TableWriter consumes.
+
+A model built entirely by pyomo may also be compiled (compile_model) and solved in memory with
+HiGHS (solve_in_memory), which skips the pyomo solver interface and its LP file.
+"""
+
+import shutil
+import subprocess
+from logging import getLogger
+from pathlib import Path
+from sys import stderr as SE
+from tempfile import TemporaryDirectory
+from time import time
+from typing import TextIO
+
+import numpy as np
+from pyomo.core.base.component_namer import index_repr
+from pyomo.core.base.var import VarData
+from pyomo.environ import Constraint, Objective, Var, minimize, quicksum, value
+from pyomo.opt import SolutionStatus, SolverResults, SolverStatus, TerminationCondition
+from pyomo.opt.results.solution import Solution
+from pyomo.repn.linear import LinearRepnVisitor
+
+from temoa.temoa_model.highs_backend import solve_lp
+from temoa.temoa_model.lp_export import export_lp, open_text, read_names
+from temoa.temoa_model.solver_profiles import solver_options as get_solver_options
+from temoa.temoa_model.temoa_initialize import CommodityBalanceConstraintErrorCheck
+from temoa.temoa_model.temoa_model import TemoaModel
+from temoa.temoa_model.temoa_rules import (
+    commodity_balance_template,
+    fixed_or_variable_cost,
+    get_capacity_factor,
+    loan_cost,
+)
+
+logger = getLogger(__name__)
+
+# the components that are generated here instead of by pyomo
+FAST_COMPONENTS = ('TotalCost', 'CapacityConstraint', 'CommodityBalanceConstraint')
+
+# map of the CBC status line to the pyomo status
+cbc_status = {
+    'Optimal': (SolverStatus.ok, TerminationCondition.optimal, SolutionStatus.optimal),
+    'Infeasible': (
+        SolverStatus.warning,
+        TerminationCondition.infeasible,
+        SolutionStatus.infeasible,
+    ),
+    'Unbounded': (SolverStatus.warning, TerminationCondition.unbounded, SolutionStatus.unbounded),
+}
+
+# map of the HiGHS model status to the pyomo status
+highs_status = {
+    'Optimal': cbc_status['Optimal'],
+    'Infeasible': cbc_status['Infeasible'],
+    'Unbounded': cbc_status['Unbounded'],
+    'Primal infeasible or unbounded': (
+        SolverStatus.warning,
+        TerminationCondition.infeasibleOrUnbounded,
+        SolutionStatus.unsure,
+    ),
+    'Time limit reached': (
+        SolverStatus.aborted,
+        TerminationCondition.maxTimeLimit,
+        SolutionStatus.stoppedByLimit,
+    ),
+}
+
+# the solvers the matrix may be handed to
+FAST_SOLVERS = ('cbc', 'highs')
+
+# the file kept by the fast writer when no export format is configured
+KEPT_MPS = {'format': 'mps', 'compression': 'none'}
+
+
+def remove_fast_components(model: TemoaModel) -> None:
+    """
+    Remove the components that are generated by the fast writer from an (un-constructed) model.
+    The index sets of the constraints are retained.
+    :param model: the abstract model
+    :return: None
+    """
+    for name in FAST_COMPONENTS:
+        model.del_component(name)
+
+
+class LinearProgram:
+    """
+    A linear program:  min c'x  s.t.  row_lb <= Ax <= row_ub,  col_lb <= x <= col_ub
+    The coefficients of A are collected as (row, col, coef) triplets, and the names of the rows
+    and the variables of the columns are kept on the side.
+    """
+
+    def __init__(self):
+        self.columns: list[VarData] = []
+        self._col_of: dict[int, int] = {}
+        self.row_names: list[str] = []
+        self.row_lb: list[float | None] = []
+        self.row_ub: list[float | None] = []
+        self.row_idx: list[int] = []
+        self.col_idx: list[int] = []
+        self.coefs: list[float] = []
+        self.objective: dict[int, float] = {}
+        self.objective_offset = 0.0
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.row_names)
+
+    @property
+    def num_cols(self) -> int:
+        return len(self.columns)
+
+    def col(self, var: VarData) -> int:
+        """get the column for a variable, adding it if it is new"""
+        j = self._col_of.get(id(var))
+        if j is None:
+            j = len(self.columns)
+            self._col_of[id(var)] = j
+            self.columns.append(var)
+        return j
+
+    def add_row(self, name: str, terms, lb: float | None, ub: float | None) -> None:
+        """
+        Add a row to the matrix
+        :param name: the name of the row (constraint)
+        :param terms: iterable of (variable, coefficient) pairs.  Repeated variables are summed.
+        :param lb: the lower bound or None
+        :param ub: the upper bound or None
+        :return: None
+        """
+        row: dict[int, float] = {}
+        for var, coef in terms:
+            j = self.col(var)
+            row[j] = row.get(j, 0) + coef
+        if not row:
+            if (lb is not None and lb > 0) or (ub is not None and ub < 0):
+                raise ValueError(f'Constraint {name} has no variables and is infeasible')
+            return
+        i = len(self.row_names)
+        self.row_names.append(name)
+        self.row_lb.append(lb)
+        self.row_ub.append(ub)
+        self.row_idx.extend([i] * len(row))
+        self.col_idx.extend(row.keys())
+        self.coefs.extend(row.values())
+
+    def add_objective_term(self, var: VarData, coef: float) -> None:
+        j = self.col(var)
+        self.objective[j] = self.objective.get(j, 0) + coef
+
+    def objective_expression(self):
+        """a pyomo expression of the objective, for reporting the objective value"""
+        return quicksum(coef * self.columns[j] for j, coef in self.objective.items())
+
+    def csr(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The constraint matrix in CSR form
+        :return: tuple of (indptr, indices, data)
+        """
+        rows = np.asarray(self.row_idx, dtype=np.int64)
+        # the rows are added in order, so the triplets are already sorted by row
+        indptr = np.zeros(self.num_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.num_rows), out=indptr[1:])
+        return (
+            indptr,
+            np.asarray(self.col_idx, dtype=np.int64),
+            np.asarray(self.coefs, dtype=np.float64),
+        )
+
+    def col_bounds(self) -> tuple[list[float | None], list[float | None]]:
+        """the bounds of the columns (fixed variables are bounded at their value)"""
+        lbs, ubs = [], []
+        for var in self.columns:
+            if var.fixed:
+                lbs.append(value(var))
+                ubs.append(value(var))
+            else:
+                lbs.append(var.lb)
+                ubs.append(var.ub)
+        return lbs, ubs
+
+    def write_mps(self, filename: Path) -> None:
+        """
+        Write the program to a free-format MPS file.  The rows and columns are given short labels
+        (r<i> and c<j>), which map back to the name lists by index (see write_names).
+        :param filename: the file to write
+        :return: None
+        """
+        with open(filename, 'w') as f:
+            self.write_mps_stream(f)
+
+    def write_mps_stream(self, f: TextIO) -> None:
+        """
+        Write the program in free-format MPS to an open text stream (a file, or a compressed stream)
+        :param f: the stream
+        :return: None
+        """
+        indptr, indices, data = self.csr()
+        rows = np.repeat(np.arange(self.num_rows), np.diff(indptr))
+        # MPS is written by column
+        order = np.argsort(indices, kind='stable')
+        col_ptr = np.zeros(self.num_cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=self.num_cols), out=col_ptr[1:])
+        col_rows, col_data = rows[order], data[order]
+
+        f.write('NAME temoa FREE\n')
+        f.write('ROWS\n N  obj\n')
+        for i, (lb, ub) in enumerate(zip(self.row_lb, self.row_ub)):
+            if lb is not None and ub is not None and lb == ub:
+                f.write(f' E  r{i}\n')
+            elif lb is None:
+                f.write(f' L  r{i}\n')
+            else:
+                f.write(f' G  r{i}\n')
+        f.write('COLUMNS\n')
+        for j in range(self.num_cols):
+            f.write(f'     c{j} obj {float(self.objective.get(j, 0))!r}\n')
+            for k in range(col_ptr[j], col_ptr[j + 1]):
+                f.write(f'     c{j} r{col_rows[k]} {float(col_data[k])!r}\n')
+        f.write('RHS\n')
+        if self.objective_offset:
+            # the (negated) rhs of the objective row is its constant
+            f.write(f'     RHS obj {-float(self.objective_offset)!r}\n')
+        ranges = []
+        for i, (lb, ub) in enumerate(zip(self.row_lb, self.row_ub)):
+            rhs = lb if lb is not None else ub
+            if rhs:
+                f.write(f'     RHS r{i} {float(rhs)!r}\n')
+            if lb is not None and ub is not None and lb != ub:
+                ranges.append((i, ub - lb))
+        if ranges:
+            f.write('RANGES\n')
+            for i, spread in ranges:
+                f.write(f'     RNG r{i} {float(spread)!r}\n')
+        f.write('BOUNDS\n')
+        for j, (lb, ub) in enumerate(zip(*self.col_bounds())):
+            if lb is None and ub is None:
+                f.write(f' FR BOUND c{j}\n')
+            elif lb is not None and lb == ub:
+                f.write(f' FX BOUND c{j} {float(lb)!r}\n')
+            else:
+                if lb is None:
+                    f.write(f' MI BOUND c{j}\n')
+                elif lb != 0 or (ub is not None and ub < 0):
+                    f.write(f' LO BOUND c{j} {float(lb)!r}\n')
+                if ub is not None:
+                    f.write(f' UP BOUND c{j} {float(ub)!r}\n')
+        f.write('ENDATA\n')
+
+    def write_lp_stream(self, f: TextIO) -> None:
+        """
+        Write the program in (CPLEX) LP format to an open text stream, with the labels of the MPS
+        :param f: the stream
+        :return: None
+        """
+        indptr, indices, data = self.csr()
+        f.write('\\ temoa\nminimize\nobj:')
+        for j, coef in self.objective.items():
+            f.write(f' {float(coef):+.17g} c{j}')
+        if self.objective_offset:
+            f.write(f' {float(self.objective_offset):+.17g}')
+        f.write('\nsubject to\n')
+        for i, (lb, ub) in enumerate(zip(self.row_lb, self.row_ub)):
+            terms = ' '.join(
+                f'{float(data[k]):+.17g} c{indices[k]}' for k in range(indptr[i], indptr[i + 1])
+            )
+            if lb is not None and ub is not None and lb == ub:
+                f.write(f'r{i}: {terms} = {float(lb)!r}\n')
+            elif lb is None:
+                f.write(f'r{i}: {terms} <= {float(ub)!r}\n')
+            elif ub is None:
+                f.write(f'r{i}: {terms} >= {float(lb)!r}\n')
+            else:
+                f.write(f'r{i}: {float(lb)!r} <= {terms} <= {float(ub)!r}\n')
+        f.write('bounds\n')
+        for j, (lb, ub) in enumerate(zip(*self.col_bounds())):
+            if lb is None and ub is None:
+                f.write(f'c{j} free\n')
+            elif lb is not None and lb == ub:
+                f.write(f'c{j} = {float(lb)!r}\n')
+            elif lb is None:
+                f.write(f'-inf <= c{j} <= {float(ub)!r}\n')
+            elif ub is None:
+                if lb != 0:
+                    f.write(f'c{j} >= {float(lb)!r}\n')
+            else:
+                f.write(f'{float(lb)!r} <= c{j} <= {float(ub)!r}\n')
+        f.write('end\n')
+
+    def write_names(self, f: TextIO) -> None:
+        """
+        Write the map of the short labels to the row (constraint) and column (variable) names
+        :param f: the stream
+        :return: None
+        """
+        f.writelines(f'r{i} {name}\n' for i, name in enumerate(self.row_names))
+        f.writelines(f'c{j} {var.name}\n' for j, var in enumerate(self.columns))
+
+
+def compile_instance(M: TemoaModel) -> LinearProgram:
+    """
+    Compile a constructed model (without the FAST_COMPONENTS) into a linear program
+    :param M: the model
+    :return: the linear program
+    """
+    lp = LinearProgram()
+    _add_pyomo_constraints(M, lp)
+    _add_capacity_rows(M, lp)
+    _add_commodity_balance_rows(M, lp)
+    _add_objective(M, lp)
+    return lp
+
+
+def compile_model(M: TemoaModel) -> LinearProgram:
+    """
+    Compile a model built entirely by pyomo (with the FAST_COMPONENTS) into a linear program
+    :param M: the model
+    :return: the linear program
+    """
+    lp = LinearProgram()
+    _add_pyomo_constraints(M, lp)
+    var_map = {}
+    objective = next(M.component_data_objects(Objective, active=True))
+    repn = LinearRepnVisitor({}, var_map, {}, None).walk_expression(objective.expr)
+    if repn.nonlinear is not None:
+        raise ValueError('The in-memory solve requires a linear objective')
+    sign = 1 if objective.sense == minimize else -1
+    for vid, coef in repn.linear.items():
+        lp.add_objective_term(var_map[vid], sign * coef)
+    lp.objective_offset = sign * repn.constant
+    return lp
+
+
+def _add_pyomo_constraints(M: TemoaModel, lp: LinearProgram) -> None:
+    """compile the (linear) constraints that were built by pyomo"""
+    var_map = {}
+    visitor = LinearRepnVisitor({}, var_map, {}, None)
+    for con in M.component_data_objects(Constraint, active=True):
+        lb, body, ub = con.to_bounded_expression(evaluate_bounds=True)
+        repn = visitor.walk_expression(body)
+        if repn.nonlinear is not None:
+            raise ValueError(f'The fast writer requires linear constraints.  {con.name} is not')
+        if repn.constant:
+            lb = None if lb is None else lb - repn.constant
+            ub = None if ub is None else ub - repn.constant
+        lp.add_row(con.name, ((var_map[vid], coef) for vid, coef in repn.linear.items()), lb, ub)
+
+
+def _add_capacity_rows(M: TemoaModel, lp: LinearProgram) -> None:
+    """the rows of the Capacity_Constraint (see temoa_rules)"""
+    for r, p, s, d, t, v in M.CapacityConstraint_rpsdtv:
+        if t in M.tech_storage:
+            continue
+        coef = (
+            get_capacity_factor(M, r, s, d, t, v)
+            * value(M.CapacityToActivity[r, t])
+            * value(M.SegFrac[s, d])
+            * value(M.ProcessLifeFrac[r, p, t, v])
+        )
+        flows = [
+            (S_i, S_o)
+            for S_i in M.processInputs[r, p, t, v]
+            for S_o in M.ProcessOutputsByInput[r, p, t, v, S_i]
+        ]
+        terms = [(M.V_FlowOut[r, p, s, d, S_i, t, v, S_o], 1) for S_i, S_o in flows]
+        name = 'CapacityConstraint' + index_repr((r, p, s, d, t, v))
+        if t in M.tech_curtailment:
+            # capacity == activity + curtailment
+            terms = [(M.V_Capacity[r, p, t, v], coef)] + [(var, -1) for var, _ in terms]
+            terms.extend((M.V_Curtailment[r, p, s, d, S_i, t, v, S_o], -1) for S_i, S_o in flows)
+            lp.add_row(name, terms, 0, 0)
+        else:
+            # activity - capacity <= 0 (the orientation pyomo gives to capacity >= activity)
+            terms.append((M.V_Capacity[r, p, t, v], -coef))
+            lp.add_row(name, terms, None, 0)
+
+
+def _add_commodity_balance_rows(M: TemoaModel, lp: LinearProgram) -> None:
+    """the rows of the CommodityBalance_Constraint (see temoa_rules)"""
+    for r, p, s, d, c in M.CommodityBalanceConstraint_rpsdc:
+        if c in M.commodity_demand:
+            continue
+        template = M.commodityBalanceTemplates.get((r, p, c))
+        if template is None:
+            template = commodity_balance_template(M, r, p, c)
+            M.commodityBalanceTemplates[r, p, c] = template
+        seg = value(M.SegFrac[s, d])
+        # production + imports
+        produced = [
+            (M.V_FlowOut[r, p, s, d, S_i, S_t, S_v, c], 1) for S_i, S_t, S_v in template.produced
+        ]
+        produced.extend(
+            (M.V_FlowOut[reg_r, p, s, d, S_i, S_t, S_v, c], 1)
+            for reg_r, S_t, S_v, S_i in template.imports
+        )
+        # consumption + exports + excess
+        consumed = [
+            (M.V_FlowIn[r, p, s, d, c, S_t, S_v, S_o], 1) for S_t, S_v, S_o in template.to_storage
+        ]
+        consumed.extend(
+            (M.V_FlowOut[r, p, s, d, c, S_t, S_v, S_o], 1 / eff)
+            for S_t, S_v, S_o, eff in template.to_non_storage
+        )
+        consumed.extend(
+            (M.V_FlowOutAnnual[r, p, c, S_t, S_v, S_o], seg / eff)
+            for S_t, S_v, S_o, eff in template.to_annual
+        )
+        consumed.extend(
+            (M.V_FlowOut[r_reg, p, s, d, c, S_t, S_v, S_o], 1 / eff)
+            for r_reg, S_t, S_v, S_o, eff in template.exports
+        )
+        consumed.extend(
+            (M.V_Flex[r, p, s, d, S_i, S_t, S_v, c], 1) for S_i, S_t, S_v in template.flex or ()
+        )
+        if not produced:
+            # re-use the error reporting of the pyomo rule
+            CommodityBalanceConstraintErrorCheck(
+                0, quicksum(coef * var for var, coef in consumed), r, p, s, d, c
+            )
+        lp.add_row(
+            'CommodityBalanceConstraint' + index_repr((r, p, s, d, c)),
+            produced + [(var, -coef) for var, coef in consumed],
+            0,
+            0,
+        )
+
+
+def _add_objective(M: TemoaModel, lp: LinearProgram) -> None:
+    """the coefficients of the TotalCost objective (see PeriodCost_rule in temoa_rules)"""
+    P_0 = min(M.time_optimize)
+    P_e = M.time_future.last()  # End point of modeled horizon
+    GDR = value(M.GlobalDiscountRate)
+    MPL = M.ModelProcessLife
+
+    if value(M.MyopicBaseyear) != 0:
+        P_0 = value(M.MyopicBaseyear)
+
+    for p in M.time_optimize:
+        for r, S_t, S_v in M.CostInvest_by_v.get(p, ()):
+            coef = loan_cost(
+                1.0,
+                value(M.CostInvest[r, S_t, S_v]),
+                value(M.LoanAnnualize[r, S_t, S_v]),
+                value(M.LoanLifetimeProcess[r, S_t, S_v]),
+                value(M.LifetimeProcess[r, S_t, S_v]),
+                P_0,
+                P_e,
+                GDR,
+                vintage=S_v,
+            )
+            lp.add_objective_term(M.V_NewCapacity[r, S_t, S_v], coef)
+
+        for r, S_p, S_t, S_v in M.CostFixed_by_p.get(p, ()):
+            coef = fixed_or_variable_cost(
+                1.0, value(M.CostFixed[r, p, S_t, S_v]), value(MPL[r, p, S_t, S_v]), GDR, P_0, p=p
+            )
+            lp.add_objective_term(M.V_Capacity[r, p, S_t, S_v], coef)
+
+        for r, S_p, S_t, S_v in M.CostVariable_by_p.get(p, ()):
+            coef = fixed_or_variable_cost(
+                1.0, value(M.CostVariable[r, p, S_t, S_v]), value(MPL[r, p, S_t, S_v]), GDR, P_0, p
+            )
+            for S_i in M.processInputs[r, S_p, S_t, S_v]:
+                for S_o in M.ProcessOutputsByInput[r, S_p, S_t, S_v, S_i]:
+                    if S_t in M.tech_annual:
+                        lp.add_objective_term(M.V_FlowOutAnnual[r, p, S_i, S_t, S_v, S_o], coef)
+                        continue
+                    for s in M.time_season:
+                        for d in M.time_of_day:
+                            lp.add_objective_term(M.V_FlowOut[r, p, s, d, S_i, S_t, S_v, S_o], coef)
+
+        # emissions costs on the flows out (flex and curtailed flows are not taxed)
+        for r, e, i, t, v, o in M.CostEmission_by_p.get(p, ()):
+            coef = fixed_or_variable_cost(
+                value(M.EmissionActivity[r, e, i, t, v, o]),
+                value(M.CostEmission[r, p, e]),
+                value(MPL[r, p, t, v]),
+                GDR,
+                P_0,
+                p,
+            )
+            if t in M.tech_annual:
+                if t not in M.tech_flex:
+                    lp.add_objective_term(M.V_FlowOutAnnual[r, p, i, t, v, o], coef)
+                continue
+            for s in M.time_season:
+                for d in M.time_of_day:
+                    lp.add_objective_term(M.V_FlowOut[r, p, s, d, i, t, v, o], coef)
+
+
+def _run_cbc(
+    mps_file: Path, solution_file: Path, silent: bool, solver_options: dict | None = None
+) -> None:
+    cbc = shutil.which('cbc')
+    if cbc is None:
+        logger.error('The fast writer uses the cbc executable, which was not found on this system')
+        raise RuntimeError('cbc executable not found.  See log.')
+    cmd = [cbc, str(mps_file)]
+    # options with a value go first, then the actions (options without a value), as pyomo does
+    actions = []
+    for key, val in (solver_options or {}).items():
+        if str(val).strip():
+            cmd.extend([f'-{key}', str(val)])
+        else:
+            actions.append(f'-{key}')
+    cmd.extend(actions)
+    cmd.extend(['-solve', '-printingOptions', 'all', '-solution', str(solution_file)])
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    if not silent:
+        SE.write(res.stdout)
+    logger.debug('cbc output:\n%s', res.stdout)
+    if res.returncode != 0 or not solution_file.is_file():
+        logger.error('cbc failed with return code %d: %s', res.returncode, res.stderr)
+        raise RuntimeError('cbc failed to solve the model.  See log.')
+
+
+def read_cbc_solution(lp: LinearProgram, solution_file: Path) -> tuple[str, np.ndarray, np.ndarray]:
+    """
+    Read a CBC solution file written for the MPS file of the linear program
+    :param lp: the linear program
+    :param solution_file: the solution file
+    :return: tuple of (status word, primal values by column, dual values by row)
+    """
+    primal = np.zeros(lp.num_cols)
+    dual = np.zeros(lp.num_rows)
+    with open(solution_file) as f:
+        status = f.readline().split()[0]
+        for line in f:
+            # lines are: [**] index label value dual/reduced cost
+            label, val, dual_val = line.split()[-3:]
+            if label[0] == 'c':
+                primal[int(label[1:])] = float(val)
+            else:
+                dual[int(label[1:])] = float(dual_val)
+    return status, primal, dual
+
+
+def read_solution_file(solution_file: Path) -> tuple[str, dict[str, float], dict[str, float]]:
+    """
+    Read a (possibly compressed) solution file for an exported model, labeled r<i> and c<j>.
+    Either a cbc solution file, or a file of "label value" lines with comment lines starting with
+    '#' (such as a gurobi .sol file), which carries no duals.
+    :param solution_file: the solution file
+    :return: tuple of (status word, values by column label, duals by row label)
+    """
+    values, duals = {}, {}
+    with open_text(Path(solution_file)) as f:
+        first = f.readline()
+        if first.startswith('#'):
+            status = 'Optimal'  # the file is only written for a solution
+            for line in f:
+                if line.strip() and not line.startswith('#'):
+                    label, val = line.split()[:2]
+                    values[label] = float(val)
+        else:
+            status = first.split()[0]
+            for line in f:
+                # lines are: [**] index label value dual/reduced cost
+                label, val, dual_val = line.split()[-3:]
+                if label[0] == 'c':
+                    values[label] = float(val)
+                else:
+                    duals[label] = float(dual_val)
+    return status, values, duals
+
+
+def load_solution(
+    instance: TemoaModel, names_file: Path, solution_file: Path, solver_suffixes=None
+) -> SolverResults:
+    """
+    Load a solution of an exported model (solved elsewhere) into the instance it was exported from
+    :param instance: the instance
+    :param names_file: the map of the labels to the names, written with the export
+    :param solution_file: the solution file (see read_solution_file)
+    :param solver_suffixes: iterable of suffix names.  Only 'duals' is supported
+    :return: the results, like those of a solve
+    """
+    tic = time()
+    names = read_names(names_file)
+    status_word, values, duals = read_solution_file(solution_file)
+    solver_status, termination, solution_status = cbc_status.get(
+        status_word, (SolverStatus.warning, TerminationCondition.other, SolutionStatus.other)
+    )
+    results = SolverResults()
+    results.solver.name = 'external'
+    results.solver.status = solver_status
+    results.solver.termination_condition = termination
+    results.problem.name = instance.name
+    results.problem.sense = minimize
+    soln = Solution()
+    soln.status = solution_status
+    if termination == TerminationCondition.optimal:
+        variables = {var.name: var for var in instance.component_data_objects(Var)}
+        for label, name in names.items():
+            if label[0] == 'c':
+                variables[name].set_value(values.get(label, 0.0), skip_validation=True)
+        objective = instance.component('TotalCost')
+        if objective is not None:
+            obj_value = value(objective)
+            results.problem.lower_bound = results.problem.upper_bound = obj_value
+            soln.objective['TotalCost'] = {'Value': obj_value}
+        if solver_suffixes and 'duals' in solver_suffixes:
+            for label, name in names.items():
+                if label[0] == 'r':
+                    soln.constraint[name] = {'Dual': duals.get(label, 0.0)}
+    results.solution.insert(soln)
+    logger.info(
+        'Loaded the %s solution in %s in %0.2f seconds', status_word, solution_file, time() - tic
+    )
+    return results
+
+
+def _make_results(
+    instance: TemoaModel,
+    lp: LinearProgram,
+    solver_name: str,
+    status: tuple[SolverStatus, TerminationCondition, SolutionStatus],
+    primal: np.ndarray,
+    dual: np.ndarray,
+    solver_suffixes=None,
+) -> SolverResults:
+    """
+    Load the solution into the instance variables and gather the results
+    :param instance: the instance solved, with the TotalCost objective
+    :param lp: the linear program that was solved
+    :param solver_name: the name of the solver, for the results
+    :param status: the pyomo (solver, termination, solution) status
+    :param primal: the values by column
+    :param dual: the duals by row
+    :param solver_suffixes: iterable of suffix names.  Only 'duals' is supported
+    :return: the results
+    """
+    solver_status, termination, solution_status = status
+    results = SolverResults()
+    results.solver.name = solver_name
+    results.solver.status = solver_status
+    results.solver.termination_condition = termination
+    results.problem.name = instance.name
+    results.problem.number_of_constraints = lp.num_rows
+    results.problem.number_of_variables = lp.num_cols
+    results.problem.number_of_nonzeros = len(lp.coefs)
+    results.problem.sense = minimize
+    soln = Solution()
+    soln.status = solution_status
+    if termination == TerminationCondition.optimal:
+        for var, val in zip(lp.columns, primal.tolist()):
+            var.set_value(val, skip_validation=True)
+        obj_value = value(instance.TotalCost)
+        results.problem.lower_bound = results.problem.upper_bound = obj_value
+        soln.objective['TotalCost'] = {'Value': obj_value}
+        if solver_suffixes and 'duals' in solver_suffixes:
+            for name, dual_val in zip(lp.row_names, dual.tolist()):
+                soln.constraint[name] = {'Dual': dual_val}
+    results.solution.insert(soln)
+    return results
+
+
+def _solve_highs(
+    lp: LinearProgram, silent: bool, solver_options: dict | None
+) -> tuple[str, tuple, np.ndarray, np.ndarray]:
+    """solve the linear program in memory and report (status, pyomo status, primal, dual)"""
+    if solver_options is None:
+        solver_options = get_solver_options('highs')
+    solution = solve_lp(lp, solver_options, silent)
+    status = highs_status.get(
+        solution.status, (SolverStatus.warning, TerminationCondition.other, SolutionStatus.other)
+    )
+    return solution.status, status, solution.primal, solution.dual
+
+
+def solve_instance(
+    instance: TemoaModel,
+    solver_name: str,
+    silent: bool = False,
+    solver_suffixes=None,
+    lp_path: Path | None = None,
+    solver_options: dict | None = None,
+    lp_export: dict | None = None,
+) -> tuple[TemoaModel, SolverResults]:
+    """
+    Solve an instance built without the FAST_COMPONENTS and return it loaded with the solution.
+    The TotalCost objective is added to the instance for reporting.
+    :param instance: the instance to solve
+    :param solver_name: the solver, one of FAST_SOLVERS.  cbc is handed an MPS file, HiGHS is
+    handed the matrix in memory
+    :param silent: Run silently
+    :param solver_suffixes: iterable of suffix names.  Only 'duals' is supported
+    :param lp_path: if provided, the MPS file (and the name map) are kept in this directory
+    :param solver_options: options passed to the solver.  If None, the default profile is used
+    :param lp_export: the format and compression of the kept file (see lp_export.py).  If None, a
+    plain MPS file is kept
+    :return: the loaded instance and the results
+    """
+    if solver_name not in FAST_SOLVERS:
+        logger.error(
+            'The fast writer supports the solvers %s.  Received: %s', FAST_SOLVERS, solver_name
+        )
+        raise ValueError(f'Solver {solver_name} is not supported by the fast writer')
+    hack = time()
+    if not silent:
+        SE.write('[        ] Writing matrix.')
+        SE.flush()
+    lp = compile_instance(instance)
+    instance.TotalCost = Objective(expr=lp.objective_expression(), sense=minimize)
+    logger.info(
+        'Compiled model to matrix with %d rows, %d columns and %d non-zeros in %0.2f seconds',
+        lp.num_rows,
+        lp.num_cols,
+        len(lp.coefs),
+        time() - hack,
+    )
+
+    with TemporaryDirectory() as temp_dir:
+        mps_file, solution_file = Path(temp_dir) / 'model.mps', Path(temp_dir) / 'model.sol'
+        if lp_path:
+            # the kept copy is a plain MPS file, unless an export format is configured
+            model_file, _ = export_lp(lp, lp_path, **(lp_export or KEPT_MPS))
+            if model_file.name == mps_file.name:
+                mps_file = model_file
+        if solver_name == 'cbc' and not mps_file.is_file():
+            lp.write_mps(mps_file)
+        if not silent:
+            SE.write('\r[%8.2f] Matrix written.\n' % (time() - hack))
+            SE.write('[        ] Solving.')
+            SE.flush()
+        hack = time()
+        if solver_name == 'highs':
+            status_word, status, primal, dual = _solve_highs(lp, silent, solver_options)
+        else:
+            if solver_options is None:
+                solver_options = get_solver_options('cbc')
+            _run_cbc(mps_file, solution_file, silent, solver_options)
+            status_word, primal, dual = read_cbc_solution(lp, solution_file)
+            status = cbc_status.get(
+                status_word,
+                (SolverStatus.warning, TerminationCondition.other, SolutionStatus.other),
+            )
+
+    results = _make_results(instance, lp, solver_name, status, primal, dual, solver_suffixes)
+    logger.info('Solve process complete with %s status: %s', solver_name, status_word)
+    if not silent:
+        SE.write('\r[%8.2f] Model solved.\n' % (time() - hack))
+        SE.flush()
+    return instance, results
+
+
+def solve_in_memory(
+    instance: TemoaModel,
+    silent: bool = False,
+    solver_suffixes=None,
+    solver_options: dict | None = None,
+) -> tuple[TemoaModel, SolverResults]:
+    """
+    Solve an instance built entirely by pyomo with HiGHS, handing over the matrix in memory
+    :param instance: the instance to solve
+    :param silent: Run silently
+    :param solver_suffixes: iterable of suffix names.  Only 'duals' is supported
+    :param solver_options: options passed to HiGHS.  If None, the default profile is used
+    :return: the loaded instance and the results
+    """
+    hack = time()
+    lp = compile_model(instance)
+    logger.info(
+        'Compiled model to matrix with %d rows, %d columns and %d non-zeros in %0.2f seconds',
+        lp.num_rows,
+        lp.num_cols,
+        len(lp.coefs),
+        time() - hack,
+    )
+    status_word, status, primal, dual = _solve_highs(lp, silent, solver_options)
+    results = _make_results(instance, lp, 'highs', status, primal, dual, solver_suffixes)
+    logger.info('Solve process complete with highs status: %s', status_word)
+    return instance, results
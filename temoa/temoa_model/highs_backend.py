@@ -0,0 +1,160 @@
+"""
+A direct, in-memory interface to the HiGHS solver (through highspy) for a compiled linear program
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+The matrix of a LinearProgram (see fast_writer.py) is handed to HiGHS as arrays, so no model file
+is written or parsed, and the primal values, row duals and reduced costs come back as arrays,
+indexed like the columns and rows of the LinearProgram.  The duals follow the same convention as
+those of the other solvers:  the change in the objective per unit increase of the row bound.
+"""
+
+from dataclasses import dataclass
+from logging import getLogger
+from time import time
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import highspy
+
+    from temoa.temoa_model.fast_writer import LinearProgram
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class HighsSolution:
+    """The outcome of a HiGHS solve"""
+
+    status: str
+    """the model status, as reported by HiGHS (e.g. 'Optimal')"""
+    objective: float | None
+    primal: np.ndarray
+    """values by column"""
+    dual: np.ndarray
+    """duals by row"""
+    reduced_costs: np.ndarray
+    """reduced costs by column"""
+    run_time: float
+
+    @property
+    def optimal(self) -> bool:
+        return self.status == 'Optimal'
+
+
+def _bounds(values: list[float | None], default: float) -> np.ndarray:
+    """the bounds as an array, with None (no bound) given as the default (+/- infinity)"""
+    return np.array([default if v is None else v for v in values], dtype=np.float64)
+
+
+def _import_highspy() -> ModuleType:
+    """import highspy on first use, so that it is only required by the HiGHS solves"""
+    try:
+        import highspy
+    except ImportError:
+        logger.error('The highs solver requires the highspy package, which is not installed')
+        raise RuntimeError('highspy package not available.  See log.')
+    return highspy
+
+
+def make_highs_lp(lp: 'LinearProgram') -> 'highspy.HighsLp':
+    """
+    Put the linear program into a HighsLp (minimization, row-wise matrix)
+    :param lp: the linear program
+    :return: the HighsLp
+    """
+    highspy = _import_highspy()
+    inf = highspy.kHighsInf
+    h_lp = highspy.HighsLp()
+    h_lp.num_col_ = lp.num_cols
+    h_lp.num_row_ = lp.num_rows
+    h_lp.sense_ = highspy.ObjSense.kMinimize
+    h_lp.offset_ = lp.objective_offset
+    cost = np.zeros(lp.num_cols, dtype=np.float64)
+    if lp.objective:
+        cost[list(lp.objective.keys())] = list(lp.objective.values())
+    h_lp.col_cost_ = cost
+    col_lb, col_ub = lp.col_bounds()
+    h_lp.col_lower_ = _bounds(col_lb, -inf)
+    h_lp.col_upper_ = _bounds(col_ub, inf)
+    h_lp.row_lower_ = _bounds(lp.row_lb, -inf)
+    h_lp.row_upper_ = _bounds(lp.row_ub, inf)
+    indptr, indices, data = lp.csr()
+    h_lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    h_lp.a_matrix_.num_col_ = lp.num_cols
+    h_lp.a_matrix_.num_row_ = lp.num_rows
+    h_lp.a_matrix_.start_ = indptr.astype(np.int32)
+    h_lp.a_matrix_.index_ = indices.astype(np.int32)
+    h_lp.a_matrix_.value_ = data
+    return h_lp
+
+
+def solve_lp(
+    lp: 'LinearProgram', solver_options: dict | None = None, silent: bool = False
+) -> HighsSolution:
+    """
+    Solve the linear program with HiGHS
+    :param lp: the linear program
+    :param solver_options: HiGHS options (by the HiGHS option names)
+    :param silent: suppress the HiGHS output
+    :return: the solution
+    """
+    highspy = _import_highspy()
+    h = highspy.Highs()
+    if silent:
+        h.silent()
+    for key, val in (solver_options or {}).items():
+        if h.setOptionValue(key, val) != highspy.HighsStatus.kOk:
+            logger.error('HiGHS rejected the option %s = %s', key, val)
+            raise ValueError(f'Bad HiGHS option: {key} = {val}')
+    if solver_options:
+        logger.info('Solver options: %s', solver_options)
+
+    tic = time()
+    h.passModel(make_highs_lp(lp))
+    logger.info('Passed the matrix to HiGHS in %0.2f seconds', time() - tic)
+    if h.run() == highspy.HighsStatus.kError:
+        logger.error('HiGHS failed to run on the model')
+        raise RuntimeError('HiGHS failed to solve the model.  See log.')
+
+    status = h.modelStatusToString(h.getModelStatus())
+    solution = h.getSolution()
+    info = h.getInfo()
+    has_solution = solution.value_valid
+    result = HighsSolution(
+        status=status,
+        objective=info.objective_function_value if has_solution else None,
+        primal=np.asarray(solution.col_value) if has_solution else np.zeros(lp.num_cols),
+        dual=np.asarray(solution.row_dual) if solution.dual_valid else np.zeros(lp.num_rows),
+        reduced_costs=(
+            np.asarray(solution.col_dual) if solution.dual_valid else np.zeros(lp.num_cols)
+        ),
+        run_time=h.getRunTime(),
+    )
+    logger.info('HiGHS status: %s in %0.2f seconds', status, result.run_time)
+    return result
@@ -3,22 +3,29 @@ A module to build/load a Data Portal for myopic run using both SQL to pull data
 and python to filter results
 """
 
+import threading
 import time
+import uuid
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
-from sqlite3 import Connection, OperationalError
-from typing import Sequence
+from pathlib import Path
+from sqlite3 import Connection, connect
+from typing import Sequence, NamedTuple
 
 from pyomo.core import Param, Set
 from pyomo.dataportal import DataPortal
 
 from temoa.extensions.myopic.myopic_index import MyopicIndex
+from temoa.temoa_model.data_cache import DataCache
 from temoa.temoa_model.model_checking import network_model_data, element_checker
 from temoa.temoa_model.model_checking.commodity_network_manager import CommodityNetworkManager
 from temoa.temoa_model.model_checking.element_checker import ViableSet
+from temoa.temoa_model.presolve import presolve
 from temoa.temoa_model.temoa_config import TemoaConfig
 from temoa.temoa_model.temoa_mode import TemoaMode
 from temoa.temoa_model.temoa_model import TemoaModel
+from temoa.temoa_model.time_slice_aggregation import aggregate_seasons
 
 """
 Tools for Energy Model Optimization and Analysis (Temoa):
@@ -64,17 +71,38 @@ tables_with_regional_groups = {
     'MaxCapacityGroup': 'region',
 }
 
+# the column names that hold region labels, which are scanned to build the region alias table
+region_columns = ('region', 'primary_region')
+
+
+class DeferredQuery(NamedTuple):
+    """
+    A query that is not executed until it is loaded, so that the screening of the results
+    against a ViableSet can be pushed down into the database, if enabled
+    """
+
+    qry: str
+    params: Sequence = ()
+
 
 class HybridLoader:
     """
     An instance of the HybridLoader
     """
 
-    def __init__(self, db_connection: Connection, config: TemoaConfig):
+    def __init__(
+        self,
+        db_connection: Connection,
+        config: TemoaConfig,
+        window_cache: dict[DeferredQuery, list[tuple]] | None = None,
+    ):
         """
         build a loader for an instance.
         :param db_connection: a Connection to the database
         :param config: the config, which controls some options during execution
+        :param window_cache: (optional) a store of un-screened query results that do not vary
+        between myopic windows.  It is filled on the first load and re-used by subsequent loads
+        that are passed the same store.
         """
         self.debugging = False  # for T/S, will print to screen the data load values
         self.con = db_connection
@@ -94,6 +122,12 @@ class HybridLoader:
         self.viable_rtt: ViableSet | None = None  # to support scanning LinkedTech
         self.efficiency_values: list[tuple] = []
 
+        # the tables holding the viable sets, if the filtering is pushed down to SQL
+        self.viable_db: str | None = None  # URI of the in-memory db holding the tables
+        self.viable_tables: dict[ViableSet, str] = {}
+
+        self.window_cache = window_cache
+
     def source_trace_only(self, make_plots: bool = False, myopic_index: MyopicIndex | None = None):
         if myopic_index and not isinstance(myopic_index, MyopicIndex):
             raise ValueError('myopic_index must be an instance of MyopicIndex')
@@ -199,6 +233,256 @@ class HybridLoader:
         logger.info('Did not find existing table for (optional) table:  %s', table_name)
         return False
 
+    def column_exists(self, table_name: str, column_name: str) -> bool:
+        """
+        Check if a column exists in a table... for use with columns added in later schemas
+        :param table_name: the table name
+        :param column_name: the column name to check
+        :return: True if it exists in the table
+        """
+        columns = self.con.execute(f'PRAGMA table_info({table_name})').fetchall()
+        return any(col[1] == column_name for col in columns)
+
+    def _region_labels(self) -> set[str]:
+        """
+        Gather all of the region labels (regions, exchanges, groups) used in the input tables.
+        The output tables are not scanned.
+        :return: the set of distinct labels
+        """
+        cur = self.con.cursor()
+        placeholders = ', '.join('?' * len(region_columns))
+        table_columns = cur.execute(
+            'SELECT m.name, p.name FROM sqlite_master AS m '
+            'JOIN pragma_table_info(m.name) AS p '
+            f"WHERE m.type = 'table' AND m.name NOT LIKE 'Output%' AND p.name IN ({placeholders})",
+            region_columns,
+        ).fetchall()
+        if not table_columns:
+            return set()
+        qry = ' UNION '.join(f'SELECT {col} FROM main.{table}' for table, col in table_columns)
+        return {label for (label,) in cur.execute(qry) if label is not None}
+
+    def _create_viable_tables(self) -> None:
+        """
+        Write the members of the ViableSets into indexed tables so that the data queries
+        can be screened by JOIN in the database.  The tables are held in a shared in-memory
+        database, attached to the connection as 'viable', so that other (reader) connections
+        may attach it as well.  Region labels that are excepted by a ViableSet
+        (groups, 'global') are expanded into the table once, against the labels actually used in
+        the database, so there is no per-row regex matching.
+        :return: None
+        """
+        self._drop_viable_tables()
+        self.viable_db = f'file:temoa_viable_{uuid.uuid4().hex}?mode=memory&cache=shared'
+        self.con.execute('ATTACH DATABASE ? AS viable', (self.viable_db,))
+        viable_sets = {
+            'viable_ritvo': self.viable_ritvo,
+            'viable_rtv': self.viable_rtv,
+            'viable_rt': self.viable_rt,
+            'viable_rtt': self.viable_rtt,
+            'viable_t': self.viable_techs,
+            'viable_ic': self.viable_input_comms,
+            'viable_oc': self.viable_output_comms,
+            'viable_c': self.viable_comms,
+        }
+        region_labels: set[str] | None = None  # lazy, only needed for sets with exceptions
+        cur = self.con.cursor()
+        for table_name, viable_set in viable_sets.items():
+            # an empty set has no dimension and cannot be tabled.  It is screened in python.
+            if viable_set is None or viable_set.dim == 0:
+                continue
+            cols = [f'c{idx}' for idx in range(viable_set.dim)]
+            cur.execute(
+                f'CREATE TABLE viable.{table_name} ({", ".join(cols)}, '
+                f'PRIMARY KEY ({", ".join(cols)})) WITHOUT ROWID'
+            )
+            insert = (
+                f'INSERT OR IGNORE INTO viable.{table_name} '
+                f'VALUES ({", ".join("?" * viable_set.dim)})'
+            )
+            cur.executemany(insert, viable_set.member_tuples)
+
+            if viable_set.val_exceptions:
+                if region_labels is None:
+                    region_labels = self._region_labels()
+                aliases = sorted(filter(viable_set.excepts_label, region_labels))
+                loc = viable_set.exception_loc
+                if viable_set.non_excepted_items is None:  # only the excepted dimension
+                    others = [()]
+                else:
+                    others = [ViableSet.tupleize(item) for item in viable_set.non_excepted_items]
+                cur.executemany(
+                    insert,
+                    (
+                        (*other[:loc], label, *other[loc:])
+                        for label in aliases
+                        for other in others
+                    ),
+                )
+            self.viable_tables[viable_set] = table_name
+        # do not leave a transaction open on the connection, which may be shared with a writer
+        self.con.commit()
+
+    def _drop_viable_tables(self) -> None:
+        """
+        Remove the tables made for screening.  (The in-memory database is discarded when the
+        last connection detaches it.)
+        :return: None
+        """
+        self.viable_tables.clear()
+        if self.viable_db:
+            self.con.commit()
+            self.con.execute('DETACH DATABASE viable')
+            self.viable_db = None
+
+    def _fetch_viable(
+        self, con: Connection, query: DeferredQuery, validation: ViableSet, val_loc: tuple
+    ) -> list[tuple]:
+        """
+        Execute a query, screening the results against the table for a ViableSet
+        :param con: the connection to use, which must have the viable tables attached
+        :param query: the query to execute
+        :param validation: the ViableSet to screen against (must be tabled already)
+        :param val_loc: the positions in the query results that correspond to the ViableSet
+        dimensions
+        :return: the screened results, in the same order as the un-screened query
+        """
+        if len(val_loc) != validation.dim:
+            raise ValueError(
+                f'the value_locations {val_loc} and the validation set dimension '
+                f'{validation.dim} do not match'
+            )
+        cur = con.cursor()
+        # pull the column names without executing the query
+        probe = cur.execute(f'SELECT * FROM ({query.qry}) LIMIT 0', query.params)
+        col_names = [desc[0] for desc in probe.description]
+        join_condition = ' AND '.join(
+            f'src."{col_names[loc]}" = f.c{idx}' for idx, loc in enumerate(val_loc)
+        )
+        # CROSS JOIN prevents the planner from re-ordering the loops, so the table is scanned
+        # in its natural order (same as un-screened) and the viable table index is used for lookup
+        qry = (
+            f'SELECT src.* FROM ({query.qry}) AS src '
+            f'CROSS JOIN viable.{self.viable_tables[validation]} AS f ON {join_condition}'
+        )
+        return cur.execute(qry, query.params).fetchall()
+
+    def _run_query(
+        self,
+        con: Connection,
+        name: str,
+        query: DeferredQuery,
+        validation: ViableSet | None,
+        val_loc: tuple,
+    ) -> tuple[list[tuple], bool]:
+        """
+        Execute the query for a model component, screening it in the database if possible
+        :param con: the connection to use
+        :param name: the name of the component (for logging)
+        :param query: the query
+        :param validation: the ViableSet for the component, if any
+        :param val_loc: the positions in the query results that correspond to the ViableSet
+        :return: the results and a flag indicating if they have been screened
+        """
+        tic = time.time()
+        if self.window_cache is not None and self.is_window_invariant(query):
+            rows = self.window_cache.get(query)
+            if rows is not None:
+                logger.debug('Re-used %d rows for %s from the window cache', len(rows), name)
+                return rows, False
+            rows, screened = con.execute(query.qry, query.params).fetchall(), False
+            self.window_cache[query] = rows
+        elif validation in self.viable_tables:
+            rows, screened = self._fetch_viable(con, query, validation, val_loc), True
+        else:
+            rows, screened = con.execute(query.qry, query.params).fetchall(), False
+        logger.debug('Read %d rows for %s in %0.4f seconds', len(rows), name, time.time() - tic)
+        return rows, screened
+
+    @staticmethod
+    def is_window_invariant(query: DeferredQuery) -> bool:
+        """
+        Determine if the (un-screened) results of a query are the same in every myopic window.
+        The period-filtered queries are parameterized by the myopic index and the myopic sequencer
+        only writes to the Output and MyopicEfficiency tables, so un-parameterized queries on the
+        other tables are invariant.
+        :param query: the query
+        :return: True if the results can be re-used across windows
+        """
+        return not query.params and not any(
+            marker in query.qry for marker in ('Output', 'Myopic')
+        )
+
+    def _reader_db_file(self) -> Path | None:
+        """
+        Get the database file for a pool of reader connections, if one can be used
+        :return: the database file or None if reads should be done on the main connection
+        """
+        if self.config.reader_threads <= 1:
+            return None
+        db_file = next(
+            (file for _, name, file in self.con.execute('PRAGMA database_list') if name == 'main'),
+            None,
+        )
+        if not db_file:
+            logger.info('Database is in memory.  Data will be read on a single connection.')
+            return None
+        if self.con.in_transaction:
+            # other connections would not see the uncommitted changes
+            logger.warning(
+                'Connection has uncommitted changes.  Data will be read on a single connection.'
+            )
+            return None
+        return Path(db_file)
+
+    def _run_queries_parallel(
+        self, db_file: Path, queries: Sequence[tuple[str, DeferredQuery, ViableSet | None, tuple]]
+    ) -> list[tuple[list[tuple], bool]]:
+        """
+        Execute queries across a pool of threads, each with its own read-only connection
+        :param db_file: the database file
+        :param queries: tuples of (name, query, validation, val_loc) as used by _run_query
+        :return: the results of _run_query for each query, in the same order as the queries
+        """
+        local = threading.local()
+        connections: list[Connection] = []
+        lock = threading.Lock()
+
+        def reader_connection() -> Connection:
+            con = getattr(local, 'con', None)
+            if con is None:
+                con = connect(
+                    db_file.absolute().as_uri() + '?mode=ro', uri=True, check_same_thread=False
+                )
+                if self.viable_db:
+                    con.execute('ATTACH DATABASE ? AS viable', (self.viable_db,))
+                local.con = con
+                with lock:
+                    connections.append(con)
+            return con
+
+        def run(item):
+            name, query, validation, val_loc = item
+            return self._run_query(reader_connection(), name, query, validation, val_loc)
+
+        tic = time.time()
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.config.reader_threads, thread_name_prefix='temoa_reader'
+            ) as pool:
+                # map returns the results in the order submitted, regardless of completion order
+                results = list(pool.map(run, queries))
+        finally:
+            for con in connections:
+                con.close()
+        logger.debug(
+            'Read %d tables on %d threads in %0.4f seconds',
+            len(queries),
+            self.config.reader_threads,
+            time.time() - tic,
+        )
+        return results
+
     def load_data_portal(self, myopic_index: MyopicIndex | None = None) -> DataPortal:
         """
         Create and Load a Data Portal.  If source tracing is enabled in the config, the source trace will
@@ -206,6 +490,28 @@ class HybridLoader:
         :param myopic_index: the MyopicIndex for myopic run.  None for other modes
         :return:
         """
+        data = self.create_data_dict(myopic_index=myopic_index)
+
+        # pyomo namespace format has data[namespace][idx]=value
+        # the default namespace is None, thus...
+        namespace = {None: data}
+        if self.debugging:
+            for item in namespace[None].items():
+                print(item[0], item[1])
+        dp = DataPortal(data_dict=namespace)
+        return dp
+
+    def create_data_dict(
+        self, myopic_index: MyopicIndex | None = None, aggregate: bool = True
+    ) -> dict[str, list | dict]:
+        """
+        Create the dictionary of data for the model components, keyed by component name.  This is
+        the content of the Data Portal and may be used to build an instance directly.
+        :param myopic_index: the MyopicIndex for myopic run.  None for other modes
+        :param aggregate: apply the time slice aggregation in the config, if any.  False to get
+        the full resolution data regardless of the config
+        :return: the data dictionary, including the parameter indexing sets
+        """
         # the general plan:
         # 0. determine if source trace needs to be done, and do it
         # 1. build the efficiency table
@@ -213,7 +519,7 @@ class HybridLoader:
         # 3. use SQL query to get the full table
         # 4. (OPTIONALLY) filter it, as needed for myopic
         # 5. load it into the data dictionary
-        logger.info('Loading data portal')
+        logger.info('Loading model data')
 
         # some logic checking...
         if myopic_index is not None:
@@ -230,6 +536,26 @@ class HybridLoader:
                 'error.'
             )
 
+        # use cached data, if available.  (This skips the source trace and all data pulls.)
+        cache: DataCache | None = None
+        cache_key = None
+        if self.config.data_cache:
+            cache = DataCache(max_size_mb=self.config.data_cache_max_mb)
+            cache_key = cache.make_key(self.con, self.config, myopic_index, aggregate)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                logger.info('Loaded model data from the data cache, key: %s', cache_key)
+                if self.config.source_trace or myopic_index is not None:
+                    logger.warning(
+                        'The model data was loaded from the data cache, so the source trace was '
+                        'not run:  its log messages and commodity network plots are not produced '
+                        'for this run.  Set data_cache = false to get them.'
+                    )
+                if entry['presolve_report'] is not None:
+                    self._write_presolve_report(entry['presolve_report'])
+                return entry['data']
+            logger.info('No data cache entry found for key: %s', cache_key)
+
         if self.config.source_trace or self.config.scenario_mode == TemoaMode.MYOPIC:
             use_raw_data = False
             self._source_trace(myopic_index=myopic_index)
@@ -239,6 +565,10 @@ class HybridLoader:
         # build the Efficiency Dataset
         self._build_efficiency_dataset(use_raw_data=use_raw_data, myopic_index=myopic_index)
 
+        # push the screening down into the database, if requested
+        if self.config.sql_filtering and not use_raw_data:
+            self._create_viable_tables()
+
         mi = myopic_index  # convenience
 
         # time the creation of the data portal
@@ -246,16 +576,21 @@ class HybridLoader:
         # housekeeping
         data: dict[str, list | dict] = dict()
 
+        # the deferred queries are held for a pool of readers, if available
+        reader_db_file = self._reader_db_file()
+        pending: list[tuple[Set | Param, DeferredQuery, ViableSet | None, tuple]] = []
+
         def load_element(
             c: Set | Param,
-            values: Sequence[tuple],
+            values: Sequence[tuple] | DeferredQuery,
             validation: ViableSet | None = None,
             val_loc: tuple = (0,),
         ):
             """
             Helper to alleviate some typing!
             Expects that the values passed in are an iterable of tuples, like a standard
-            query result.  Note that any filtering is disregarded if there is no myopic index in use
+            query result, or a DeferredQuery to produce them.  Note that any filtering is
+            disregarded if raw data is in use
             :param c: the model component to load
             :param values: the keys for param or the item values for set as tuples (should be Sequence to help
             get deterministic results)
@@ -263,6 +598,13 @@ class HybridLoader:
             :param val_loc: tuple of the positions of r, t, v in the key for validation
             :return: None
             """
+            if isinstance(values, DeferredQuery):
+                if reader_db_file:  # read later, in parallel
+                    pending.append((c, values, validation, val_loc))
+                    return
+                values, screened = self._run_query(self.con, c.name, values, validation, val_loc)
+                if screened:
+                    validation = None
             if len(values) == 0:
                 logger.info('table, but no (usable) values for param or set: %s', c.name)
                 return
@@ -314,35 +656,35 @@ class HybridLoader:
 
         # time_exist
         if mi:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT period FROM main.TimePeriod  WHERE period < ? ORDER BY sequence',
                 (mi.base_year,),
-            ).fetchall()
+            )
         else:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 "SELECT period FROM main.TimePeriod WHERE flag = 'e' ORDER BY sequence"
-            ).fetchall()
+            )
         load_element(M.time_exist, raw)
 
         # time_future
         if mi:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT period FROM main.TimePeriod WHERE '
                 'period >= ? AND period <= ? ORDER BY sequence',
                 (mi.base_year, mi.last_year),
-            ).fetchall()
+            )
         else:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 "SELECT period FROM main.TimePeriod WHERE flag = 'f' ORDER BY sequence"
-            ).fetchall()
+            )
         load_element(M.time_future, raw)
 
         # time_of_day
-        raw = cur.execute('SELECT tod FROM main.TimeOfDay ORDER BY sequence').fetchall()
+        raw = DeferredQuery('SELECT tod FROM main.TimeOfDay ORDER BY sequence')
         load_element(M.time_of_day, raw)
 
         # time_season
-        raw = cur.execute('SELECT season FROM main.TimeSeason ORDER BY sequence').fetchall()
+        raw = DeferredQuery('SELECT season FROM main.TimeSeason ORDER BY sequence')
         load_element(M.time_season, raw)
 
         # myopic_base_year
@@ -358,7 +700,7 @@ class HybridLoader:
         #  === REGION SETS ===
 
         # regions
-        raw = cur.execute('SELECT region FROM main.Region').fetchall()
+        raw = DeferredQuery('SELECT region FROM main.Region')
         load_element(M.regions, raw)
 
         # region-groups  (these are the R1+R2, R1+R4+R6 type region labels)
@@ -380,32 +722,33 @@ class HybridLoader:
         #  === TECH SETS ===
 
         # tech_resource
-        raw = cur.execute("SELECT tech FROM main.Technology WHERE flag = 'r'").fetchall()
+        raw = DeferredQuery("SELECT tech FROM main.Technology WHERE flag = 'r'")
         load_element(M.tech_resource, raw, self.viable_techs)
 
         # tech_production
-        raw = cur.execute("SELECT tech FROM main.Technology WHERE flag LIKE 'p%'").fetchall()
+        raw = DeferredQuery("SELECT tech FROM main.Technology WHERE flag LIKE 'p%'")
         load_element(M.tech_production, raw, self.viable_techs)
 
         # tech_uncap
-        try:
-            raw = cur.execute('SELECT tech FROM main.Technology WHERE unlim_cap > 0').fetchall()
+        # dev note:  the column is checked up front, as the deferred query may run on a reader thread
+        if self.column_exists('Technology', 'unlim_cap'):
+            raw = DeferredQuery('SELECT tech FROM main.Technology WHERE unlim_cap > 0')
             load_element(M.tech_uncap, raw, self.viable_techs)
-        except OperationalError:
+        else:
             logger.info(
                 'The current database does not support non-capacity techs and should be upgraded.'
             )
 
         # tech_baseload
-        raw = cur.execute("SELECT tech FROM main.Technology WHERE flag = 'pb'").fetchall()
+        raw = DeferredQuery("SELECT tech FROM main.Technology WHERE flag = 'pb'")
         load_element(M.tech_baseload, raw, self.viable_techs)
 
         # tech_storage
-        raw = cur.execute("SELECT tech FROM main.Technology WHERE flag = 'ps'").fetchall()
+        raw = DeferredQuery("SELECT tech FROM main.Technology WHERE flag = 'ps'")
         load_element(M.tech_storage, raw, self.viable_techs)
 
         # tech_reserve
-        raw = cur.execute('SELECT tech FROM Technology WHERE reserve > 0').fetchall()
+        raw = DeferredQuery('SELECT tech FROM Technology WHERE reserve > 0')
         load_element(M.tech_reserve, raw, self.viable_techs)
 
         # tech_ramping
@@ -420,20 +763,20 @@ class HybridLoader:
         # deterministic behavior
 
         # tech_curtailment
-        raw = cur.execute('SELECT tech FROM Technology WHERE curtail > 0').fetchall()
+        raw = DeferredQuery('SELECT tech FROM Technology WHERE curtail > 0')
         load_element(M.tech_curtailment, raw, self.viable_techs)
 
         # tech_flex
-        raw = cur.execute('SELECT tech FROM Technology WHERE flex > 0').fetchall()
+        raw = DeferredQuery('SELECT tech FROM Technology WHERE flex > 0')
         load_element(M.tech_flex, raw, self.viable_techs)
 
         # tech_exchange
-        raw = cur.execute('SELECT tech FROM Technology WHERE exchange > 0').fetchall()
+        raw = DeferredQuery('SELECT tech FROM Technology WHERE exchange > 0')
         load_element(M.tech_exchange, raw, self.viable_techs)
 
         # groups & tech_groups (supports RPS and general tech grouping)
         if self.table_exists('TechGroup'):
-            raw = cur.execute('SELECT group_name FROM main.TechGroup').fetchall()
+            raw = DeferredQuery('SELECT group_name FROM main.TechGroup')
             load_element(M.tech_group_names, raw)
 
         if self.table_exists('TechGroupMember'):
@@ -448,38 +791,38 @@ class HybridLoader:
                 )
 
         # tech_annual
-        raw = cur.execute('SELECT tech FROM Technology WHERE annual > 0').fetchall()
+        raw = DeferredQuery('SELECT tech FROM Technology WHERE annual > 0')
         load_element(M.tech_annual, raw, self.viable_techs)
 
         # tech_variable
-        raw = cur.execute('SELECT tech FROM Technology WHERE variable > 0').fetchall()
+        raw = DeferredQuery('SELECT tech FROM Technology WHERE variable > 0')
         load_element(M.tech_variable, raw, self.viable_techs)
 
         # tech_retirement
-        raw = cur.execute('SELECT tech FROM Technology WHERE retire > 0').fetchall()
+        raw = DeferredQuery('SELECT tech FROM Technology WHERE retire > 0')
         load_element(M.tech_retirement, raw, self.viable_techs)
 
         #  === COMMODITIES ===
 
         # commodity_demand
-        raw = cur.execute("SELECT name FROM main.Commodity WHERE flag = 'd'").fetchall()
+        raw = DeferredQuery("SELECT name FROM main.Commodity WHERE flag = 'd'")
         load_element(M.commodity_demand, raw, self.viable_comms)
 
         # commodity_emissions
         # currently NOT validated against anything... shouldn't be a problem ?
-        raw = cur.execute("SELECT name FROM main.Commodity WHERE flag = 'e'").fetchall()
+        raw = DeferredQuery("SELECT name FROM main.Commodity WHERE flag = 'e'")
         load_element(M.commodity_emissions, raw)
 
         # commodity_physical
-        raw = cur.execute(
+        raw = DeferredQuery(
             "SELECT name FROM main.Commodity WHERE flag = 'p' OR flag = 's'"
-        ).fetchall()
+        )
         # The model enforces 0 symmetric difference between the physical commodities
         # and the input commodities, so we need to include only the viable INPUTS
         load_element(M.commodity_physical, raw, self.viable_input_comms)
 
         # commodity_source
-        raw = cur.execute("SELECT name FROM main.Commodity WHERE flag = 's'").fetchall()
+        raw = DeferredQuery("SELECT name FROM main.Commodity WHERE flag = 's'")
         load_element(M.commodity_source, raw, self.viable_input_comms)
 
         #  === PARAMS ===
@@ -510,18 +853,18 @@ class HybridLoader:
             ).fetchone()
             previous_period = raw[0]
             # noinspection SqlUnused
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, tech, vintage, capacity FROM main.OutputNetCapacity '
                 ' WHERE period = ? '
                 ' AND scenario = ? '
                 'UNION '
                 '  SELECT region, tech, vintage, capacity FROM main.ExistingCapacity ',
                 (previous_period, self.config.scenario),
-            ).fetchall()
+            )
         else:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, tech, vintage, capacity FROM main.ExistingCapacity'
-            ).fetchall()
+            )
         load_element(M.ExistingCapacity, raw, self.viable_rtv, (0, 1, 2))
 
         # GlobalDiscountRate
@@ -532,181 +875,181 @@ class HybridLoader:
         data[M.GlobalDiscountRate.name] = {None: raw[0][0]}
 
         # SegFrac
-        raw = cur.execute('SELECT season, tod, segfrac FROM main.TimeSegmentFraction').fetchall()
+        raw = DeferredQuery('SELECT season, tod, segfrac FROM main.TimeSegmentFraction')
         load_element(M.SegFrac, raw)
 
         # DemandSpecificDistribution
-        raw = cur.execute(
-            'SELECT region, season, tod, demand_name, dsd FROM main.DemandSpecificDistribution'
-        ).fetchall()
+        raw = DeferredQuery(
+            'SELECT region, season, tod, demand_name, dds FROM main.DemandSpecificDistribution'
+        )
         load_element(M.DemandSpecificDistribution, raw)
 
         # Demand
         if mi:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, commodity, demand FROM main.Demand '
                 'WHERE period >= ? AND period <= ?',
                 (mi.base_year, mi.last_demand_year),
-            ).fetchall()
+            )
         else:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, commodity, demand FROM main.Demand '
-            ).fetchall()
+            )
         load_element(M.Demand, raw)
 
         # RescourceBound
         # TODO:  later, it isn't used RN anyhow.
 
         # CapacityToActivity
-        raw = cur.execute('SELECT region, tech, c2a FROM main.CapacityToActivity ').fetchall()
+        raw = DeferredQuery('SELECT region, tech, c2a FROM main.CapacityToActivity ')
         load_element(M.CapacityToActivity, raw, self.viable_rt, (0, 1))
 
         # CapacityFactorTech
-        raw = cur.execute(
+        raw = DeferredQuery(
             'SELECT region, season, tod, tech, factor ' 'FROM main.CapacityFactorTech'
-        ).fetchall()
+        )
         load_element(M.CapacityFactorTech, raw, self.viable_rt, (0, 3))
 
         # CapacityFactorProcess
-        raw = cur.execute(
+        raw = DeferredQuery(
             'SELECT region, season, tod, tech, vintage, factor ' ' FROM main.CapacityFactorProcess'
-        ).fetchall()
+        )
         load_element(M.CapacityFactorProcess, raw, self.viable_rtv, (0, 3, 4))
 
         # LifetimeTech
-        raw = cur.execute('SELECT region, tech, lifetime FROM main.LifetimeTech').fetchall()
+        raw = DeferredQuery('SELECT region, tech, lifetime FROM main.LifetimeTech')
         load_element(M.LifetimeTech, raw, self.viable_rt, val_loc=(0, 1))
 
         # LifetimeProcess
-        raw = cur.execute(
+        raw = DeferredQuery(
             'SELECT region, tech, vintage, lifetime FROM main.LifetimeProcess'
-        ).fetchall()
+        )
         load_element(M.LifetimeProcess, raw, self.viable_rtv, val_loc=(0, 1, 2))
 
         # LoanLifetimeTech
-        raw = cur.execute('SELECT region, tech, lifetime FROM main.LoanLifetimeTech').fetchall()
+        raw = DeferredQuery('SELECT region, tech, lifetime FROM main.LoanLifetimeTech')
         load_element(M.LoanLifetimeTech, raw, self.viable_rt, (0, 1))
 
         # TechInputSplit
         if mi:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, input_comm, tech, min_proportion FROM main.TechInputSplit '
                 'WHERE period >= ? AND period <= ?',
                 (mi.base_year, mi.last_demand_year),
-            ).fetchall()
+            )
         else:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, input_comm, tech, min_proportion FROM main.TechInputSplit '
-            ).fetchall()
+            )
         load_element(M.TechInputSplit, raw, self.viable_rt, (0, 3))
 
         # TechInputSplitAverage
         if self.table_exists('TechInputSplitAverage'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, input_comm, tech, min_proportion '
                     'FROM main.TechInputSplitAverage '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, input_comm, tech, min_proportion '
                     'FROM main.TechInputSplitAverage '
-                ).fetchall()
+                )
             load_element(M.TechInputSplitAverage, raw, self.viable_rt, (0, 3))
 
         # TechOutputSplit
         if self.table_exists('TechOutputSplit'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, output_comm, min_proportion FROM main.TechOutputSplit '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, output_comm, min_proportion FROM main.TechOutputSplit '
-                ).fetchall()
+                )
             load_element(M.TechOutputSplit, raw, self.viable_rt, (0, 2))
 
         # RenewablePortfolioStandard
         if self.table_exists('RPSRequirement'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech_group, requirement FROM main.RPSRequirement '
                     ' WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech_group, requirement FROM main.RPSRequirement '
-                ).fetchall()
+                )
             load_element(M.RenewablePortfolioStandard, raw)
 
         # CostFixed
         if mi:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, vintage, cost FROM main.CostFixed '
                 'WHERE period >= ? AND period <= ?',
                 (mi.base_year, mi.last_demand_year),
-            ).fetchall()
+            )
         else:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, vintage, cost FROM main.CostFixed '
-            ).fetchall()
+            )
         load_element(M.CostFixed, raw, self.viable_rtv, val_loc=(0, 2, 3))
 
         # CostInvest
         # exclude "existing" vintages by screening for base year and beyond.
         # the "viable_rtv" will filter anything beyond view
         if mi:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, tech, vintage, cost FROM main.CostInvest ' 'WHERE vintage >= ?',
                 (mi.base_year,),
-            ).fetchall()
+            )
         else:
-            raw = cur.execute('SELECT region, tech, vintage, cost FROM main.CostInvest ').fetchall()
+            raw = DeferredQuery('SELECT region, tech, vintage, cost FROM main.CostInvest ')
         load_element(M.CostInvest, raw, self.viable_rtv, (0, 1, 2))
 
         # CostVariable
         if mi:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, vintage, cost FROM main.CostVariable '
                 'WHERE period >= ? AND period <= ?',
                 (mi.base_year, mi.last_demand_year),
-            ).fetchall()
+            )
         else:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, vintage, cost FROM main.CostVariable '
-            ).fetchall()
+            )
         load_element(M.CostVariable, raw, self.viable_rtv, (0, 2, 3))
 
         # CostEmissions (and supporting index set)
         if self.table_exists('CostEmission'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, emis_comm from main.CostEmission '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
                 load_element(M.CostEmission_rpe, raw)
 
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, emis_comm, cost from main.CostEmission '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
                 load_element(M.CostEmission, raw)
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, emis_comm from main.CostEmission '
-                ).fetchall()
+                )
                 load_element(M.CostEmission_rpe, raw)
 
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, emis_comm, cost from main.CostEmission '
-                ).fetchall()
+                )
                 load_element(M.CostEmission, raw)
 
         # DefaultLoanRate
@@ -718,294 +1061,294 @@ class HybridLoader:
 
         # LoanRate
         if mi:
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, tech, vintage, rate FROM main.LoanRate ' 'WHERE vintage >= ?',
                 (mi.base_year,),
-            ).fetchall()
+            )
         else:
-            raw = cur.execute('SELECT region, tech, vintage, rate FROM main.LoanRate ').fetchall()
+            raw = DeferredQuery('SELECT region, tech, vintage, rate FROM main.LoanRate ')
 
         load_element(M.LoanRate, raw, self.viable_rtv, (0, 1, 2))
 
         # MinCapacity
         if self.table_exists('MinCapacity'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, min_cap FROM main.MinCapacity '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, min_cap FROM main.MinCapacity '
-                ).fetchall()
+                )
             load_element(M.MinCapacity, raw, self.viable_rt, (0, 2))
 
         # MaxCapacity
         if self.table_exists('MaxCapacity'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, max_cap FROM main.MaxCapacity '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, max_cap FROM main.MaxCapacity '
-                ).fetchall()
+                )
             load_element(M.MaxCapacity, raw, self.viable_rt, (0, 2))
 
         # MinNewCap
         if self.table_exists('MinNewCapacity'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, min_cap FROM main.MinNewCapacity '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, min_cap FROM main.MinNewCapacity '
-                ).fetchall()
+                )
             load_element(M.MinNewCapacity, raw, self.viable_rt, (0, 2))
 
         # MaxNewCap
         if self.table_exists('MaxNewCapacity'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, max_cap FROM main.MaxNewCapacity '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, max_cap FROM main.MaxNewCapacity '
-                ).fetchall()
+                )
             load_element(M.MaxNewCapacity, raw, self.viable_rt, (0, 2))
 
         # MaxCapacityGroup
         if self.table_exists('MaxCapacityGroup'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, max_cap FROM main.MaxCapacityGroup '
                     ' WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, max_cap FROM main.MaxCapacityGroup '
-                ).fetchall()
+                )
             load_element(M.MaxCapacityGroup, raw)
 
         # MinCapacityGroup
         if self.table_exists('MinCapacityGroup'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, min_cap FROM main.MinCapacityGroup '
                     ' WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, min_cap FROM main.MinCapacityGroup '
-                ).fetchall()
+                )
             load_element(M.MinCapacityGroup, raw)
 
         # MinNewCapacityGroup
         if self.table_exists('MinNewCapacityGroup'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, min_new_cap FROM main.MinNewCapacityGroup '
                     ' WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, min_new_cap FROM main.MinNewCapacityGroup '
-                ).fetchall()
+                )
             load_element(M.MinNewCapacityGroup, raw)
 
         # MaxNewCapacityGroup
         if self.table_exists('MaxNewCapacityGroup'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, max_new_cap FROM main.MaxNewCapacityGroup '
                     ' WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, max_new_cap FROM main.MaxNewCapacityGroup '
-                ).fetchall()
+                )
             load_element(M.MaxNewCapacityGroup, raw)
 
         # MinCapacityShare
         if self.table_exists('MinCapacityShare'):
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, group_name, min_proportion FROM main.MinCapacityShare'
-            ).fetchall()
+            )
             load_element(M.MinCapacityShare, raw, self.viable_rt, (0, 2))
 
         # MaxCapacityShare
         if self.table_exists('MaxCapacityShare'):
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, group_name, max_proportion FROM main.MaxCapacityShare'
-            ).fetchall()
+            )
             load_element(M.MaxCapacityShare, raw, self.viable_rt, (0, 2))
 
         # MinNewCapacityShare
         if self.table_exists('MinNewCapacityShare'):
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, group_name, max_proportion FROM main.MinNewCapacityShare'
-            ).fetchall()
+            )
             load_element(M.MinCapacityShare, raw, self.viable_rt, (0, 2))
 
         # MaxNewCapacityShare
         if self.table_exists('MaxNewCapacityShare'):
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, group_name, max_proportion FROM main.MaxNewCapacityShare'
-            ).fetchall()
+            )
             load_element(M.MaxCapacityShare, raw, self.viable_rt, (0, 2))
 
         # MinActivityGroup
         if self.table_exists('MinActivityGroup'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, min_act FROM main.MinActivityGroup '
                     ' WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, min_act FROM main.MinActivityGroup '
-                ).fetchall()
+                )
             load_element(M.MinActivityGroup, raw)
 
         # MaxActivityGroup
         if self.table_exists('MaxActivityGroup'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, max_act FROM main.MaxActivityGroup '
                     ' WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, group_name, max_act FROM main.MaxActivityGroup '
-                ).fetchall()
+                )
             load_element(M.MaxActivityGroup, raw)
 
         # MinActivityShare
         if self.table_exists('MinActivityShare'):
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, group_name, min_proportion FROM main.MinActivityShare'
-            ).fetchall()
+            )
             load_element(M.MinActivityShare, raw, self.viable_rt, (0, 2))
 
         # MaxActivityShare
         if self.table_exists('MaxActivityShare'):
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, group_name, max_proportion FROM main.MaxActivityShare'
-            ).fetchall()
+            )
             load_element(M.MaxActivityShare, raw, self.viable_rt, (0, 2))
 
         # MaxResource
         if self.table_exists('MaxResource'):
-            raw = cur.execute('SELECT region, tech, max_res FROM main.MaxResource').fetchall()
+            raw = DeferredQuery('SELECT region, tech, max_res FROM main.MaxResource')
             load_element(M.MaxResource, raw, self.viable_rt, (0, 1))
 
         # MaxActivity
         if self.table_exists('MaxActivity'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, max_act FROM main.MaxActivity '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, max_act FROM main.MaxActivity '
-                ).fetchall()
+                )
             load_element(M.MaxActivity, raw, self.viable_rt, (0, 2))
 
         # MinActivity
         if self.table_exists('MinActivity'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, min_act FROM main.MinActivity '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, min_act FROM main.MinActivity '
-                ).fetchall()
+                )
             load_element(M.MinActivity, raw, self.viable_rt, (0, 2))
 
         # MaxSeasonalActivity
         if self.table_exists('MaxSeasonalActivity'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, season, tech, max_act FROM main.MaxSeasonalActivity '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, season, tech, max_act FROM main.MaxSeasonalActivity '
-                ).fetchall()
+                )
             load_element(M.MaxSeasonalActivity, raw, self.viable_rt, (0, 3))
 
         # MinSeasonalActivity
         if self.table_exists('MinSeasonalActivity'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, season, tech, min_act FROM main.MinSeasonalActivity '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, season, tech, min_act FROM main.MinSeasonalActivity '
-                ).fetchall()
+                )
             load_element(M.MinSeasonalActivity, raw, self.viable_rt, (0, 3))
 
         # MinAnnualCapacityFactor
         if self.table_exists('MinAnnualCapacityFactor'):
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, output_comm, factor FROM main.MinAnnualCapacityFactor'
-            ).fetchall()
+            )
             load_element(M.MinAnnualCapacityFactor, raw, self.viable_rt, (0, 2))
 
         # MaxAnnualCapacityFactor
         if self.table_exists('MaxAnnualCapacityFactor'):
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT region, period, tech, output_comm, factor FROM main.MaxAnnualCapacityFactor'
-            ).fetchall()
+            )
             load_element(M.MaxAnnualCapacityFactor, raw, self.viable_rt, (0, 2))
 
         # GrowthRateMax
         if self.table_exists('GrowthRateMax'):
-            raw = cur.execute('SELECT region, tech, rate FROM main.GrowthRateMax').fetchall()
+            raw = DeferredQuery('SELECT region, tech, rate FROM main.GrowthRateMax')
             load_element(M.GrowthRateMax, raw, self.viable_rt, (0, 1))
 
         # GrowthRateSeed
         if self.table_exists('GrowthRateSeed'):
-            raw = cur.execute('SELECT region, tech, seed FROM main.GrowthRateSeed').fetchall()
+            raw = DeferredQuery('SELECT region, tech, seed FROM main.GrowthRateSeed')
             load_element(M.GrowthRateSeed, raw, self.viable_rt, (0, 1))
 
         # EmissionLimit
         if self.table_exists('EmissionLimit'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, emis_comm, value FROM main.EmissionLimit '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, emis_comm, value FROM main.EmissionLimit '
-                ).fetchall()
+                )
 
             load_element(M.EmissionLimit, raw)
 
@@ -1014,81 +1357,114 @@ class HybridLoader:
         # built in a particular region, this should still be OK
         if self.table_exists('EmissionActivity'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, emis_comm, input_comm, tech, vintage, output_comm, activity '
                     'FROM main.EmissionActivity '
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, emis_comm, input_comm, tech, vintage, output_comm, activity '
                     'FROM main.EmissionActivity '
-                ).fetchall()
+                )
             load_element(M.EmissionActivity, raw, self.viable_ritvo, (0, 2, 3, 4, 5))
 
         # LinkedTechs
         # Note:  Both of the linked techs must be viable.  As this is non period/vintage
         #        specific, it should be true that if one is built, the other is also
         if self.table_exists('LinkedTech'):
-            raw = cur.execute(
+            raw = DeferredQuery(
                 'SELECT primary_region, primary_tech, emis_comm, driven_tech FROM main.LinkedTech'
-            ).fetchall()
+            )
             load_element(M.LinkedTechs, raw, self.viable_rtt, (0, 1, 3))
 
         # RampUp
         if self.table_exists('RampUp'):
-            raw = cur.execute('SELECT region, tech, rate FROM main.RampUp').fetchall()
+            raw = DeferredQuery('SELECT region, tech, rate FROM main.RampUp')
             load_element(M.RampUp, raw, self.viable_rt, (0, 1))
 
         # RampDown
         if self.table_exists('RampDown'):
-            raw = cur.execute('SELECT region, tech, rate FROM main.RampDown').fetchall()
+            raw = DeferredQuery('SELECT region, tech, rate FROM main.RampDown')
             load_element(M.RampDown, raw, self.viable_rt, (0, 1))
 
         # CapacityCredit
         if self.table_exists('CapacityCredit'):
             if mi:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, vintage, credit FROM main.CapacityCredit '
                     'WHERE period >= ? AND period <= ?',
                     (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                )
             else:
-                raw = cur.execute(
+                raw = DeferredQuery(
                     'SELECT region, period, tech, vintage, credit FROM main.CapacityCredit '
-                ).fetchall()
+                )
             load_element(M.CapacityCredit, raw, self.viable_rtv, (0, 2, 3))
 
         # PlanningReserveMargin
         if self.table_exists('PlanningReserveMargin'):
-            raw = cur.execute('SELECT region, margin FROM main.PlanningReserveMargin').fetchall()
+            raw = DeferredQuery('SELECT region, margin FROM main.PlanningReserveMargin')
             load_element(M.PlanningReserveMargin, raw)
 
         # StorageDuration
         if self.table_exists('StorageDuration'):
-            raw = cur.execute('SELECT region, tech, duration FROM main.StorageDuration').fetchall()
+            raw = DeferredQuery('SELECT region, tech, duration FROM main.StorageDuration')
             load_element(M.StorageDuration, raw, self.viable_rt, (0, 1))
 
         # StorageInit
         # TODO:  DB table is busted / removed now... defer!
 
+        # execute the held queries and load them in the order they were requested
+        if pending:
+            results = self._run_queries_parallel(
+                reader_db_file, [(c.name, *rest) for c, *rest in pending]
+            )
+            for (c, _, validation, val_loc), (rows, screened) in zip(pending, results):
+                load_element(c, rows, None if screened else validation, val_loc)
+
+        # the screening tables are no longer needed
+        self._drop_viable_tables()
+
         # For T/S:  dump the size of all data elements into the log
         # temp = '\n'.join((f'{k} : {len(v)}' for k, v in data.items()))
         # logger.info(temp)
 
+        # reduce the seasons to representative seasons (before the index sets are captured)
+        if aggregate and self.config.time_slice_aggregation:
+            settings = self.config.time_slice_aggregation
+            aggregate_seasons(
+                data,
+                seasons=settings['seasons'],
+                method=settings['method'],
+                seed=settings['seed'],
+            )
+
+        # remove the processes that can never be active.  (Myopic runs are not presolved as the
+        # sequencer carries the processes from window to window.)
+        presolve_report = None
+        if self.config.presolve and myopic_index is None:
+            report = presolve(data, merge_pass_through=self.config.presolve_merge_pass_through)
+            presolve_report = str(report)
+            self._write_presolve_report(presolve_report)
+        elif self.config.presolve:
+            logger.info('Presolve is not applied to myopic runs')
+
         # capture the parameter indexing sets
         set_data = self.load_param_idx_sets(data=data)
         data.update(set_data)
 
-        # pyomo namespace format has data[namespace][idx]=value
-        # the default namespace is None, thus...
-        namespace = {None: data}
-        if self.debugging:
-            for item in namespace[None].items():
-                print(item[0], item[1])
-        dp = DataPortal(data_dict=namespace)
         toc = time.time()
-        logger.debug('Data Portal Load time: %0.5f seconds', (toc - tic))
-        return dp
+        logger.debug('Data load time: %0.5f seconds', (toc - tic))
+        if cache:
+            # the presolve report goes with the data, so that a cached run still writes it
+            cache.put(cache_key, {'data': data, 'presolve_report': presolve_report})
+        return data
+
+    def _write_presolve_report(self, report: str) -> None:
+        report_file = self.config.output_path / 'presolve_report.txt'
+        with open(report_file, 'w') as f:
+            f.write(report)
+        logger.info('Wrote presolve report to %s', report_file)
 
     def load_param_idx_sets(self, data: dict) -> dict:
         """
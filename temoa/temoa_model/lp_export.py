@@ -0,0 +1,164 @@
+"""
+Export of a compiled model as a compact MPS or LP file with short labels, optionally compressed,
+with the map of the labels to the model names kept in a separate (compressed) file
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+The rows and columns are labeled r<i> and c<j> (see fast_writer.LinearProgram) instead of the
+(long) symbolic names of the pyomo LP writer.  The file is streamed straight into the compressor,
+so the uncompressed model is never on disk.  The export is selected in the config file:
+
+    save_lp_file = true
+    [lp_export]
+    format = "mps"          # or "lp"
+    compression = "gzip"    # or "zstd" (requires the zstandard package) or "none"
+
+which produces model.mps.gz and model_names.txt.gz.  A solution of the file from an external solver
+can be read back into the instance with fast_writer.load_solution.
+"""
+
+import gzip
+from logging import getLogger
+from pathlib import Path
+from time import time
+from typing import TYPE_CHECKING, TextIO
+
+try:
+    import zstandard
+except ImportError:  # optional:  only needed for zstd compression
+    zstandard = None
+
+if TYPE_CHECKING:
+    from temoa.temoa_model.fast_writer import LinearProgram
+
+logger = getLogger(__name__)
+
+EXPORT_FORMATS = ('mps', 'lp')
+
+# the file suffix for each compression
+COMPRESSION_SUFFIXES = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+DEFAULT_EXPORT = {'format': 'mps', 'compression': 'gzip'}
+
+
+def validate_export_settings(settings: dict) -> dict:
+    """
+    Check the [lp_export] section of the config file and fill in the defaults
+    :param settings: the section, as a dictionary
+    :return: the complete settings
+    """
+    settings = {**DEFAULT_EXPORT, **settings}
+    if settings['format'] not in EXPORT_FORMATS:
+        logger.error(
+            'LP export format must be one of %s.  Received: %s', EXPORT_FORMATS, settings['format']
+        )
+        raise ValueError(f'lp_export format must be one of {EXPORT_FORMATS}')
+    if settings['compression'] not in COMPRESSION_SUFFIXES:
+        logger.error(
+            'LP export compression must be one of %s.  Received: %s',
+            list(COMPRESSION_SUFFIXES),
+            settings['compression'],
+        )
+        raise ValueError(f'lp_export compression must be one of {list(COMPRESSION_SUFFIXES)}')
+    if settings['compression'] == 'zstd' and zstandard is None:
+        logger.error('zstd compression of the LP export requires the zstandard package')
+        raise ValueError('zstd compression requires the zstandard package')
+    return settings
+
+
+def compression_of(path: Path) -> str:
+    """the compression of a file, by its suffix"""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if suffix and path.suffix == suffix:
+            return compression
+    return 'none'
+
+
+def open_text(path: Path, mode: str = 'r', compression: str | None = None) -> TextIO:
+    """
+    Open a (possibly compressed) text file
+    :param path: the file
+    :param mode: 'r' or 'w'
+    :param compression: one of COMPRESSION_SUFFIXES.  If None, it is taken from the file suffix
+    :return: the text stream
+    """
+    if compression is None:
+        compression = compression_of(path)
+    match compression:
+        case 'gzip':
+            # a moderate level:  most of the size reduction, at a fraction of the time of level 9
+            return gzip.open(path, mode + 't', compresslevel=6)
+        case 'zstd':
+            if zstandard is None:
+                logger.error('Reading or writing %s requires the zstandard package', path)
+                raise RuntimeError('zstandard package not available.  See log.')
+            return zstandard.open(path, mode + 't')
+        case _:
+            return open(path, mode)
+
+
+def export_lp(
+    lp: 'LinearProgram', folder: Path, format: str = 'mps', compression: str = 'gzip'
+) -> tuple[Path, Path]:
+    """
+    Write the linear program and the map of its labels to the folder
+    :param lp: the linear program
+    :param folder: the destination
+    :param format: one of EXPORT_FORMATS
+    :param compression: one of COMPRESSION_SUFFIXES
+    :return: tuple of (model file, names file)
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    suffix = COMPRESSION_SUFFIXES[compression]
+    model_file = folder / f'model.{format}{suffix}'
+    names_file = folder / f'model_names.txt{suffix}'
+    tic = time()
+    with open_text(model_file, 'w', compression) as f:
+        if format == 'lp':
+            lp.write_lp_stream(f)
+        else:
+            lp.write_mps_stream(f)
+    with open_text(names_file, 'w', compression) as f:
+        lp.write_names(f)
+    logger.info(
+        'Exported the model (%d rows, %d columns) to %s (%0.1f MB) in %0.2f seconds',
+        lp.num_rows,
+        lp.num_cols,
+        model_file,
+        model_file.stat().st_size / 1024**2,
+        time() - tic,
+    )
+    return model_file, names_file
+
+
+def read_names(names_file: Path) -> dict[str, str]:
+    """
+    Read the map of the labels to the model names
+    :param names_file: the (possibly compressed) names file
+    :return: dictionary of label: name
+    """
+    with open_text(Path(names_file)) as f:
+        return dict(line.rstrip('\n').split(' ', 1) for line in f)
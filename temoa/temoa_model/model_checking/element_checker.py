@@ -67,6 +67,11 @@ class ViableSet:
         self._exceptions = exception_vals
         self.non_excepted_items = set()
 
+        # match structures, built on demand and discarded if the elements or exceptions change
+        self._patterns: list[re.Pattern] = []
+        self._label_verdicts: dict[str, bool] = {}  # excepted labels seen -> pass/fail
+        self._members: frozenset | set[tuple] | None = None
+
         self.calc_dim()
 
         if self._exceptions and self.dim > 0:
@@ -83,6 +88,9 @@ class ViableSet:
 
     def _update(self):
         """construct the set of non-excepted items in tuple format"""
+        self._clear_cache()
+        if self._exception_loc is None:
+            return
         # we need to remove the item at the "excepted" location
         locs = list(range(self.dim))
         locs.remove(self._exception_loc)
@@ -91,6 +99,11 @@ class ViableSet:
             return
         self.non_excepted_items = {itemgetter(*locs)(t) for t in self._elements}
 
+    def _clear_cache(self):
+        self._patterns = [re.compile(pattern) for pattern in self._exceptions or []]
+        self._label_verdicts = {}
+        self._members = None
+
     @property
     def exception_loc(self):
         return self._exception_loc
@@ -126,8 +139,40 @@ class ViableSet:
         """the members of the validation set"""
         if self.dim > 1:
             return self.member_tuples
-        else:
-            return {t[0] for t in self.member_tuples}
+        if self._members is None:
+            self._members = frozenset(t[0] for t in self.member_tuples)
+        return self._members
+
+    def excepts_label(self, label) -> bool:
+        """
+        Determine if a label in the exception location matches any of the exceptions.  The
+        verdict for each label is cached, so the patterns are only searched once per label.
+        :param label: the value in the exception location
+        :return: True if the label matches an exception
+        """
+        verdict = self._label_verdicts.get(label)
+        if verdict is None:
+            text = str(label)
+            verdict = any(pattern.search(text) for pattern in self._patterns)
+            self._label_verdicts[label] = verdict
+        return verdict
+
+    def excepts(self, element: tuple) -> bool:
+        """
+        Determine if an element (that is not a member) passes by exception:  the exception
+        location matches an exception and the other locations match a member.
+        :param element: the element, as a tuple of the same dimension as the set
+        :return: True if the element passes by exception
+        """
+        if not self._exceptions:
+            return False
+        loc = self._exception_loc
+        if not self.excepts_label(element[loc]):
+            return False
+        if not self.non_excepted_items:
+            return True
+        rest = element[:loc] + element[loc + 1 :]
+        return (rest[0] if len(rest) == 1 else rest) in self.non_excepted_items
 
 
 # dev note:  The reason for this filtering construct is to allow passage of items that either
@@ -151,35 +196,25 @@ def filter_elements(
 
     Ex:  if filtering by (region, tech, vintage) and the data is (region, _, _, tech, vintage, value) we need to identify
     the location of r, t, v in the element under review by the tuple (0, 3, 4)
+
+    The whole batch is screened at once:  the distinct keys are matched against the members with a
+    set intersection and only the misses are checked against the exceptions (once per distinct
+    key, not once per row).  The order of the values is preserved.
     """
     if not isinstance(validation, ViableSet):
         raise ValueError("'validation' must be an instance of ViableSet")
     if len(value_locations) != validation.dim:
         raise ValueError('the value locations must have same dimensionality as the validation set')
-    # determine the location of the exempted items for comparison by removing the exempted location
-    locs = None
+
+    getter = itemgetter(*value_locations)
+    if len(value_locations) == 1:
+        keys = [(key,) for key in map(getter, values)]
+    else:
+        keys = list(map(getter, values))
+
+    distinct_keys = set(keys)
+    accepted = distinct_keys & validation.member_tuples
     if validation.val_exceptions:
-        locs = list(value_locations)
-        locs.remove(validation.exception_loc)
-
-    res = []
-
-    for item in values:
-        # check the "base case" first:  it's in the fundamental elements
-        element = itemgetter(*value_locations)(item)
-        if not isinstance(element, tuple):
-            element = (element,)
-        if element in validation.member_tuples:
-            res.append(item)
-        elif validation.val_exceptions:  # check each of the exceptions
-            if (
-                validation.non_excepted_items
-                and itemgetter(*locs)(item) not in validation.non_excepted_items
-            ):
-                continue
-            for val_exception in validation.val_exceptions:
-                if re.search(val_exception, str(item[validation.exception_loc])):
-                    res.append(item)
-                    break
-
-    return res
+        accepted.update(filter(validation.excepts, distinct_keys - accepted))
+
+    return [value for value, key in zip(values, keys) if key in accepted]
@@ -0,0 +1,212 @@
+"""
+A columnar (Parquet) output backend for the TableWriter, which writes the output tables as Parquet
+datasets partitioned by scenario and period
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+Each table is a (hive-partitioned) dataset in the parquet folder of the output path:
+
+    parquet/OutputFlowOut/scenario=<scenario>/period=<period>/part-<token>-<n>-0.parquet
+
+The tables are partitioned by scenario and period, or by scenario and vintage if they have no
+period (OutputBuiltCapacity), or by scenario alone (OutputDualVariable).  The columns (and their
+order) are those of the output table in the output database.  The text columns are
+dictionary-encoded, which suits the few distinct names repeated over many rows.
+
+The rows of one write are buffered and added as new files when the write is committed, so writes
+append, as in the database.  Rows are only removed by the clear methods, which mirror the deletes
+made in the database:  by scenario, and (for the myopic windows) by period.
+
+This backend requires the (optional) pyarrow package.
+"""
+
+import shutil
+import sqlite3
+import uuid
+from collections import defaultdict
+from logging import getLogger
+from pathlib import Path
+from time import time
+from urllib.parse import unquote
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_ds
+except ImportError:  # optional:  only needed for the parquet output
+    pa = None
+    pa_ds = None
+
+logger = getLogger(__name__)
+
+OUTPUT_FORMATS = ('sqlite', 'parquet', 'both')
+
+PARQUET_TABLES = (
+    'OutputBuiltCapacity',
+    'OutputCost',
+    'OutputCurtailment',
+    'OutputDualVariable',
+    'OutputEmission',
+    'OutputFlowIn',
+    'OutputFlowOut',
+    'OutputNetCapacity',
+    'OutputRetiredCapacity',
+)
+"""the output tables written to parquet"""
+
+# the arrow types of the sqlite column types
+_ARROW_TYPES = {'TEXT': 'string', 'INTEGER': 'int64', 'REAL': 'float64'}
+
+
+def pyarrow_available() -> bool:
+    return pa is not None
+
+
+def _partition_value(folder: Path) -> str:
+    """the value of a (hive) partition folder, which is uri-encoded in the folder name"""
+    return unquote(folder.name.split('=', 1)[1])
+
+
+class ParquetSink:
+    """Buffers the rows of the output tables and writes them to partitioned parquet datasets"""
+
+    def __init__(self, folder: Path, con: sqlite3.Connection):
+        """
+        :param folder: the root folder of the datasets
+        :param con: a connection to the output database, for the columns of the tables
+        """
+        if pa is None:
+            logger.error('The parquet output requires the pyarrow package, which is not installed')
+            raise RuntimeError('pyarrow is required for the parquet output.  See log.')
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.schemas: dict[str, pa.Schema] = {}
+        for table in PARQUET_TABLES:
+            columns = con.execute(f'PRAGMA table_info({table})').fetchall()
+            self.schemas[table] = pa.schema(
+                [
+                    (
+                        name,
+                        pa.dictionary(pa.int32(), pa.string())
+                        if col_type.upper() == 'TEXT'
+                        else pa.type_for_alias(_ARROW_TYPES.get(col_type.upper(), 'float64')),
+                    )
+                    for _, name, col_type, *_ in columns
+                ]
+            )
+        # the partitioning of each table:  scenario, and period (or vintage), if present
+        self.partitions: dict[str, list[str]] = {}
+        for table, schema in self.schemas.items():
+            self.partitions[table] = ['scenario'] + [
+                name for name in ('period', 'vintage') if name in schema.names
+            ][:1]
+        self._buffer: dict[str, list[tuple]] = defaultdict(list)
+        # the file names of each flush are unique, so no write replaces another
+        self._token = uuid.uuid4().hex[:12]
+        self._flushes = 0
+
+    def add(self, table: str, rows) -> None:
+        """buffer rows (tuples in the column order of the table) for the next flush"""
+        if table in self.schemas:
+            self._buffer[table].extend(rows)
+
+    def flush(self) -> None:
+        """write the buffered rows, as new files in the partitions that they cover"""
+        if not self._buffer:
+            return
+        tic = time()
+        for table, rows in self._buffer.items():
+            if not rows:
+                continue
+            schema = self.schemas[table]
+            columns = list(zip(*rows))
+            arrays = [
+                pa.array(col, type=field.type.value_type).dictionary_encode()
+                if pa.types.is_dictionary(field.type)
+                else pa.array(col, type=field.type)
+                for col, field in zip(columns, schema)
+            ]
+            pa_ds.write_dataset(
+                pa.Table.from_arrays(arrays, schema=schema),
+                str(self.folder / table),
+                format='parquet',
+                partitioning=self.partitions[table],
+                partitioning_flavor='hive',
+                basename_template=f'part-{self._token}-{self._flushes}-{{i}}.parquet',
+                existing_data_behavior='overwrite_or_ignore',
+            )
+        self._flushes += 1
+        self._buffer.clear()
+        logger.info('Wrote the parquet output tables in %0.2f seconds', time() - tic)
+
+    def clear_scenario(self, scenario: str) -> None:
+        """remove the partitions of a scenario from all tables"""
+        self._clear(lambda name: name == scenario)
+
+    def clear_iterative_runs(self, scenario: str) -> None:
+        """remove the partitions of the iterative extensions of a scenario (like "scenario-1")"""
+        self._clear(lambda name: name.startswith(scenario + '-'))
+
+    def clear_periods_after(self, scenario: str, period: int) -> None:
+        """
+        remove the partitions of a scenario for the periods (or vintages) on/after the period, as
+        the myopic sequencer does in the database
+        """
+        for table, partitioning in self.partitions.items():
+            if len(partitioning) < 2:
+                continue
+            for part in self._scenario_folders(table, lambda name: name == scenario):
+                for sub in part.glob(f'{partitioning[1]}=*'):
+                    if int(_partition_value(sub)) >= period:
+                        shutil.rmtree(sub)
+
+    def _clear(self, match) -> None:
+        for table in PARQUET_TABLES:
+            for part in self._scenario_folders(table, match):
+                shutil.rmtree(part)
+
+    def _scenario_folders(self, table: str, match) -> list[Path]:
+        """the scenario partitions of a table whose scenario name matches"""
+        folder = self.folder / table
+        if not folder.is_dir():
+            return []
+        return [part for part in folder.glob('scenario=*') if match(_partition_value(part))]
+
+    def clear_all(self) -> None:
+        """remove all the datasets"""
+        for table in PARQUET_TABLES:
+            shutil.rmtree(self.folder / table, ignore_errors=True)
+
+    def read_table(self, table: str) -> list[tuple]:
+        """
+        Read a dataset back, as tuples in the column order of the table
+        :param table: the name of the table
+        :return: the rows
+        """
+        folder = self.folder / table
+        if not any(folder.rglob('*.parquet')):
+            return []
+        dataset = pa_ds.dataset(str(folder), format='parquet', partitioning='hive')
+        data = dataset.to_table().select(self.schemas[table].names).to_pylist()
+        return [tuple(row.values()) for row in data]
@@ -0,0 +1,387 @@
+"""
+A presolve stage for the model data that removes processes that can never be active and
+(optionally) merges pass-through techs, before the model is built
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+The presolve works on the data dictionary from the HybridLoader (before the index sets are made)
+and removes a process (r, t, v) from the Efficiency data and every parameter indexed by it when
+the process provably has no capacity and no activity:
+
+  - all of its Efficiency entries are zero
+  - it is an existing vintage with no (or zero) ExistingCapacity
+  - it is an existing vintage whose lifetime ends before the first future period
+  - it is a new vintage with a MaxNewCapacity or MaxCapacity of zero in its vintage period
+
+The first three are the same processes that CreateSparseDicts skips (with a warning) during the
+build.  Limits that are indexed by a (region, period, tech) that is left with no active process
+are dropped as well.  If one of those limits would force activity or capacity (a positive Min
+limit) the removals for that tech are reverted so that the model behaves as it would have.
+
+Merging a pass-through tech removes a single-input, single-output, uncapacitated tech with an
+efficiency of 1.0 and no other data, when it is the only producer of its output.  The consumers
+of the output take the input directly.  Chains of these techs are collapsed one link at a time.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from logging import getLogger
+
+from temoa.temoa_model.temoa_model import TemoaModel
+
+logger = getLogger(__name__)
+
+PROCESS_PARAMS: dict[str, tuple[int, int]] = {
+    'Efficiency': (2, 3),
+    'ExistingCapacity': (1, 2),
+    'CapacityFactorProcess': (3, 4),
+    'LifetimeProcess': (1, 2),
+    'LoanLifetimeProcess': (1, 2),
+    'CostFixed': (2, 3),
+    'CostInvest': (1, 2),
+    'CostVariable': (2, 3),
+    'LoanRate': (1, 2),
+    'EmissionActivity': (3, 4),
+    'CapacityCredit': (2, 3),
+    'StorageInitFrac': (1, 2),
+}
+"""the params indexed by process, with the (tech, vintage) locations in the index (region is 0)"""
+
+RPT_LIMITS: dict[str, int] = {
+    'MaxCapacity': 2,
+    'MinCapacity': 2,
+    'MaxNewCapacity': 2,
+    'MinNewCapacity': 2,
+    'MaxActivity': 2,
+    'MinActivity': 2,
+    'MaxSeasonalActivity': 3,
+    'MinSeasonalActivity': 3,
+    'MaxAnnualCapacityFactor': 2,
+    'MinAnnualCapacityFactor': 2,
+    'TechOutputSplit': 2,
+    'TechInputSplit': 3,
+    'TechInputSplitAverage': 3,
+    'MaxActivityShare': 2,
+    'MinActivityShare': 2,
+    'MaxCapacityShare': 2,
+    'MinCapacityShare': 2,
+    'MaxNewCapacityShare': 2,
+    'MinNewCapacityShare': 2,
+}
+"""the params indexed by (region, period, ..., tech, ...), with the location of the tech"""
+
+FORCING_LIMITS = frozenset(
+    name for name in RPT_LIMITS if name.startswith('Min') and 'CapacityFactor' not in name
+)
+"""the limits above that force activity or capacity when they are positive"""
+
+PASS_THROUGH_PARAMS = frozenset(
+    {
+        'Efficiency',
+        'LifetimeTech',
+        'LifetimeProcess',
+        'LoanLifetimeTech',
+        'LoanLifetimeProcess',
+        'CapacityToActivity',
+    }
+)
+"""the only params that may refer to a pass-through tech"""
+
+
+@dataclass
+class PresolveReport:
+    """The reductions made by the presolve"""
+
+    removed: dict[str, list[tuple]] = field(default_factory=lambda: defaultdict(list))
+    """the removed processes (r, t, v), by reason"""
+    merged: list[tuple] = field(default_factory=list)
+    """the merged pass-through techs (r, t, input, output)"""
+    dropped_rows: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    """the number of rows dropped from each param"""
+
+    def __str__(self) -> str:
+        lines = ['Presolve reductions\n\n']
+        for reason, processes in self.removed.items():
+            lines.append(f'Removed {len(processes)} processes: {reason}\n')
+            lines.extend(f'    {r}, {t}, {v}\n' for r, t, v in sorted(processes))
+        lines.append(f'\nMerged {len(self.merged)} pass-through techs\n')
+        lines.extend(f'    {r}, {t}: {i} -> {o}\n' for r, t, i, o in self.merged)
+        lines.append('\nRows dropped by parameter\n')
+        lines.extend(f'    {name}: {count}\n' for name, count in sorted(self.dropped_rows.items()))
+        return ''.join(lines)
+
+
+def presolve(data: dict, merge_pass_through: bool = False) -> PresolveReport:
+    """
+    Reduce the data in place
+    :param data: the data dictionary from the HybridLoader (before the index sets are made)
+    :param merge_pass_through: True to merge pass-through techs
+    :return: a report of the reductions
+    """
+    report = PresolveReport()
+    _remove_inactive_processes(data, report)
+    if merge_pass_through:
+        _merge_pass_through_techs(data, report)
+    logger.info(
+        'Presolve removed %d processes and merged %d pass-through techs',
+        sum(len(processes) for processes in report.removed.values()),
+        len(report.merged),
+    )
+    return report
+
+
+def _lifetime(data: dict, r, t, v) -> float:
+    lifetime = data.get('LifetimeProcess', {}).get((r, t, v))
+    if lifetime is None:
+        lifetime = data.get('LifetimeTech', {}).get((r, t), TemoaModel.default_lifetime_tech)
+    return lifetime
+
+
+def _remove_inactive_processes(data: dict, report: PresolveReport) -> None:
+    time_exist = set(data.get('time_exist', []))
+    time_future = sorted(data['time_future'])
+    time_optimize = time_future[:-1]
+    tech_uncap = set(data.get('tech_uncap', []))
+    existing = data.get('ExistingCapacity', {})
+
+    # 1.  gather the processes and screen out those that CreateSparseDicts would skip
+    nonzero = defaultdict(bool)
+    for (r, i, t, v, o), eff in data['Efficiency'].items():
+        nonzero[r, t, v] |= eff != 0
+    inactive: dict[tuple, str] = {}
+    for r, t, v in nonzero:
+        if v in time_exist and t not in tech_uncap and not existing.get((r, t, v)):
+            inactive[r, t, v] = 'existing vintage with no ExistingCapacity'
+        elif v in time_exist and v + _lifetime(data, r, t, v) <= time_future[0]:
+            inactive[r, t, v] = 'existing vintage retired before the first future period'
+        elif not nonzero[r, t, v]:
+            inactive[r, t, v] = 'all Efficiency values are zero'
+    processes = {process for process in nonzero if process not in inactive}
+
+    # 2.  new vintages that are limited to zero capacity in their vintage period
+    protected = set(data.get('tech_exchange', []))
+    for name in ('GrowthRateMax', 'GrowthRateSeed'):
+        protected.update(t for (r, t) in data.get(name, {}))
+    for (r, t, e), linked_t in data.get('LinkedTechs', {}).items():
+        protected.update((t, linked_t))
+    zero_cap = {}
+    for r, t, v in processes:
+        if v in time_exist or t in protected:
+            continue
+        for name in ('MaxNewCapacity', 'MaxCapacity'):
+            if data.get(name, {}).get((r, v, t)) == 0:
+                zero_cap[r, t, v] = f'new vintage with a {name} of zero'
+                break
+
+    def active_rpt(procs) -> set[tuple]:
+        res = set()
+        for r, t, v in procs:
+            life = _lifetime(data, r, t, v)
+            res.update((r, p, t) for p in time_optimize if v <= p < v + life)
+        return res
+
+    # keep the processes (and zero efficiencies) that are the last to use a tech, an input or a
+    # demand output, as the model checks the Efficiency indices against those sets
+    efficiency = data['Efficiency']
+    demands = set(data.get('commodity_demand', []))
+    kept_zero = set()
+    while True:
+        removed = {
+            k
+            for k, eff in efficiency.items()
+            if (k[0], k[2], k[3]) in inactive
+            or (k[0], k[2], k[3]) in zero_cap
+            or (eff == 0 and k not in kept_zero)
+        }
+        kept = efficiency.keys() - removed
+        techs = {k[2] for k in kept}
+        inputs = {k[1] for k in kept}
+        outputs = {k[4] for k in kept}
+        needed = [
+            k
+            for k in removed
+            if k[2] not in techs or k[1] not in inputs or (k[4] in demands and k[4] not in outputs)
+        ]
+        if not needed:
+            break
+        for k in needed:
+            inactive.pop((k[0], k[2], k[3]), None)
+            zero_cap.pop((k[0], k[2], k[3]), None)
+            kept_zero.add(k)
+
+    # revert the removals of any tech that would leave a forcing limit with nothing to limit
+    before = active_rpt(processes)
+    while True:
+        after = active_rpt(processes - zero_cap.keys())
+        lost = before - after
+        reverted = set()
+        for name in FORCING_LIMITS:
+            t_loc = RPT_LIMITS[name]
+            for key, limit in data.get(name, {}).items():
+                if limit > 0 and (key[0], key[1], key[t_loc]) in lost:
+                    reverted.add((key[0], key[t_loc]))
+        for r, t, v in list(zero_cap):
+            if (r, t) in reverted or (
+                data.get('MinNewCapacity', {}).get((r, v, t), 0) > 0
+                or data.get('MinCapacity', {}).get((r, v, t), 0) > 0
+            ):
+                reverted.add((r, t))
+                del zero_cap[r, t, v]
+        if not reverted:
+            break
+
+    inactive.update(zero_cap)
+    for process, reason in inactive.items():
+        report.removed[reason].append(process)
+
+    # 3.  drop the data of the removed processes and the limits left with nothing to limit
+    _drop_process_rows(data, inactive.keys(), report)
+    zero_eff = [k for k, eff in efficiency.items() if eff == 0 and k not in kept_zero]
+    _drop_rows(data, 'Efficiency', zero_eff, report)
+    zero_eff = set(zero_eff)
+    emission_activity = data.get('EmissionActivity', {})
+    _drop_rows(
+        data,
+        'EmissionActivity',
+        [k for k in emission_activity if k[:1] + k[2:] in zero_eff],
+        report,
+    )
+    removed_new = {(r, v, t) for r, t, v in zero_cap}
+    for name in ('MaxNewCapacity', 'MinNewCapacity'):
+        _drop_rows(data, name, [k for k in data.get(name, {}) if k in removed_new], report)
+    for name, t_loc in RPT_LIMITS.items():
+        keys = [k for k in data.get(name, {}) if (k[0], k[1], k[t_loc]) in lost]
+        _drop_rows(data, name, keys, report)
+
+
+def _drop_process_rows(data: dict, processes, report: PresolveReport) -> None:
+    """drop the rows of all of the process params for the processes (r, t, v)"""
+    for name, (t_loc, v_loc) in PROCESS_PARAMS.items():
+        keys = [k for k in data.get(name, {}) if (k[0], k[t_loc], k[v_loc]) in processes]
+        _drop_rows(data, name, keys, report)
+
+
+def _drop_rows(data: dict, name: str, keys: list, report: PresolveReport) -> None:
+    param = data.get(name)
+    for k in keys:
+        del param[k]
+    if keys:
+        report.dropped_rows[name] += len(keys)
+
+
+def _merge_pass_through_techs(data: dict, report: PresolveReport) -> None:
+    efficiency = data['Efficiency']
+    time_optimize = sorted(data['time_future'])[:-1]
+    allowed_sets = {'tech_production', 'tech_uncap'}
+    tech_uncap = set(data.get('tech_uncap', []))
+    excluded_techs = {
+        t
+        for name, techs in data.items()
+        if name.startswith('tech_') and name not in allowed_sets and isinstance(techs, list)
+        for t in techs
+    }
+    excluded_techs.update(data.get('tech_group_members', {}).keys())
+    for members in data.get('tech_group_members', {}).values():
+        excluded_techs.update(members)
+    excluded_comms = {
+        c
+        for name, comms in data.items()
+        if name.startswith('commodity_') and name != 'commodity_physical'
+        for c in comms
+    }
+
+    # the techs and commodities referred to by any other data
+    other_refs = set()
+    for name, param in data.items():
+        if isinstance(param, dict) and name not in PASS_THROUGH_PARAMS:
+            for key in param:
+                if name == 'EmissionActivity':
+                    # the consumer inputs are renamed below, so only the other locations count
+                    other_refs.update(key[:2] + key[3:])
+                elif isinstance(key, tuple):
+                    other_refs.update(key)
+                else:
+                    other_refs.add(key)
+            other_refs.update(v for v in param.values() if isinstance(v, str))
+
+    merged = True
+    while merged:
+        merged = False
+        by_rt = defaultdict(list)
+        producers = defaultdict(set)
+        exchange_comms = set()
+        for key in efficiency:
+            r, i, t, _, o = key
+            by_rt[r, t].append(key)
+            producers[r, o].add(t)
+            if '-' in r:
+                exchange_comms.update((i, o))
+        for (r, t), keys in by_rt.items():
+            flows = {(i, o) for _, i, _, _, o in keys}
+            if len(flows) != 1 or '-' in r:
+                continue
+            ((i, o),) = flows
+            if (
+                t not in tech_uncap
+                or t in excluded_techs
+                or t in other_refs
+                or i == o
+                or o in excluded_comms
+                or o in other_refs
+                or o in exchange_comms
+                or producers[r, o] != {t}
+                or any(efficiency[key] != 1 for key in keys)
+            ):
+                continue
+            # the tech must be available in every period to pass the flow through
+            vintages = [key[3] for key in keys]
+            if not all(
+                any(v <= p < v + _lifetime(data, r, t, v) for v in vintages) for p in time_optimize
+            ):
+                continue
+            consumers = [key for key in efficiency if key[0] == r and key[1] == o]
+            renamed = {key: (r, i) + key[2:] for key in consumers}
+            if any(new in efficiency for new in renamed.values()):
+                continue
+
+            _drop_process_rows(data, {(r, t, v) for v in vintages}, report)
+            for old, new in renamed.items():
+                efficiency[new] = efficiency.pop(old)
+            emission_activity = data.get('EmissionActivity', {})
+            for key in [k for k in emission_activity if k[0] == r and k[2] == o]:
+                emission_activity[key[:2] + (i,) + key[3:]] = emission_activity.pop(key)
+            for name in ('LifetimeTech', 'LoanLifetimeTech', 'CapacityToActivity'):
+                _drop_rows(data, name, [(r, t)] if (r, t) in data.get(name, {}) else [], report)
+            report.merged.append((r, t, i, o))
+            merged = True
+            break
+
+    # techs and commodities that are gone from all regions are removed from their sets
+    gone = {t for _, t, _, _ in report.merged} - {key[2] for key in efficiency}
+    for name in allowed_sets:
+        if name in data:
+            data[name] = [t for t in data[name] if t not in gone]
+    gone = {o for _, _, _, o in report.merged} - {key[1] for key in efficiency}
+    data['commodity_physical'] = [c for c in data['commodity_physical'] if c not in gone]
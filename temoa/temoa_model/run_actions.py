@@ -35,8 +35,11 @@ from time import time
 from typing import Tuple
 
 import deprecated
+from pyomo.common.gc_manager import PauseGC
 from pyomo.environ import (
+    Any,
     DataPortal,
+    Param,
     Suffix,
     Var,
     Constraint,
@@ -48,6 +51,10 @@ from pyomo.environ import (
 from pyomo.opt import SolverResults
 
 from temoa.data_processing.DB_to_Excel import make_excel
+from temoa.temoa_model.build_profiler import BuildProfiler
+from temoa.temoa_model.fast_writer import compile_model, remove_fast_components, solve_in_memory
+from temoa.temoa_model.lp_export import export_lp
+from temoa.temoa_model.solver_profiles import solver_options as get_solver_options
 from temoa.temoa_model.table_writer import TableWriter
 from temoa.temoa_model.temoa_config import TemoaConfig
 from temoa.temoa_model.temoa_model import TemoaModel
@@ -147,21 +154,73 @@ def check_database_version(config: TemoaConfig, db_major_reqd: int, min_db_minor
     return all_good
 
 
+def construct_instance(
+    model: TemoaModel,
+    data: dict,
+    model_name=None,
+    check_domains=True,
+    profiler: BuildProfiler | None = None,
+) -> TemoaModel:
+    """
+    Construct a model in place, directly from a data dictionary.  This bypasses the DataPortal
+    and the copy of the abstract model that is made by create_instance
+    :param model: the (unconstructed) model to construct
+    :param data: the data dictionary, keyed by component name
+    :param model_name: Optional name for this instance
+    :param check_domains: if False, the values loaded into the Params from the data are not
+    screened against the Param domains (for data that has already been screened)
+    :param profiler: if provided, the construction of each component is profiled
+    :return: the constructed model
+    """
+    if model_name is not None:
+        model.name = model_name
+    relaxed_domains = {}
+    if not check_domains:
+        for param in model.component_objects(ctype=Param, descend_into=False):
+            if param.name in data:
+                relaxed_domains[param.name] = param.domain
+                param.domain = Any
+    try:
+        # as in create_instance, there is no need to run the GC during the build
+        with PauseGC():
+            if profiler:
+                profiler.construct(model, data)
+            else:
+                # pyomo namespace format has data[namespace][idx]=value
+                model.construct(data={None: data})
+    finally:
+        for name, domain in relaxed_domains.items():
+            model.component(name).domain = domain
+    return model
+
+
 def build_instance(
-    loaded_portal: DataPortal,
+    loaded_portal: DataPortal | dict,
     model_name=None,
     silent=False,
     keep_lp_file=False,
     lp_path: Path = None,
+    check_domains=True,
+    fast_writer=False,
+    profile_path: Path | None = None,
+    lp_export: dict | None = None,
 ) -> TemoaModel:
     """
     Build a Temoa Instance from data
-    :param loaded_portal: a DataPortal instance
+    :param loaded_portal: a DataPortal instance, or a data dictionary to construct from directly
     :param silent: Run silently
     :param model_name: Optional name for this instance
+    :param check_domains: screen the Param values against their domains (direct build only)
+    :param fast_writer: leave the components generated by the fast writer out of the build
+    :param profile_path: if provided, the build of each component is profiled (direct build only)
+    and the report is written to this folder
+    :param lp_export: if provided with keep_lp_file, the model is exported in this format and
+    compression (see lp_export.py) instead of as a pyomo LP file with symbolic labels
     :return: a built TemoaModel
     """
     model = TemoaModel()
+    if fast_writer:
+        remove_fast_components(model)
 
     model.dual = Suffix(direction=Suffix.IMPORT)
     # self.model.rc = Suffix(direction=Suffix.IMPORT)
@@ -172,21 +231,42 @@ def build_instance(
         SE.write('[        ] Creating model instance.')
         SE.flush()
     logger.info('Started creating model instance from data')
-    instance = model.create_instance(loaded_portal, name=model_name)
+    profiler = None
+    if isinstance(loaded_portal, DataPortal):
+        if profile_path:
+            logger.warning('Build profiling is not available for DataPortal builds...skipped')
+        instance = model.create_instance(loaded_portal, name=model_name)
+    else:
+        profiler = BuildProfiler() if profile_path else None
+        instance = construct_instance(
+            model,
+            loaded_portal,
+            model_name=model_name,
+            check_domains=check_domains,
+            profiler=profiler,
+        )
     if not silent:
         SE.write('\r[%8.2f] Instance created.\n' % (time() - hack))
         SE.flush()
-    logger.info('Finished creating model instance from data')
+    logger.info('Finished creating model instance from data in %0.2f seconds', time() - hack)
+    if profiler:
+        logger.info('Model build profile:\n%s', profiler.table())
+        profiler.write(profile_path)
 
-    # save LP if requested
-    if keep_lp_file:
+    # save LP if requested (the fast writer saves its own MPS file at solve time)
+    if keep_lp_file and not fast_writer:
         if not lp_path:
             logger.warning('Requested "keep LP file", but no path is provided...skipped')
         else:
             if not Path.is_dir(lp_path):
                 Path.mkdir(lp_path)
-            filename = lp_path / 'model.lp'
-            instance.write(filename, format='lp', io_options={'symbolic_solver_labels': True})
+            tic = time()
+            if lp_export:
+                export_lp(compile_model(instance), lp_path, **lp_export)
+            else:
+                filename = lp_path / 'model.lp'
+                instance.write(filename, format='lp', io_options={'symbolic_solver_labels': True})
+                logger.info('Wrote %s in %0.2f seconds', filename, time() - tic)
 
     # gather some stats...
     c_count = 0
@@ -200,14 +280,21 @@ def build_instance(
 
 
 def solve_instance(
-    instance: TemoaModel, solver_name, silent: bool = False, solver_suffixes=None
+    instance: TemoaModel,
+    solver_name,
+    silent: bool = False,
+    solver_suffixes=None,
+    solver_options: dict | None = None,
 ) -> Tuple[TemoaModel, SolverResults]:
     """
     Solve the instance and return a loaded instance
+    :param solver_options: the options passed to the solver.  If None, the options of the default
+    profile for the solver are used
     :param solver_suffixes: iterable of string names for suffixes.  See pyomo dox.  right now, only
     'duals' is supported in the Temoa Framework.  Some solvers may not support duals.
     :param silent: Run silently
-    :param solver_name: The name of the solver to request from the SolverFactory
+    :param solver_name: The name of the solver to request from the SolverFactory, or 'highs' for
+    the in-memory HiGHS solve (see fast_writer.solve_in_memory)
     :param instance: the instance to solve
     :return: loaded instance
     """
@@ -217,6 +304,21 @@ def solve_instance(
     if not solver_name:
         logger.error('No solver specified in solve sequence')
         raise TypeError('Error occurred during solve, see log')
+    if solver_name == 'highs':
+        # HiGHS through highspy:  the model is compiled and handed over in memory, no LP file
+        hack = time()
+        if not silent:
+            SE.write('[        ] Solving.')
+            SE.flush()
+        # the duals come back with every HiGHS solve, so they are always reported in the results
+        # (as the pyomo plugins report them whenever the solver returns them)
+        instance, result = solve_in_memory(
+            instance, silent=silent, solver_suffixes=['duals'], solver_options=solver_options
+        )
+        if not silent:
+            SE.write('\r[%8.2f] Model solved.\n' % (time() - hack))
+            SE.flush()
+        return instance, result
     optimizer = SolverFactory(solver_name)
     if isinstance(optimizer, UnknownSolver):
         logger.error(
@@ -238,36 +340,12 @@ def solve_instance(
         raise NotImplementedError('Neos based solve is not currently supported')
 
     else:
-        if solver_name == 'cbc':
-            pass
-            # dev note:  I think these options are outdated.  Getting decent results without them...
-            #            preserved for now.
-            # Solver options. Reference:
-            # https://genxproject.github.io/GenX/dev/solver_configuration/
-            # optimizer.options["dualTolerance"] = 1e-6
-            # optimizer.options["primalTolerance"] = 1e-6
-            # optimizer.options["zeroTolerance"] = 1e-12
-            # optimizer.options["crossover"] = 'off'
-
-        elif solver_name == 'cplex':
-            # Note: these parameter values are taken to be the same as those in PyPSA
-            # (see: https://pypsa-eur.readthedocs.io/en/latest/configuration.html)
-            optimizer.options['lpmethod'] = 4  # barrier
-            optimizer.options['solutiontype'] = 2  # non basic solution, ie no crossover
-            optimizer.options['barrier convergetol'] = 1.0e-5
-            optimizer.options['feasopt tolerance'] = 1.0e-6
-
-        elif solver_name == 'gurobi':
-            # Note: these parameter values are taken to be the same as those in PyPSA (see: https://pypsa-eur.readthedocs.io/en/latest/configuration.html)
-            optimizer.options["Method"] = 2 # barrier
-            optimizer.options["Crossover"] = 0 # non basic solution, ie no crossover
-            optimizer.options["BarConvTol"] = 1.e-5
-            optimizer.options["FeasibilityTol"] = 1.e-6
-
-        elif solver_name == 'appsi_highs':
-            pass
-
-        # TODO: still need to add gurobi parameters?  (and move them all to .toml...?)
+        # the options of the selected profile (see solver_profiles.py)
+        if solver_options is None:
+            solver_options = get_solver_options(solver_name)
+        optimizer.options.update(solver_options)
+        if solver_options:
+            logger.info('Solver options: %s', solver_options)
 
         # dev note:  The handling of suffixes is pretty weak.  As of today 4/4/2024, highspy crashes if
         #            the keyword suffixes is passed in (regardless if there are any requested).  CBC only
@@ -349,6 +427,7 @@ def handle_results(instance: TemoaModel, results, options: TemoaConfig):
         table_writer.write_results(M=instance, results=results)
     else:
         table_writer.write_results(M=instance)
+    table_writer.finish()
 
     if options.save_excel:
         temp_scenario = set()
@@ -0,0 +1,174 @@
+"""
+Named profiles of solver options, selected in the [solver] section of the config file
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+A profile is a named dictionary of options for one solver.  The config file may select a profile
+and add (or replace) profiles for any solver:
+
+    [solver]
+    profile = "barrier"
+
+    [solver.gurobi.barrier]
+    Method = 2
+    Crossover = 0
+    Threads = 8
+
+The options are handed to the solver as-is, so the names are those of the solver itself.
+"""
+
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+DEFAULT_PROFILE = 'default'
+
+DEFAULT_PROFILES: dict[str, dict[str, dict]] = {
+    # dev note:  the cbc options below were used in the past (from GenX).  Getting decent results
+    #            without them, they are preserved as a profile:
+    #            https://genxproject.github.io/GenX/dev/solver_configuration/
+    'cbc': {
+        DEFAULT_PROFILE: {},
+        'genx': {'dualTolerance': 1e-6, 'primalTolerance': 1e-6, 'zeroTolerance': 1e-12},
+    },
+    # Note: these parameter values are taken to be the same as those in PyPSA
+    # (see: https://pypsa-eur.readthedocs.io/en/latest/configuration.html)
+    'cplex': {
+        DEFAULT_PROFILE: {
+            'lpmethod': 4,  # barrier
+            'solutiontype': 2,  # non basic solution, ie no crossover
+            'barrier convergetol': 1.0e-5,
+            'feasopt tolerance': 1.0e-6,
+        },
+    },
+    'gurobi': {
+        DEFAULT_PROFILE: {
+            'Method': 2,  # barrier
+            'Crossover': 0,  # non basic solution, ie no crossover
+            'BarConvTol': 1.0e-5,
+            'FeasibilityTol': 1.0e-6,
+        },
+    },
+    'appsi_highs': {DEFAULT_PROFILE: {}},
+    'highs': {DEFAULT_PROFILE: {}},
+}
+"""the profiles available without any configuration, by solver"""
+
+TUNING_PROFILES: dict[str, dict[str, dict]] = {
+    'cbc': {
+        'no_presolve': {'presolve': 'off'},
+        'no_scaling': {'scaling': 'off'},
+        'tight_tolerances': {'primalTolerance': 1e-9, 'dualTolerance': 1e-9},
+    },
+    'cplex': {
+        'dual_simplex': {'lpmethod': 2},
+        'barrier_crossover': {'lpmethod': 4, 'solutiontype': 1},
+        'concurrent': {'lpmethod': 6, 'threads': 4},
+        'barrier_4_threads': {'lpmethod': 4, 'solutiontype': 2, 'threads': 4},
+    },
+    'gurobi': {
+        'dual_simplex': {'Method': 1},
+        'barrier_crossover': {'Method': 2, 'Crossover': -1},
+        'concurrent': {'Method': 3, 'Threads': 4},
+        'barrier_4_threads': {'Method': 2, 'Crossover': 0, 'Threads': 4},
+        'loose_barrier': {'Method': 2, 'Crossover': 0, 'BarConvTol': 1e-4},
+    },
+    'appsi_highs': {
+        'simplex': {'solver': 'simplex'},
+        'ipm': {'solver': 'ipm'},
+        'ipm_no_crossover': {'solver': 'ipm', 'run_crossover': 'off'},
+        'ipm_4_threads': {'solver': 'ipm', 'threads': 4},
+        'tight_tolerances': {
+            'primal_feasibility_tolerance': 1e-9,
+            'dual_feasibility_tolerance': 1e-9,
+        },
+    },
+}
+"""additional profiles tried by the solver tuning (with the configured profiles), by solver"""
+# the in-memory HiGHS solve takes the same (HiGHS) options
+TUNING_PROFILES['highs'] = TUNING_PROFILES['appsi_highs']
+
+
+def validate_settings(settings: dict) -> None:
+    """
+    Check the [solver] section of the config file
+    :param settings: the section, as a dictionary
+    :return: None
+    """
+    profile = settings.get('profile', DEFAULT_PROFILE)
+    if not isinstance(profile, str):
+        logger.error('The solver profile must be the name of a profile.  Received: %s', profile)
+        raise TypeError('solver profile must be a string')
+    for solver_name, profiles in settings.items():
+        if solver_name == 'profile':
+            continue
+        if not isinstance(profiles, dict) or not all(
+            isinstance(options, dict) for options in profiles.values()
+        ):
+            logger.error(
+                'The [solver.%s] section should hold tables of options, like '
+                '[solver.%s.<profile name>]',
+                solver_name,
+                solver_name,
+            )
+            raise ValueError(f'solver profiles for {solver_name} are not tables of options')
+
+
+def solver_profiles(solver_name: str, settings: dict | None = None) -> dict[str, dict]:
+    """
+    Gather the profiles available for a solver
+    :param solver_name: the name of the solver
+    :param settings: the [solver] section of the config file, if any
+    :return: dictionary of profile name: options.  Configured profiles replace built-in ones
+    """
+    profiles = {
+        name: dict(options) for name, options in DEFAULT_PROFILES.get(solver_name, {}).items()
+    }
+    if settings:
+        profiles.update(
+            {name: dict(options) for name, options in settings.get(solver_name, {}).items()}
+        )
+    profiles.setdefault(DEFAULT_PROFILE, {})
+    return profiles
+
+
+def solver_options(solver_name: str, settings: dict | None = None) -> dict:
+    """
+    Get the options of the selected profile for a solver
+    :param solver_name: the name of the solver
+    :param settings: the [solver] section of the config file, if any
+    :return: dictionary of solver options
+    """
+    profile = settings.get('profile', DEFAULT_PROFILE) if settings else DEFAULT_PROFILE
+    profiles = solver_profiles(solver_name, settings)
+    if profile not in profiles:
+        logger.error(
+            'Solver profile %s is not defined for %s.  Available profiles: %s',
+            profile,
+            solver_name,
+            sorted(profiles),
+        )
+        raise ValueError(f'Solver profile {profile} is not defined for {solver_name}')
+    return profiles[profile]
@@ -0,0 +1,177 @@
+"""
+Tuning of the solver options:  solve one built instance under a set of solver profiles and rank
+the profiles by solve time
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+The instance is built (and pickled) once.  Each profile is solved in a fresh process, one at a
+time, so that the solves do not compete for the machine and a solver crash only costs that
+profile.  The objective of each solve is compared to that of the reference profile (the one
+selected in the config) to catch profiles that are fast because they are loose.
+"""
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+from multiprocessing import get_context
+from pathlib import Path
+from time import time
+
+from pyomo.environ import value
+
+from temoa.temoa_model.run_actions import check_solve_status, solve_instance
+from temoa.temoa_model.solver_profiles import TUNING_PROFILES
+from temoa.temoa_model.temoa_model import TemoaModel
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class TuningResult:
+    """The outcome of the solve under one profile"""
+
+    profile: str
+    options: dict
+    status: str
+    seconds: float | None = None
+    objective: float | None = None
+    delta: float | None = None
+    """relative difference of the objective to the reference objective"""
+
+    @property
+    def solved(self) -> bool:
+        return self.objective is not None
+
+
+def tuning_grid(solver_name: str, profiles: dict[str, dict]) -> dict[str, dict]:
+    """
+    The profiles to try:  the available (built-in and configured) profiles and the tuning profiles
+    :param solver_name: the name of the solver
+    :param profiles: the available profiles for the solver
+    :return: dictionary of profile name: options
+    """
+    grid = dict(profiles)
+    for name, options in TUNING_PROFILES.get(solver_name, {}).items():
+        grid.setdefault(name, options)
+    return grid
+
+
+def _timed_solve(
+    pickled_instance: bytes, solver_name: str, options: dict
+) -> tuple[str, float, float | None]:
+    """solve a pickled instance (in a worker process) and report (status, seconds, objective)"""
+    instance: TemoaModel = pickle.loads(pickled_instance)
+    tic = time()
+    instance, results = solve_instance(instance, solver_name, silent=True, solver_options=options)
+    seconds = time() - tic
+    optimal, _ = check_solve_status(results)
+    status = str(results.solver.termination_condition)
+    return status, seconds, value(instance.TotalCost) if optimal else None
+
+
+def tune_solver(
+    instance: TemoaModel, solver_name: str, grid: dict[str, dict], reference: str
+) -> list[TuningResult]:
+    """
+    Solve the instance under each profile of the grid, each in a separate process
+    :param instance: the built (unsolved) instance
+    :param solver_name: the name of the solver
+    :param grid: dictionary of profile name: options
+    :param reference: the profile for the objective comparison.  If it does not solve, the best
+    objective found is used
+    :return: the results, ranked by solve time (the failed solves last)
+    """
+    pickled_instance = pickle.dumps(instance)
+    logger.info(
+        'Tuning %s over %d profiles with a %0.1f MB instance',
+        solver_name,
+        len(grid),
+        len(pickled_instance) / 1024**2,
+    )
+    results = []
+    for name, options in grid.items():
+        # a fresh process for each solve, so no solver state carries over
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            future = executor.submit(_timed_solve, pickled_instance, solver_name, options)
+            try:
+                status, seconds, objective = future.result()
+            except (Exception, SystemExit) as e:  # the solve process exits on solver errors
+                logger.warning('Solve with profile %s failed: %s', name, e)
+                results.append(TuningResult(profile=name, options=options, status='error'))
+                continue
+        logger.info('Profile %s: %s in %0.2f seconds', name, status, seconds)
+        results.append(
+            TuningResult(
+                profile=name, options=options, status=status, seconds=seconds, objective=objective
+            )
+        )
+
+    solved = [res for res in results if res.solved]
+    ref = next((res.objective for res in solved if res.profile == reference), None)
+    if ref is None and solved:
+        ref = min(res.objective for res in solved)
+    for res in solved:
+        res.delta = (res.objective - ref) / abs(ref) if ref else res.objective - ref
+    return sorted(results, key=lambda res: (not res.solved, res.seconds or 0))
+
+
+def tuning_table(results: list[TuningResult]) -> str:
+    """
+    A text table of the ranked results
+    :param results: the ranked results
+    :return: the table
+    """
+    width = max((len(res.profile) for res in results), default=10)
+    header = '{:>4s}  {:<{}s}  {:<12s} {:>10s} {:>18s} {:>12s}  {}\n'.format(
+        'Rank', 'Profile', width, 'Status', 'Seconds', 'Objective', 'Obj. delta', 'Options'
+    )
+    lines = [header, '-' * (len(header) - 1) + '\n']
+    for rank, res in enumerate(results, start=1):
+        lines.append(
+            '{:>4d}  {:<{}s}  {:<12s} {:>10s} {:>18s} {:>12s}  {}\n'.format(
+                rank,
+                res.profile,
+                width,
+                res.status,
+                f'{res.seconds:.2f}' if res.seconds is not None else '-',
+                f'{res.objective:.4f}' if res.solved else '-',
+                f'{res.delta:+.2e}' if res.delta is not None else '-',
+                res.options,
+            )
+        )
+    return ''.join(lines)
+
+
+def write_tuning_report(results: list[TuningResult], folder: Path) -> None:
+    """
+    Write the table of the ranked results to the folder
+    :param results: the ranked results
+    :param folder: the folder for the solver_tuning.txt file
+    :return: None
+    """
+    with open(folder / 'solver_tuning.txt', 'w') as f:
+        f.write(tuning_table(results))
+    logger.info('Wrote solver tuning report to %s', folder / 'solver_tuning.txt')
@@ -4,15 +4,21 @@ tool for writing outputs to database tables
 import sqlite3
 import sys
 from collections import defaultdict, namedtuple
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
 from enum import Enum, unique
 from logging import getLogger
+from time import time
 from typing import TYPE_CHECKING
 
+import numpy as np
 from pyomo.core import value, Objective
 from pyomo.opt import SolverResults
 
 from temoa.temoa_model import temoa_rules
+from temoa.temoa_model.background_writer import BUSY_TIMEOUT, BackgroundWriter
 from temoa.temoa_model.exchange_tech_cost_ledger import CostType, ExchangeTechCostLedger
+from temoa.temoa_model.parquet_writer import ParquetSink
 from temoa.temoa_model.temoa_config import TemoaConfig
 from temoa.temoa_model.temoa_mode import TemoaMode
 from temoa.temoa_model.temoa_model import TemoaModel
@@ -67,6 +73,10 @@ all_output_tables = [
 ]
 
 
+# the page cache of the output connection in bulk write mode
+BULK_CACHE_KIB = 256_000
+
+
 def _marks(num: int) -> str:
     """convenience to make a sequence of question marks for query"""
     qs = ','.join('?' for _ in range(num))
@@ -103,6 +113,48 @@ def rpetv(fi: FI, e: str) -> tuple:
     return fi.r, fi.p, e, fi.t, fi.v
 
 
+# positions of (r, i, t, v, o) in the flow indices, to look up the efficiency
+_RITVO_OF_RPSDITVO = (0, 4, 5, 6, 7)
+_RITVO_OF_RPITVO = (0, 2, 3, 4, 5)
+
+
+def _var_values(var) -> tuple[list[tuple], np.ndarray]:
+    """the indices and the values (unset values as 0) of an indexed variable, in one pass"""
+    items = list(var.items())
+    vals = np.fromiter((vd.value or 0.0 for _, vd in items), dtype=np.float64, count=len(items))
+    return [idx for idx, _ in items], vals
+
+
+def _nonzero_values(var, epsilon: float) -> tuple[list[tuple], np.ndarray]:
+    """the indices and values of an indexed variable, where the value is not below epsilon"""
+    keys, vals = _var_values(var)
+    keep = np.flatnonzero(np.abs(vals) >= epsilon)
+    return [keys[k] for k in keep.tolist()], vals[keep]
+
+
+def _efficiency_vector(efficiency: dict, keys: list[tuple], ritvo_pos: tuple) -> np.ndarray:
+    """the efficiency of each flow index, from the (r, i, t, v, o) positions in the index"""
+    r, i, t, v, o = ritvo_pos
+    return np.fromiter(
+        (efficiency[k[r], k[i], k[t], k[v], k[o]] for k in keys), dtype=np.float64, count=len(keys)
+    )
+
+
+def _annual_fi(key: tuple, time_slice: tuple) -> FI:
+    """the flow index of an annual flow index (r, p, i, t, v, o) in a time slice (s, d)"""
+    r, p, i, t, v, o = key
+    s, d = time_slice
+    return FI(r, p, s, d, i, t, v, o)
+
+
+_FlowPart = namedtuple('_FlowPart', ['kind', 'keys', 'rows', 'cols', 'flow', 'eff'])
+"""
+The non-zero values of one flow variable:  the flow of each value, the row of its index in keys,
+the column of its time slice (annual variables only, else None), and its efficiency (if needed).
+kind is what the values add to the flow register:  'storage_in', 'out', 'curtail' or 'flex'
+"""
+
+
 class TableWriter:
     def __init__(self, config: TemoaConfig, epsilon=1e-5):
         self.config = config
@@ -116,6 +168,26 @@ class TableWriter:
             logger.error('Failed to connect to output database: %s', config.output_database)
             logger.error(e)
             sys.exit(-1)
+        # background write mode:  the db operations of each write are collected (as plain data)
+        # and run on a writer thread with its own connection.  Else, they are run right away
+        self.background: BackgroundWriter | None = None
+        self._batch: list[Callable[[sqlite3.Connection], None]] = []
+        self._capacity_written: Future | None = None
+        if config.background_write:
+            self.con.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT * 1000}')
+            self.background = BackgroundWriter(config.output_database)
+        # bulk write mode:  each write is one transaction on a connection tuned for throughput
+        self.bulk_write = config.bulk_write
+        self.write_count = 0
+        self._deferred_indexes: list[tuple[str, str]] = []
+        self._restore_pragmas: dict[str, str | int] = {}
+        if self.bulk_write:
+            self._run(self._set_bulk_pragmas)
+        # the output backends:  the database tables and/or parquet datasets
+        self.write_sqlite = config.output_format != 'parquet'
+        self.parquet: ParquetSink | None = None
+        if config.output_format in ('parquet', 'both'):
+            self.parquet = ParquetSink(config.output_path / 'parquet', self.con)
 
     def write_results(
         self, M: TemoaModel, results: SolverResults | None = None, append=False
@@ -127,25 +199,189 @@ class TableWriter:
         :param append: append whatever is already in the tables.  If False (default), clear existing tables by scenario name
         :return:
         """
+        if self.bulk_write:
+            self._run(self._begin_bulk_write)
         if not append:
             self.clear_scenario()
         if not self.tech_sectors:
             self._get_tech_sectors()
         self.write_objective(M)
         self.write_capacity_tables(M)
+        if self.background:
+            # the capacity tables go (committed) ahead of the rest, as the next myopic window
+            # reads them
+            self._run(sqlite3.Connection.commit)
+            self._capacity_written = self._submit()
         # analyze the emissions to get the costs and flows
         e_costs, e_flows = self._gather_emission_costs_and_flows(M)
         self.emission_register = e_flows
         self.write_emissions()
         self.write_costs(M, emission_entries=e_costs)
-        self.flow_register = self.calculate_flows(M)
-        self.check_flow_balance(M)
-        self.write_flow_tables()
+        if self.config.stream_flows:
+            self.write_flows_by_chunk(M)
+        else:
+            self.flow_register = self.calculate_flows(M)
+            self.check_flow_balance(M)
+            self.write_flow_tables()
         if results:  # write the duals
             self.write_dual_variables(results)
-        # catch-all
-        self.con.commit()
-        self.con.execute('VACUUM')
+        self._run(self._close_write)
+        # only the full writes count toward the vacuum policy
+        self.write_count += 1
+        policy = self.config.vacuum_policy
+        if isinstance(policy, int) and self.write_count % policy == 0:
+            self.maintain()
+        self._submit()
+
+    def commit_write(self) -> None:
+        """
+        Close out a partial write (e.g. the capacity tables of an MGA iteration):  restore any
+        deferred indexes and commit.  The db is not maintained here, as the vacuum policy counts
+        only the calls of write_results().  In background mode, the write is queued to the writer
+        :return: None
+        """
+        self._run(self._close_write)
+        self._submit()
+
+    def _close_write(self, con: sqlite3.Connection) -> None:
+        for _, sql in self._deferred_indexes:
+            con.execute(sql)
+        self._deferred_indexes = []
+        con.commit()
+        if self.parquet:
+            self.parquet.flush()
+
+    def maintain(self) -> None:
+        """compact (VACUUM) and re-analyze (ANALYZE) the output db"""
+        self._run(self._maintain)
+
+    @staticmethod
+    def _maintain(con: sqlite3.Connection) -> None:
+        tic = time()
+        con.commit()
+        con.execute('VACUUM')
+        con.execute('ANALYZE')
+        logger.info('Vacuumed and analyzed the output db in %0.2f seconds', time() - tic)
+
+    def finish(self) -> None:
+        """
+        Wrap up at the end of the run:  maintain the db if the policy is 'end', and restore the
+        connection settings changed for bulk writing.  In background mode, this waits for all of
+        the writes and closes the writer.
+        :return: None
+        """
+        self._run(sqlite3.Connection.commit)
+        if self.config.vacuum_policy == 'end':
+            self.maintain()
+        if self.background:
+            self._submit()
+            self.background.close()
+            self.background = None
+        # the db can only leave WAL mode on its last open connection, so after the writer closes
+        self._restore_connection(self.con)
+
+    def _restore_connection(self, con: sqlite3.Connection) -> None:
+        for pragma, val in self._restore_pragmas.items():
+            try:
+                con.execute(f'PRAGMA {pragma} = {val}')
+            except sqlite3.OperationalError:
+                logger.warning('Could not restore %s to %s on the output db', pragma, val)
+        self._restore_pragmas = {}
+
+    def execute(self, sql: str, params: tuple = ()) -> None:
+        """run (and commit) a statement on the output db, in order with the writes"""
+
+        def op(con: sqlite3.Connection) -> None:
+            con.execute(sql, params)
+            con.commit()
+
+        self._run(op)
+
+    def flush(self) -> None:
+        """wait until all of the writes so far are in the db (background mode)"""
+        if self.background:
+            self._submit()
+            self.background.flush()
+
+    def wait_for_capacity(self) -> None:
+        """wait until the capacity tables of the last write are in the db (background mode)"""
+        if self.background and self._capacity_written:
+            self.background.wait(self._capacity_written)
+
+    def _run(self, op: Callable[[sqlite3.Connection], None]) -> None:
+        """run a db operation now, or add it to the batch for the writer (background mode)"""
+        if self.background:
+            self._batch.append(op)
+        else:
+            op(self.con)
+
+    def _submit(self) -> Future | None:
+        """queue the batch of db operations to the writer (background mode)"""
+        if not (self.background and self._batch):
+            return None
+        batch, self._batch = self._batch, []
+
+        def job(con: sqlite3.Connection) -> None:
+            for op in batch:
+                op(con)
+
+        return self.background.submit(job)
+
+    def _set_bulk_pragmas(self, con: sqlite3.Connection) -> None:
+        """tune the connection for bulk writing, noting the settings to restore in finish()"""
+        # WAL is a setting of the db file, which cannot be undone while the db is open elsewhere.
+        # The sequencers hold the input db open for the whole run, so it is kept out of WAL
+        use_wal = not self._is_input_db()
+        pragmas = ('journal_mode', 'synchronous') if use_wal else ('synchronous',)
+        for pragma in pragmas:
+            self._restore_pragmas[pragma] = con.execute(f'PRAGMA {pragma}').fetchone()[0]
+        if use_wal:
+            con.execute('PRAGMA journal_mode = WAL')
+        else:
+            logger.info('The output db is also the input db.  The bulk write will not use WAL')
+        con.execute('PRAGMA synchronous = OFF')
+        con.execute(f'PRAGMA cache_size = {-BULK_CACHE_KIB}')
+        con.execute('PRAGMA temp_store = MEMORY')
+
+    def _is_input_db(self) -> bool:
+        """True if the output db is the input db of the run"""
+        return self.config.input_database.resolve() == self.config.output_database.resolve()
+
+    def _begin_bulk_write(self, con: sqlite3.Connection) -> None:
+        """
+        Open the transaction for the write and drop the (user-made) indexes of the output tables,
+        which are rebuilt once, after the inserts, when the write is closed
+        """
+        if not con.in_transaction:
+            con.execute('BEGIN')
+        # the automatic (primary key) indexes have no sql and cannot be dropped
+        qry = (
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f'AND tbl_name IN ({", ".join("?" for _ in all_output_tables)})'
+        )
+        self._deferred_indexes = con.execute(qry, all_output_tables).fetchall()
+        for name, _ in self._deferred_indexes:
+            con.execute(f'DROP INDEX "{name}"')
+        if self._deferred_indexes:
+            logger.debug('Deferred %d output table indexes', len(self._deferred_indexes))
+
+    def _insert(self, table: str, width: int, rows) -> None:
+        """insert rows (tuples of the width of the table, in its column order) in the backends"""
+        if self.parquet or self.background:
+            rows = list(rows)
+
+        def op(con: sqlite3.Connection) -> None:
+            if self.parquet:
+                self.parquet.add(table, rows)
+            if self.write_sqlite:
+                con.executemany(f'INSERT INTO {table} VALUES {_marks(width)}', rows)
+
+        self._run(op)
+
+    def _commit(self) -> None:
+        """commit an intermediate step, unless the write is one (bulk) transaction"""
+        if not self.bulk_write:
+            self._run(sqlite3.Connection.commit)
 
     def _get_tech_sectors(self):
         """pull the sector info and fill the mapping"""
@@ -154,19 +390,31 @@ class TableWriter:
         self.tech_sectors = dict(data)
 
     def clear_scenario(self):
-        cur = self.con.cursor()
-        for table in all_output_tables:
-            cur.execute(f'DELETE FROM {table} WHERE scenario = ?', (self.config.scenario,))
-        self.con.commit()
+        scenario = self.config.scenario
+
+        def op(con: sqlite3.Connection) -> None:
+            cur = con.cursor()
+            for table in all_output_tables:
+                cur.execute(f'DELETE FROM {table} WHERE scenario = ?', (scenario,))
+            if self.parquet:
+                self.parquet.clear_scenario(scenario)
+
+        self._run(op)
+        self._commit()
         self.clear_iterative_runs()
 
     def clear_indexed_scenarios(self):
-        cur = self.con.cursor()
-        for table in all_output_tables:
-            cur.execute(
-                f'DELETE FROM {table} WHERE 1',
-            )
-        self.con.commit()
+        def op(con: sqlite3.Connection) -> None:
+            cur = con.cursor()
+            for table in all_output_tables:
+                cur.execute(
+                    f'DELETE FROM {table} WHERE 1',
+                )
+            con.commit()
+            if self.parquet:
+                self.parquet.clear_all()
+
+        self._run(op)
 
     def clear_iterative_runs(self):
         """
@@ -175,10 +423,26 @@ class TableWriter:
         :return: None
         """
         target = self.config.scenario + '-%'  # the dash followed by wildcard for anything after
-        cur = self.con.cursor()
-        for table in all_output_tables:
-            cur.execute(f'DELETE FROM {table} WHERE scenario like ?', (target,))
-        self.con.commit()
+        scenario = self.config.scenario
+
+        def op(con: sqlite3.Connection) -> None:
+            cur = con.cursor()
+            for table in all_output_tables:
+                cur.execute(f'DELETE FROM {table} WHERE scenario like ?', (target,))
+            if self.parquet:
+                self.parquet.clear_iterative_runs(scenario)
+
+        self._run(op)
+        self._commit()
+
+    def clear_parquet_periods_after(self, period: int) -> None:
+        """
+        clear the parquet partitions of the scenario for the periods on/after the period, to
+        match the database, which the myopic sequencer clears itself
+        """
+        if self.parquet:
+            scenario = self.config.scenario
+            self._run(lambda con: self.parquet.clear_periods_after(scenario, period))
 
     def write_objective(self, M: TemoaModel) -> None:
         """Write the value of all ACTIVE objectives to the DB"""
@@ -189,12 +453,12 @@ class TableWriter:
                 'Multiple active objectives found for scenario: %s.  All will be logged in db',
                 self.config.scenario,
             )
-        for obj in active_objs:
-            obj_name, obj_value = obj.getname(fully_qualified=True), value(obj)
-            qry = 'INSERT INTO OutputObjective VALUES (?, ?, ?)'
-            data = (self.config.scenario, obj_name, obj_value)
-            self.con.execute(qry, data)
-            self.con.commit()
+        data = [
+            (self.config.scenario, obj.getname(fully_qualified=True), value(obj))
+            for obj in active_objs
+        ]
+        self._insert('OutputObjective', 3, data)
+        self._commit()
 
     def write_emissions(self):
         """Write the emission table to the DB"""
@@ -210,9 +474,8 @@ class TableWriter:
                 continue
             entry = (scenario, ei.r, sector, ei.p, ei.e, ei.t, ei.v, val)
             data.append(entry)
-        qry = f'INSERT INTO OutputEmission VALUES {_marks(8)}'
-        self.con.executemany(qry, data)
-        self.con.commit()
+        self._insert('OutputEmission', 8, data)
+        self._commit()
 
     def write_capacity_tables(self, M: TemoaModel, iteration: int | None = None) -> None:
         """Write the capacity tables to the DB"""
@@ -231,8 +494,7 @@ class TableWriter:
                     continue
                 new_cap = (scenario, r, s, t, v, val)
                 data.append(new_cap)
-        qry = 'INSERT INTO OutputBuiltCapacity VALUES (?, ?, ?, ?, ?, ?)'
-        self.con.executemany(qry, data)
+        self._insert('OutputBuiltCapacity', 6, data)
 
         # NetCapacity
         data = []
@@ -243,8 +505,7 @@ class TableWriter:
             s = self.tech_sectors.get(t)
             new_net_cap = (scenario, r, s, p, t, v, val)
             data.append(new_net_cap)
-        qry = 'INSERT INTO OutputNetCapacity VALUES (?, ?, ?, ?, ?, ?, ?)'
-        self.con.executemany(qry, data)
+        self._insert('OutputNetCapacity', 7, data)
 
         # Retired Capacity
         data = []
@@ -255,30 +516,36 @@ class TableWriter:
             s = self.tech_sectors.get(t)
             new_retired_cap = (scenario, r, s, p, t, v, val)
             data.append(new_retired_cap)
-        qry = 'INSERT INTO OutputRetiredCapacity VALUES (?, ?, ?, ?, ?, ?, ?)'
-        self.con.executemany(qry, data)
+        self._insert('OutputRetiredCapacity', 7, data)
 
-        self.con.commit()
+        self._commit()
 
-    def write_flow_tables(self, iteration: int | None = None) -> None:
-        """Write the flow tables"""
+    def write_flow_tables(
+        self, iteration: int | None = None, flows: dict[FI, dict[FlowType, float]] | None = None
+    ) -> None:
+        """
+        Write the flow tables
+        :param iteration: the iteration (appended to the scenario name), if any
+        :param flows: the flows to write (e.g. a chunk).  If None, the flow register is written
+        """
         if not self.tech_sectors:
             raise RuntimeError('tech sectors not available... code error')
-        if not self.flow_register:
-            raise RuntimeError('flow_register not available... code error')
-        # sort the flows
-        flows_by_type: dict[FlowType, list[tuple]] = defaultdict(list)
+        if flows is None:
+            flows = self.flow_register
+            if not flows:
+                raise RuntimeError('flow_register not available... code error')
         scenario = self.config.scenario
         if iteration:
             scenario = scenario + f'-{iteration}'
-        for fi in self.flow_register:
-            sector = self.tech_sectors.get(fi.t)
-            for flow_type in self.flow_register[fi]:
-                val = self.flow_register[fi][flow_type]
-                if abs(val) < self.epsilon:
+
+        # the rows of each flow type are generated straight into the insert
+        def entries(flow_type: FlowType):
+            for fi, fi_flows in flows.items():
+                val = fi_flows.get(flow_type)
+                if val is None or abs(val) < self.epsilon:
                     continue
-                entry = (scenario, fi.r, sector, fi.p, fi.s, fi.d, fi.i, fi.t, fi.v, fi.o, val)
-                flows_by_type[flow_type].append(entry)
+                sector = self.tech_sectors.get(fi.t)
+                yield scenario, fi.r, sector, fi.p, fi.s, fi.d, fi.i, fi.t, fi.v, fi.o, val
 
         table_associations = {
             FlowType.OUT: 'OutputFlowOut',
@@ -288,16 +555,48 @@ class TableWriter:
         }
 
         for flow_type, table_name in table_associations.items():
-            qry = f'INSERT INTO {table_name} VALUES {_marks(11)}'
-            self.con.executemany(qry, flows_by_type[flow_type])
+            self._insert(table_name, 11, entries(flow_type))
+
+        self._commit()
 
-        self.con.commit()
+    def write_flows_by_chunk(self, M: TemoaModel, iteration: int | None = None) -> bool:
+        """
+        Calculate, check and write the flows one (region, period) chunk at a time, so the full
+        flow register is never held.  The flow balance check is made on each chunk, with running
+        totals of the flows (by type) kept for the log.
+        :param M: the model
+        :param iteration: the iteration (appended to the scenario name), if any
+        :return: True if the flow balance check passed for all chunks
+        """
+        tic = time()
+        all_good = True
+        totals: dict[FlowType, float] = defaultdict(float)
+        num_chunks = 0
+        for _, flows in self.iter_flow_chunks(M):
+            all_good &= self.check_flow_balance(M, flows)
+            for fi_flows in flows.values():
+                for flow_type, val in fi_flows.items():
+                    totals[flow_type] += val
+            self.write_flow_tables(iteration, flows)
+            num_chunks += 1
+        logger.info(
+            'Wrote the flows in %d (region, period) chunks in %0.2f seconds.  Totals: %s',
+            num_chunks,
+            time() - tic,
+            ', '.join(f'{ft.name}: {totals[ft]:0.2f}' for ft in FlowType),
+        )
+        return all_good
 
-    def check_flow_balance(self, M: TemoaModel) -> bool:
-        """An easy sanity check to ensure that the flow tables are balanced, except for storage"""
-        flows = self.flow_register
+    def check_flow_balance(
+        self, M: TemoaModel, flows: dict[FI, dict[FlowType, float]] | None = None
+    ) -> bool:
+        """
+        An easy sanity check to ensure that the flow tables are balanced, except for storage
+        :param flows: the flows to check (e.g. a chunk).  If None, the flow register is checked
+        """
+        if flows is None:
+            flows = self.flow_register
         all_good = True
-        deltas = defaultdict(float)
         for fi in flows:
             if fi.t in M.tech_storage:
                 continue
@@ -315,17 +614,15 @@ class TableWriter:
             annual_tech = fi.t in M.tech_annual
 
             #  ----- flow balance equation -----
-            deltas[fi] = fin - fout - flost - fflex
+            delta = fin - fout - flost - fflex
             # dev note:  in constraint, flex is taken out of flow_out, but in output processing,
             #            we are treating flow out as "net of flex" so this is not double-counting
 
             if (
-                flows[fi][FlowType.IN] != 0 and abs(deltas[fi] / flows[fi][FlowType.IN]) > 0.02
+                flows[fi][FlowType.IN] != 0 and abs(delta / flows[fi][FlowType.IN]) > 0.02
             ):  # 2% of input is missing / surplus
                 all_good = False
-                logger.warning(
-                    'Flow balance check failed for index: %s, delta: %0.2f', fi, deltas[fi]
-                )
+                logger.warning('Flow balance check failed for index: %s, delta: %0.2f', fi, delta)
                 logger.info(
                     'Tech: %s, Var: %s, Flex: %s, Annual: %s',
                     tech,
@@ -341,89 +638,145 @@ class TableWriter:
                     fcurt,
                     fflex,
                 )
-            elif flows[fi][FlowType.IN] == 0 and abs(deltas[fi]) > 0.02:
+            elif flows[fi][FlowType.IN] == 0 and abs(delta) > 0.02:
                 all_good = False
                 logger.warning(
                     'Flow balance check failed for index: %s, delta: %0.2f.  Flows happening with 0 input',
                     fi,
-                    deltas[fi],
+                    delta,
                 )
         return all_good
 
     def calculate_flows(self, M: TemoaModel) -> dict[FI, dict[FlowType, float]]:
-        """Gather all flows by Flow Index and Type"""
-
+        """
+        Gather all flows by Flow Index and Type.  The values of each flow variable are pulled in
+        one pass into an array, and the derived flows (IN, LOST, and the annual flows spread over
+        the time slices) are computed on the arrays, so only the non-zero flows are visited.
+        """
         res: dict[FI, dict[FlowType, float]] = defaultdict(lambda: defaultdict(float))
+        parts, time_slices = self._flow_parts(M)
+        storage = set(M.tech_storage)
+        for part in parts:
+            self._add_flows(res, part, slice(None), time_slices, storage)
+        return res
 
-        # ---- NON-annual ----
-
-        # Storage, which has a unique v_flow_in (non-storage techs do not have this variable)
-        for key in M.V_FlowIn:
-            fi = FI(*key)
-            flow = value(M.V_FlowIn[fi])
-            if abs(flow) < self.epsilon:
-                continue
-            res[fi][FlowType.IN] = flow
-            res[fi][FlowType.LOST] = (1 - value(M.Efficiency[ritvo(fi)])) * flow
-
-        # regular flows
-        for key in M.V_FlowOut:
-            fi = FI(*key)
-            flow = value(M.V_FlowOut[fi])
-            if abs(flow) < self.epsilon:
-                continue
-            res[fi][FlowType.OUT] = flow
-
-            if fi.t not in M.tech_storage:  # we can get the flow in by out/eff...
-                flow = value(M.V_FlowOut[fi]) / value(M.Efficiency[ritvo(fi)])
-                res[fi][FlowType.IN] = flow
-                res[fi][FlowType.LOST] = (1 - value(M.Efficiency[ritvo(fi)])) * flow
-
-        # curtailment flows
-        for key in M.V_Curtailment:
-            fi = FI(*key)
-            val = value(M.V_Curtailment[fi])
-            if abs(val) < self.epsilon:
-                continue
-            res[fi][FlowType.CURTAIL] = val
+    def iter_flow_chunks(
+        self, M: TemoaModel
+    ) -> Iterator[tuple[tuple, dict[FI, dict[FlowType, float]]]]:
+        """
+        Gather the flows by (region, period) chunk.  The values of the flow variables are pulled
+        once (as arrays), and the register of a chunk is only built when the chunk is reached, so
+        only one chunk of the register is held at a time.  Every flow index of a chunk is complete
+        within it.
+        :return: generator of ((region, period), flow register of the chunk)
+        """
+        parts, time_slices = self._flow_parts(M)
+        storage = set(M.tech_storage)
+        chunk_ids: dict[tuple, int] = {}
+        groups = []
+        for part in parts:
+            key_ids = np.fromiter(
+                (chunk_ids.setdefault(key[:2], len(chunk_ids)) for key in part.keys),
+                dtype=np.int64,
+                count=len(part.keys),
+            )
+            ids = key_ids[part.rows]
+            order = np.argsort(ids, kind='stable')
+            groups.append((order, ids[order]))
+        for chunk_id, rp in enumerate(chunk_ids):
+            res: dict[FI, dict[FlowType, float]] = defaultdict(lambda: defaultdict(float))
+            for part, (order, sorted_ids) in zip(parts, groups):
+                lo, hi = np.searchsorted(sorted_ids, (chunk_id, chunk_id + 1))
+                if hi > lo:
+                    self._add_flows(res, part, order[lo:hi], time_slices, storage)
+            yield rp, res
+
+    def _flow_parts(self, M: TemoaModel) -> tuple[list[_FlowPart], list[tuple]]:
+        """
+        Pull the non-zero values of the flow variables, in the order that they are added to the
+        register
+        :return: tuple of (the parts, the time slices (s, d) of the annual parts)
+        """
+        efficiency = M.Efficiency.extract_values()
+        parts = []
 
-        # flex techs.  This will subtract the flex from their output flow IOT make OUT the "net"
-        for key in M.V_Flex:
-            fi = FI(*key)
-            flow = value(M.V_Flex[fi])
-            if abs(flow) < self.epsilon:
-                continue
-            res[fi][FlowType.FLEX] = flow
-            res[fi][FlowType.OUT] -= flow
+        # ---- NON-annual ----
+        # Storage, which has a unique v_flow_in (non-storage techs do not have this variable),
+        # regular flows, curtailment and flex flows
+        for kind, var in (
+            ('storage_in', M.V_FlowIn),
+            ('out', M.V_FlowOut),
+            ('curtail', M.V_Curtailment),
+            ('flex', M.V_Flex),
+        ):
+            keys, flow = _nonzero_values(var, self.epsilon)
+            eff = None
+            if kind in ('storage_in', 'out'):
+                eff = _efficiency_vector(efficiency, keys, _RITVO_OF_RPSDITVO)
+            parts.append(_FlowPart(kind, keys, np.arange(len(keys)), None, flow, eff))
 
         # ---- annual ----
+        # the annual flows are spread over the time slices by the matrix product with SegFrac
+        time_slices = [(s, d) for s in M.time_season for d in M.time_of_day]
+        seg_frac = np.array([value(M.SegFrac[s, d]) for s, d in time_slices], dtype=np.float64)
+        for kind, var in (('out', M.V_FlowOutAnnual), ('flex', M.V_FlexAnnual)):
+            keys, annual = _var_values(var)
+            flows = np.outer(annual, seg_frac)
+            rows, cols = np.nonzero(np.abs(flows) >= self.epsilon)
+            eff = None
+            if kind == 'out':
+                eff = _efficiency_vector(efficiency, keys, _RITVO_OF_RPITVO)[rows]
+            parts.append(_FlowPart(kind, keys, rows, cols, flows[rows, cols], eff))
+        return parts, time_slices
 
-        # basic annual flows
-        for r, p, i, t, v, o in M.V_FlowOutAnnual:
-            for s in M.time_season:
-                for d in M.time_of_day:
-                    fi = FI(r, p, s, d, i, t, v, o)
-                    flow = value(M.V_FlowOutAnnual[r, p, i, t, v, o]) * value(M.SegFrac[s, d])
-                    if abs(flow) < self.epsilon:
-                        continue
-                    res[fi][FlowType.OUT] = flow
-                    res[fi][FlowType.IN] = flow / value(M.Efficiency[ritvo(fi)])
-                    res[fi][FlowType.LOST] = (1 - value(M.Efficiency[ritvo(fi)])) * res[fi][
-                        FlowType.IN
-                    ]
-
-        # flex annual
-        for r, p, i, t, v, o in M.V_FlexAnnual:
-            for s in M.time_season:
-                for d in M.time_of_day:
-                    fi = FI(r, p, s, d, i, t, v, o)
-                    flow = value(M.V_FlexAnnual[fi]) * value(M.SegFrac[s, d])
-                    if abs(flow) < self.epsilon:
-                        continue
-                    res[fi][FlowType.FLEX] = flow
-                    res[fi][FlowType.OUT] -= flow
-
-        return res
+    @staticmethod
+    def _add_flows(
+        res: dict[FI, dict[FlowType, float]],
+        part: _FlowPart,
+        sel,
+        time_slices: list[tuple],
+        storage: set[str],
+    ) -> None:
+        """
+        Add the selected values of a part to the flow register
+        :param res: the register
+        :param part: the part
+        :param sel: the positions of the values to add (an index array or a slice)
+        :param time_slices: the time slices (s, d), for the columns of the annual parts
+        :param storage: the storage techs, which have their own flow in
+        """
+        rows = part.rows[sel].tolist()
+        if part.cols is None:
+            fis = [FI._make(part.keys[row]) for row in rows]
+        else:
+            cols = part.cols[sel].tolist()
+            fis = [_annual_fi(part.keys[row], time_slices[col]) for row, col in zip(rows, cols)]
+        flow = part.flow[sel]
+        match part.kind:
+            case 'storage_in':
+                lost = (1 - part.eff[sel]) * flow
+                for fi, f_in, f_lost in zip(fis, flow.tolist(), lost.tolist()):
+                    res[fi][FlowType.IN] = f_in
+                    res[fi][FlowType.LOST] = f_lost
+            case 'out':
+                # we can get the flow in by out/eff, except for storage (which has its own flow in)
+                flow_in = flow / part.eff[sel]
+                lost = (1 - part.eff[sel]) * flow_in
+                for fi, f_out, f_in, f_lost in zip(
+                    fis, flow.tolist(), flow_in.tolist(), lost.tolist()
+                ):
+                    res[fi][FlowType.OUT] = f_out
+                    if fi.t not in storage:
+                        res[fi][FlowType.IN] = f_in
+                        res[fi][FlowType.LOST] = f_lost
+            case 'curtail':
+                for fi, val in zip(fis, flow.tolist()):
+                    res[fi][FlowType.CURTAIL] = val
+            case 'flex':
+                # this will subtract the flex from the output flow IOT make OUT the "net"
+                for fi, val in zip(fis, flow.tolist()):
+                    res[fi][FlowType.FLEX] = val
+                    res[fi][FlowType.OUT] -= val
 
     @staticmethod
     def loan_costs(
@@ -719,19 +1072,16 @@ class TableWriter:
         # let's be kind and sort by something reasonable (r, v, t, p)
         rows.sort(key=lambda r: (r[1], r[4], r[3], r[2]))
         # TODO:  maybe extract this to a pure writing function...we shall see
-        cur = self.con.cursor()
-        qry = 'INSERT INTO OutputCost VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
-        cur.executemany(qry, rows)
-        self.con.commit()
+        self._insert('OutputCost', 13, rows)
+        self._commit()
 
     def write_dual_variables(self, results: SolverResults):
         """Write the dual variables to the OutputCost table"""
         # collect the values
         constraint_data = results['Solution'].Constraint.items()
         dual_data = [(self.config.scenario, t[0], t[1]['Dual']) for t in constraint_data]
-        qry = 'INSERT INTO OutputDualVariable VALUES (?, ?, ?)'
-        self.con.executemany(qry, dual_data)
-        self.con.commit()
+        self._insert('OutputDualVariable', 3, dual_data)
+        self._commit()
 
     def __del__(self):
         if self.con:
@@ -24,7 +24,11 @@ from logging import getLogger
 from pathlib import Path
 from sys import stderr as SE
 
+from temoa.temoa_model.lp_export import validate_export_settings
+from temoa.temoa_model.parquet_writer import OUTPUT_FORMATS, pyarrow_available
+from temoa.temoa_model.solver_profiles import DEFAULT_PROFILE, solver_options, validate_settings
 from temoa.temoa_model.temoa_mode import TemoaMode
+from temoa.temoa_model.time_slice_aggregation import AGGREGATION_METHODS
 
 logger = getLogger(__name__)
 
@@ -54,6 +58,22 @@ class TemoaConfig:
         price_check: bool = True,
         source_trace: bool = False,
         plot_commodity_network: bool = False,
+        sql_filtering: bool = False,
+        data_cache: bool = False,
+        data_cache_max_mb: float = 1000,
+        reader_threads: int = 1,
+        fast_writer: bool = False,
+        build_profile: bool = False,
+        time_slice_aggregation: dict | None = None,
+        presolve: bool = False,
+        presolve_merge_pass_through: bool = False,
+        solver: dict | None = None,
+        lp_export: dict | None = None,
+        bulk_write: bool = False,
+        vacuum_policy: str | int = 1,
+        output_format: str = 'sqlite',
+        stream_flows: bool = False,
+        background_write: bool = False,
     ):
         self.scenario = scenario
         # capture the operating mode
@@ -123,6 +143,79 @@ class TemoaConfig:
                 'Both are required to produce plots.'
             )
         self.plot_commodity_network = plot_commodity_network and self.source_trace
+        # push the source-trace filtering of the data down into the database (only relevant when
+        # the data is filtered, i.e. source trace or myopic)
+        self.sql_filtering = sql_filtering
+        # cache the loaded data on disk for re-use in subsequent runs on the same data.  A load from
+        # the cache skips the source trace, so its log messages and the commodity network plots are
+        # not produced (a warning is logged).  The presolve report is cached with the data
+        self.data_cache = data_cache
+        self.data_cache_max_mb = data_cache_max_mb
+        # number of threads (each with a read-only connection) used to read the input tables
+        if not isinstance(reader_threads, int) or reader_threads < 1:
+            logger.error('reader_threads must be a positive integer.  Received: %s', reader_threads)
+            raise ValueError('reader_threads must be a positive integer')
+        self.reader_threads = reader_threads
+        # build the objective and the largest constraint families directly into a matrix for the
+        # solver (perfect foresight only), rather than through pyomo expressions
+        self.fast_writer = fast_writer
+        # profile the construction of each model component (time, size, memory)
+        self.build_profile = build_profile
+        # cluster the seasons into representative seasons:
+        # {'seasons': int, 'method': 'kmeans' | 'hierarchical', 'seed': int, 'report': bool}
+        if time_slice_aggregation is not None:
+            seasons = time_slice_aggregation.get('seasons')
+            if not isinstance(seasons, int) or seasons < 1:
+                logger.error('Time slice aggregation requires a positive number of seasons')
+                raise ValueError('time_slice_aggregation seasons must be a positive integer')
+            method = time_slice_aggregation.setdefault('method', 'kmeans')
+            if method not in AGGREGATION_METHODS:
+                logger.error('Time slice aggregation method %s is not recognized', method)
+                raise ValueError(
+                    f'time_slice_aggregation method must be one of {AGGREGATION_METHODS}'
+                )
+            time_slice_aggregation.setdefault('seed', 0)
+            time_slice_aggregation.setdefault('report', False)
+        self.time_slice_aggregation = time_slice_aggregation
+        # remove the processes that can never be active (and merge pass-through techs) before build
+        self.presolve = presolve
+        self.presolve_merge_pass_through = presolve_merge_pass_through
+        # named profiles of solver options:  {'profile': str, <solver_name>: {<profile>: {...}}}
+        if solver is not None:
+            validate_settings(solver)
+        self.solver_settings = solver
+        self.solver_profile = solver.get('profile', DEFAULT_PROFILE) if solver else DEFAULT_PROFILE
+        self.solver_options = solver_options(self.solver_name, self.solver_settings)
+        # write the saved LP file as a compact (compressed) export with short labels:
+        # {'format': 'mps' | 'lp', 'compression': 'gzip' | 'zstd' | 'none'}
+        self.lp_export = validate_export_settings(lp_export) if lp_export is not None else None
+        # write the results of each write in one transaction, on a connection tuned for throughput
+        self.bulk_write = bulk_write
+        # when to VACUUM and ANALYZE the output db:  'never', 'end' (of the run), or every N writes
+        every_n = type(vacuum_policy) is int and vacuum_policy > 0
+        if not every_n and vacuum_policy not in ('never', 'end'):
+            logger.error(
+                "vacuum_policy must be 'never', 'end' or a number of writes.  Received: %s",
+                vacuum_policy,
+            )
+            raise ValueError("vacuum_policy must be 'never', 'end' or a positive integer")
+        self.vacuum_policy = vacuum_policy
+        # the output backend:  the database tables ('sqlite'), parquet datasets in the output path
+        # ('parquet'), or 'both'.  The output database is required in all cases
+        if output_format not in OUTPUT_FORMATS:
+            logger.error(
+                'output_format must be one of %s.  Received: %s', OUTPUT_FORMATS, output_format
+            )
+            raise ValueError(f'output_format must be one of {OUTPUT_FORMATS}')
+        if output_format != 'sqlite' and not pyarrow_available():
+            logger.error('The parquet output requires the pyarrow package, which is not installed')
+            raise ValueError(f'output_format {output_format} requires the pyarrow package')
+        self.output_format = output_format
+        # calculate and write the flows by (region, period) chunk, to cap the memory of the write
+        self.stream_flows = stream_flows
+        # write the results on a background thread, so an iterative (myopic/MGA) run moves on to the
+        # next solve while the last one is written
+        self.background_write = background_write
 
         # warn if output db != input db
         if self.input_database.suffix == self.output_database.suffix:  # they are both .db/.sqlite
@@ -160,6 +253,21 @@ class TemoaConfig:
                 'price_check': bool(),
                 'source_trace': bool(),
                 'plot_commodity_network': bool(),
+                'sql_filtering': bool(),
+                'data_cache': bool(),
+                'reader_threads': int(),
+                'fast_writer': bool(),
+                'build_profile': bool(),
+                'time_slice_aggregation': {'seasons': int()},
+                'presolve': bool(),
+                'presolve_merge_pass_through': bool(),
+                'solver': {'profile': str()},
+                'lp_export': {'format': str()},
+                'bulk_write': bool(),
+                'vacuum_policy': str() | int(),
+                'output_format': str(),
+                'stream_flows': bool(),
+                'background_write': bool(),
             }:
                 # full schema OK
                 pass
@@ -219,15 +327,41 @@ class TemoaConfig:
         msg += '{:>{}s}: {}\n'.format('Price check', width, self.price_check)
         msg += '{:>{}s}: {}\n'.format('Source trace', width, self.source_trace)
         msg += '{:>{}s}: {}\n'.format('Commodity network plots', width, self.plot_commodity_network)
+        msg += '{:>{}s}: {}\n'.format('SQL data filtering', width, self.sql_filtering)
+        msg += '{:>{}s}: {}\n'.format('Data cache', width, self.data_cache)
+        msg += '{:>{}s}: {}\n'.format('Data reader threads', width, self.reader_threads)
+        msg += '{:>{}s}: {}\n'.format('Fast LP writer', width, self.fast_writer)
+        msg += '{:>{}s}: {}\n'.format('Build profiling', width, self.build_profile)
+        if self.time_slice_aggregation:
+            msg += '{:>{}s}: {} seasons ({})\n'.format(
+                'Time slice aggregation',
+                width,
+                self.time_slice_aggregation['seasons'],
+                self.time_slice_aggregation['method'],
+            )
+        msg += '{:>{}s}: {}\n'.format('Presolve', width, self.presolve)
+        msg += '{:>{}s}: {}\n'.format(
+            'Presolve pass-through merge', width, self.presolve_merge_pass_through
+        )
 
         msg += spacer
         msg += '{:>{}s}: {}\n'.format('Selected solver', width, self.solver_name)
+        msg += '{:>{}s}: {}\n'.format('Solver profile', width, self.solver_profile)
         msg += '{:>{}s}: {}\n'.format('NEOS status', width, self.neos)
 
         msg += spacer
         msg += '{:>{}s}: {}\n'.format('Spreadsheet output', width, self.save_excel)
         msg += '{:>{}s}: {}\n'.format('Pyomo LP write status', width, self.save_lp_file)
+        if self.lp_export:
+            msg += '{:>{}s}: {} ({})\n'.format(
+                'LP export', width, self.lp_export['format'], self.lp_export['compression']
+            )
         msg += '{:>{}s}: {}\n'.format('Save duals to output db', width, self.save_duals)
+        msg += '{:>{}s}: {}\n'.format('Bulk write', width, self.bulk_write)
+        msg += '{:>{}s}: {}\n'.format('Vacuum policy', width, self.vacuum_policy)
+        msg += '{:>{}s}: {}\n'.format('Output format', width, self.output_format)
+        msg += '{:>{}s}: {}\n'.format('Stream flows', width, self.stream_flows)
+        msg += '{:>{}s}: {}\n'.format('Background write', width, self.background_write)
 
         # TODO:  conditionally add in the mode options
 
@@ -239,6 +373,11 @@ class TemoaConfig:
             msg += '{:>{}s}: {}\n'.format(
                 'Myopic step size', width, self.myopic_inputs.get('step_size')
             )
+            msg += '{:>{}s}: {}\n'.format(
+                'Myopic persistent solver',
+                width,
+                self.myopic_inputs.get('persistent_solver', False),
+            )
 
         # msg += '{:>{}s}: {}\n'.format('Retain myopic databases', width, self.KeepMyopicDBs)
         # msg += spacer
@@ -245,46 +245,6 @@ def CheckEfficiencyIndices(M: 'TemoaModel'):
         raise ValueError(f_msg)
 
 
-@deprecated('should not be needed.  We are pulling the default on-the-fly where used')
-def CreateCapacityFactors(M: 'TemoaModel'):
-    """
-    Steps to creating capacity factors:
-    1. Collect all possible processes
-    2. Find the ones _not_ specified in CapacityFactorProcess
-    3. Set them, based on CapacityFactorTech.
-    """
-    # Shorter names, for us lazy programmer types
-    CFP = M.CapacityFactorProcess
-
-    # Step 1
-    processes = set((r, t, v) for r, i, t, v, o in M.Efficiency.sparse_iterkeys())
-
-    all_cfs = set(
-        (r, s, d, t, v)
-        for (r, t, v), s, d in cross_product(processes, M.time_season, M.time_of_day)
-    )
-
-    # Step 2
-    unspecified_cfs = all_cfs.difference(CFP.sparse_iterkeys())
-
-    # Step 3
-
-    # Some hackery: We futz with _constructed because Pyomo thinks that this
-    # Param is already constructed.  However, in our view, it is not yet,
-    # because we're specifically targeting values that have not yet been
-    # constructed, that we know are valid, and that we will need.
-
-    if unspecified_cfs:
-        # CFP._constructed = False
-        for r, s, d, t, v in unspecified_cfs:
-            CFP[r, s, d, t, v] = M.CapacityFactorTech[r, s, d, t]
-        logger.debug(
-            'Created Capacity Factors for %d processes without an explicit specification',
-            len(unspecified_cfs),
-        )
-    # CFP._constructed = True
-
-
 def get_default_process_lifetime(M: 'TemoaModel', r, t, v):
     """
     This initializer used to initialize the LifetimeProcess parameter from LifetimeTech where needed
@@ -564,16 +524,57 @@ def CreateSparseDicts(M: 'TemoaModel'):
     pairs are defined as appropriate for each dictionary.
     """
     l_first_period = min(M.time_future)
-    l_exist_indices = M.ExistingCapacity.sparse_keys()
+    l_exist_indices = set(M.ExistingCapacity.sparse_keys())
     l_used_techs = set()
 
+    # hoist the pyomo component access out of the loops:  the periods, the tech subsets and the
+    # sparse keys of the split params are gathered once for fast membership tests
+    time_optimize = list(M.time_optimize)
+    vintage_exist = frozenset(M.vintage_exist)
+    tech_exchange = frozenset(M.tech_exchange)
+    tech_uncap = frozenset(M.tech_uncap)
+    tech_flex = frozenset(M.tech_flex)
+    tech_curtailment = frozenset(M.tech_curtailment)
+    tech_baseload = frozenset(M.tech_baseload)
+    tech_storage = frozenset(M.tech_storage)
+    tech_ramping = frozenset(M.tech_ramping)
+    tech_resource = frozenset(M.tech_resource)
+    tech_reserve = frozenset(M.tech_reserve)
+    input_split_keys = frozenset(M.TechInputSplit.sparse_iterkeys())
+    input_split_average_keys = frozenset(M.TechInputSplitAverage.sparse_iterkeys())
+    output_split_keys = frozenset(M.TechOutputSplit.sparse_iterkeys())
+    lifetime_process = M.LifetimeProcess
+    existing_capacity = M.ExistingCapacity
+    efficiency = M.Efficiency
+
+    process_inputs = M.processInputs
+    process_outputs = M.processOutputs
+    commodity_d_stream_process = M.commodityDStreamProcess
+    commodity_u_stream_process = M.commodityUStreamProcess
+    process_outputs_by_input = M.ProcessOutputsByInput
+    process_inputs_by_output = M.ProcessInputsByOutput
+    process_techs = M.processTechs
+    process_vintages = M.processVintages
+    curtailment_vintages = M.curtailmentVintages
+    baseload_vintages = M.baseloadVintages
+    storage_vintages = M.storageVintages
+    ramp_vintages = M.rampVintages
+    inputsplit_vintages = M.inputsplitVintages
+    inputsplitaverage_vintages = M.inputsplitaverageVintages
+    outputsplit_vintages = M.outputsplitVintages
+    process_by_period_and_output = M.ProcessByPeriodAndOutput
+    process_reserve_periods = M.processReservePeriods
+    export_regions = M.exportRegions
+    import_regions = M.importRegions
+
     # The basis for the dictionaries are the sparse keys defined in the
     # Efficiency table.
     logger.debug(
         'Starting creation of SparseDicts with Efficiency table size: %d', len(M.Efficiency)
     )
-    for r, i, t, v, o in M.Efficiency.sparse_iterkeys():
-        if '-' in r and t not in M.tech_exchange:
+    efficiency_keys = list(M.Efficiency.sparse_iterkeys())
+    for r, i, t, v, o in efficiency_keys:
+        if '-' in r and t not in tech_exchange:
             msg = (
                 f'Technology {t} seems to be an exchange technology '
                 f'but it is not specified in tech_exchange set'
@@ -581,18 +582,18 @@ def CreateSparseDicts(M: 'TemoaModel'):
             logger.error(msg)
             raise ValueError(msg)
         l_process = (r, t, v)
-        l_lifetime = value(M.LifetimeProcess[l_process])
+        l_lifetime = value(lifetime_process[l_process])
         # Do some error checking for the user.
         # TODO:  Marker for the section that is culling out vintages that are in time_exist, but with no capacity...
-        if v in M.vintage_exist:
-            if l_process not in l_exist_indices and t not in M.tech_uncap:
+        if v in vintage_exist:
+            if l_process not in l_exist_indices and t not in tech_uncap:
                 msg = (
                     'Warning: %s has a specified Efficiency, but does not '
                     'have any existing install base (ExistingCapacity).\n'
                 )
                 SE.write(msg % str(l_process))
                 continue
-            if t not in M.tech_uncap and M.ExistingCapacity[l_process] == 0:
+            if t not in tech_uncap and existing_capacity[l_process] == 0:
                 msg = (
                     'Notice: Unnecessary specification of ExistingCapacity '
                     '%s.  If specifying a capacity of zero, you may simply '
@@ -614,7 +615,7 @@ def CreateSparseDicts(M: 'TemoaModel'):
                 continue
 
         eindex = (r, i, t, v, o)
-        if M.Efficiency[eindex] == 0:
+        if efficiency[eindex] == 0:
             msg = (
                 '\nNotice: Unnecessary specification of Efficiency %s.  If '
                 'specifying an efficiency of zero, you may simply omit the '
@@ -626,18 +627,30 @@ def CreateSparseDicts(M: 'TemoaModel'):
 
         l_used_techs.add(t)
 
-        if t in M.tech_flex:
+        if t in tech_flex:
             M.flex_commodities.add(o)
 
+        # the tech subset memberships do not depend on the period
+        is_curtailment = t in tech_curtailment
+        is_baseload = t in tech_baseload
+        is_storage = t in tech_storage
+        is_ramping = t in tech_ramping
+        is_resource = t in tech_resource
+        is_reserve = t in tech_reserve
+        is_exchange = t in tech_exchange
+        if is_exchange:
+            # since t is in M.tech_exchange, r here has *-* format (e.g. 'US-Mexico').
+            # r[:r.find("-")] extracts the region index before the "-".
+            r_export = r[: r.find('-')]
+            r_import = r[r.find('-') + 1 :]
+
         # Add in the period (p) index, since it's not included in the efficiency
         # table.
-        for p in M.time_optimize:
+        for p in time_optimize:
             # Can't build a vintage before it's been invented
             if p < v:
                 continue
 
-            pindex = (r, p, t, v)
-
             # dev note:  this gathering of processLoans appears to be unused in any meaningful way
             #            it is just plucked later for (r, t, v) combos which aren't needed anyhow.
             # if v in M.time_optimize:
@@ -649,126 +662,77 @@ def CreateSparseDicts(M: 'TemoaModel'):
             if v + l_lifetime <= p:
                 continue
 
+            pindex = (r, p, t, v)
+
             # Here we utilize the indices in a given iteration of the loop to
-            # create the dictionary keys, and initialize the associated values
-            # to an empty set.
-            if pindex not in M.processInputs:
-                M.processInputs[pindex] = set()
-                M.processOutputs[pindex] = set()
-            if (r, p, i) not in M.commodityDStreamProcess:
-                M.commodityDStreamProcess[r, p, i] = set()
-            if (r, p, o) not in M.commodityUStreamProcess:
-                M.commodityUStreamProcess[r, p, o] = set()
-            if (r, p, t, v, i) not in M.ProcessOutputsByInput:
-                M.ProcessOutputsByInput[r, p, t, v, i] = set()
-            if (r, p, t, v, o) not in M.ProcessInputsByOutput:
-                M.ProcessInputsByOutput[r, p, t, v, o] = set()
-            if (r, t) not in M.processTechs:
-                M.processTechs[r, t] = set()
+            # create the dictionary keys (if needed) and fill in the appropriate
+            # values for each dictionary.
+            process_inputs.setdefault(pindex, set()).add(i)
+            process_outputs.setdefault(pindex, set()).add(o)
+            commodity_d_stream_process.setdefault((r, p, i), set()).add((t, v))
+            commodity_u_stream_process.setdefault((r, p, o), set()).add((t, v))
+            process_outputs_by_input.setdefault((r, p, t, v, i), set()).add(o)
+            process_inputs_by_output.setdefault((r, p, t, v, o), set()).add(i)
+            process_techs.setdefault((r, t), set()).add((p, v))
             # While the dictionary just above identifies the vintage (v)
             # associated with each (r,p,t) we need to do the same below for various
             # technology subsets.
-            if (r, p, t) not in M.processVintages:
-                M.processVintages[r, p, t] = set()
-            if t in M.tech_curtailment and (r, p, t) not in M.curtailmentVintages:
-                M.curtailmentVintages[r, p, t] = set()
-            if t in M.tech_baseload and (r, p, t) not in M.baseloadVintages:
-                M.baseloadVintages[r, p, t] = set()
-            if t in M.tech_storage and (r, p, t) not in M.storageVintages:
-                M.storageVintages[r, p, t] = set()
-            if t in M.tech_ramping and (r, p, t) not in M.rampVintages:
-                M.rampVintages[r, p, t] = set()
-            if (r, p, i, t) in M.TechInputSplit.sparse_iterkeys() and (
-                r,
-                p,
-                i,
-                t,
-            ) not in M.inputsplitVintages:
-                M.inputsplitVintages[r, p, i, t] = set()
-            if (r, p, i, t) in M.TechInputSplitAverage.sparse_iterkeys() and (
-                r,
-                p,
-                i,
-                t,
-            ) not in M.inputsplitaverageVintages:
-                M.inputsplitaverageVintages[r, p, i, t] = set()
-            if (r, p, t, o) in M.TechOutputSplit.sparse_iterkeys() and (
-                r,
-                p,
-                t,
-                o,
-            ) not in M.outputsplitVintages:
-                M.outputsplitVintages[r, p, t, o] = set()
-            if t in M.tech_resource and (r, p, o) not in M.ProcessByPeriodAndOutput:
-                M.ProcessByPeriodAndOutput[r, p, o] = set()
-            if t in M.tech_reserve and (r, p) not in M.processReservePeriods:
-                M.processReservePeriods[r, p] = set()
+            process_vintages.setdefault((r, p, t), set()).add(v)
+            if is_curtailment:
+                curtailment_vintages.setdefault((r, p, t), set()).add(v)
+            if is_baseload:
+                baseload_vintages.setdefault((r, p, t), set()).add(v)
+            if is_storage:
+                storage_vintages.setdefault((r, p, t), set()).add(v)
+            if is_ramping:
+                ramp_vintages.setdefault((r, p, t), set()).add(v)
+            if (r, p, i, t) in input_split_keys:
+                inputsplit_vintages.setdefault((r, p, i, t), set()).add(v)
+            if (r, p, i, t) in input_split_average_keys:
+                inputsplitaverage_vintages.setdefault((r, p, i, t), set()).add(v)
+            if (r, p, t, o) in output_split_keys:
+                outputsplit_vintages.setdefault((r, p, t, o), set()).add(v)
+            if is_resource:
+                process_by_period_and_output.setdefault((r, p, o), set()).add((i, t, v))
+            if is_reserve:
+                process_reserve_periods.setdefault((r, p), set()).add((t, v))
             # TODO:  This construct is goofy.  Using regex to split a string.  Perhaps consider a
             #  SQL query to a table that has exchange members by tech (future growth?)
-
-            # since t is in M.tech_exchange, r here has *-* format (e.g. 'US-Mexico').  # r[
-            # :r.find("-")] extracts the region index before the "-".
-            if t in M.tech_exchange and (r[: r.find('-')], p, i) not in M.exportRegions:
-                M.exportRegions[r[: r.find('-')], p, i] = set()
-            if t in M.tech_exchange and (r[r.find('-') + 1 :], p, o) not in M.importRegions:
-                M.importRegions[r[r.find('-') + 1 :], p, o] = set()
-
-            # Now that all of the keys have been defined, and values initialized
-            # to empty sets, we fill in the appropriate values for each
-            # dictionary.
-            M.processInputs[pindex].add(i)
-            M.processOutputs[pindex].add(o)
-            M.commodityDStreamProcess[r, p, i].add((t, v))
-            M.commodityUStreamProcess[r, p, o].add((t, v))
-            M.ProcessOutputsByInput[r, p, t, v, i].add(o)
-            M.ProcessInputsByOutput[r, p, t, v, o].add(i)
-            M.processTechs[r, t].add((p, v))
-            M.processVintages[r, p, t].add(v)
-            if t in M.tech_curtailment:
-                M.curtailmentVintages[r, p, t].add(v)
-            if t in M.tech_baseload:
-                M.baseloadVintages[r, p, t].add(v)
-            if t in M.tech_storage:
-                M.storageVintages[r, p, t].add(v)
-            if t in M.tech_ramping:
-                M.rampVintages[r, p, t].add(v)
-            if (r, p, i, t) in M.TechInputSplit.sparse_iterkeys():
-                M.inputsplitVintages[r, p, i, t].add(v)
-            if (r, p, i, t) in M.TechInputSplitAverage.sparse_iterkeys():
-                M.inputsplitaverageVintages[r, p, i, t].add(v)
-            if (r, p, t, o) in M.TechOutputSplit.sparse_iterkeys():
-                M.outputsplitVintages[r, p, t, o].add(v)
-            if t in M.tech_resource:
-                M.ProcessByPeriodAndOutput[r, p, o].add((i, t, v))
-            if t in M.tech_reserve:
-                M.processReservePeriods[r, p].add((t, v))
-            if t in M.tech_exchange:
-                M.exportRegions[r[: r.find('-')], p, i].add((r[r.find('-') + 1 :], t, v, o))
-            if t in M.tech_exchange:
-                M.importRegions[r[r.find('-') + 1 :], p, o].add((r[: r.find('-')], t, v, i))
-
-    for r, i, t, v, o in M.Efficiency.sparse_iterkeys():
-        if t in M.tech_exchange:
+            if is_exchange:
+                export_regions.setdefault((r_export, p, i), set()).add((r_import, t, v, o))
+                import_regions.setdefault((r_import, p, o), set()).add((r_export, t, v, i))
+
+    # index the techs in the Efficiency table by (region, output) to find the processes upstream
+    # of each exchange tech without a scan of the whole table
+    upstream_techs: dict[tuple, list] = defaultdict(list)
+    for r1, i1, t1, v1, o1 in efficiency_keys:
+        upstream_techs[r1, o1].append(t1)
+    for r, i, t, v, o in efficiency_keys:
+        if t in tech_exchange:
             reg = r.split('-')[0]
-            for r1, i1, t1, v1, o1 in M.Efficiency.sparse_iterkeys():
-                if (r1 == reg) & (o1 == i):
-                    for p in M.time_optimize:
-                        if p >= v and (r1, p, o1) not in M.commodityDStreamProcess:
-                            msg = (
-                                'The {} process in region {} has no downstream process other '
-                                'than a transport ({}) process. This will cause the commodity '
-                                'balance constraint to fail. Add a dummy technology downstream '
-                                'of the {} process to the Efficiency table to avoid this '
-                                'issue.  The dummy technology should have the same region and '
-                                'vintage as the {} process, an efficiency of 100%, with the {} '
-                                'commodity as the input and output.'
-                                'The dummy technology may also need a corresponding row in the '
-                                'ExistingCapacity table with capacity values that equal the {} '
-                                'technology.'
-                            )
-                            f_msg = msg.format(t1, r1, t, t1, t1, o1, t1)
-                            logger.error(f_msg)
-                            raise ValueError(f_msg)
+            # the check does not depend on the upstream tech, so only the first is needed (for the
+            # message)
+            if (reg, i) not in upstream_techs:
+                continue
+            t1 = upstream_techs[reg, i][0]
+            r1, o1 = reg, i
+            for p in time_optimize:
+                if p >= v and (r1, p, o1) not in commodity_d_stream_process:
+                    msg = (
+                        'The {} process in region {} has no downstream process other '
+                        'than a transport ({}) process. This will cause the commodity '
+                        'balance constraint to fail. Add a dummy technology downstream '
+                        'of the {} process to the Efficiency table to avoid this '
+                        'issue.  The dummy technology should have the same region and '
+                        'vintage as the {} process, an efficiency of 100%, with the {} '
+                        'commodity as the input and output.'
+                        'The dummy technology may also need a corresponding row in the '
+                        'ExistingCapacity table with capacity values that equal the {} '
+                        'technology.'
+                    )
+                    f_msg = msg.format(t1, r1, t, t1, t1, o1, t1)
+                    logger.error(f_msg)
+                    raise ValueError(f_msg)
 
     l_unused_techs = M.tech_all - l_used_techs
     if l_unused_techs:
@@ -872,6 +836,35 @@ def CreateSparseDicts(M: 'TemoaModel'):
     logger.debug('Completed creation of SparseDicts')
 
 
+def CreateCostIndices(M: 'TemoaModel'):
+    """
+    Bucket the keys of the cost parameters by period (vintage for investment costs) so that each
+    period's cost in the objective only visits its own keys, rather than scanning all of them.
+    The keys in each bucket retain the order of the parameter's sparse keys.  The emission cost
+    bucket holds the (r, e, i, t, v, o) EmissionActivity keys that have a CostEmission in the
+    period and belong to a process that is active in it.
+    """
+    for r, t, v in M.CostInvest.sparse_iterkeys():
+        M.CostInvest_by_v.setdefault(v, []).append((r, t, v))
+    for r, p, t, v in M.CostFixed.sparse_iterkeys():
+        M.CostFixed_by_p.setdefault(p, []).append((r, p, t, v))
+    for r, p, t, v in M.CostVariable.sparse_iterkeys():
+        M.CostVariable_by_p.setdefault(p, []).append((r, p, t, v))
+
+    emission_cost_periods = defaultdict(list)
+    for r, p, e in M.CostEmission.sparse_iterkeys():
+        emission_cost_periods[r, e].append(p)
+    time_optimize = list(M.time_optimize)
+    for r, e, i, t, v, o in M.EmissionActivity:
+        periods = emission_cost_periods.get((r, e))
+        if not periods:
+            continue
+        # visit the periods in the same order as the objective, so the buckets fill in key order
+        for p in time_optimize:
+            if p in periods and (r, p, t, v) in M.processInputs:
+                M.CostEmission_by_p.setdefault(p, []).append((r, e, i, t, v, o))
+
+
 # ---------------------------------------------------------------
 # Create sparse parameter indices.
 # These functions are called from temoa_model.py and use the sparse keys
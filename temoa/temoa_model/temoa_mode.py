@@ -41,3 +41,4 @@ class TemoaMode(Enum):
     METHOD_OF_MORRIS = 4  # Method-of-Morris run
     BUILD_ONLY = 5  # Just build the model, no solve
     CHECK = 6  # build and run price check, source trace it
+    TUNE = 7  # build once and rank the solve times of the solver profiles
@@ -105,6 +105,18 @@ class TemoaModel(AbstractModel):
         M.exportRegions = dict()
         M.importRegions = dict()
         M.flex_commodities = set()
+        M.CostInvest_by_v = dict()
+        """the CostInvest keys, by vintage {v: [(r, t, v), ...]}"""
+        M.CostFixed_by_p = dict()
+        """the CostFixed keys, by period {p: [(r, p, t, v), ...]}"""
+        M.CostVariable_by_p = dict()
+        """the CostVariable keys, by period {p: [(r, p, t, v), ...]}"""
+        M.CostEmission_by_p = dict()
+        """the costed EmissionActivity keys of active processes, by period {p: [(r, e, i, t, v, o)]}"""
+        M.commodityBalanceTemplates = dict()
+        """the terms of the CommodityBalance_Constraint, shared by all time slices {(r, p, c): template}"""
+        M.capacityFactorProcessData = None
+        """the given CapacityFactorProcess values {(r, s, d, t, v): cf}, gathered on first use"""
 
         ################################################
         #                 Model Sets                   #
@@ -268,7 +280,6 @@ class TemoaModel(AbstractModel):
             default=get_default_capacity_factor,
         )
 
-        # M.initialize_CapacityFactors = BuildAction(rule=CreateCapacityFactors)
 
         M.LifetimeTech = Param(
             M.RegionalIndices, M.tech_all, default=TemoaModel.default_lifetime_tech
@@ -522,6 +533,7 @@ class TemoaModel(AbstractModel):
         #             (minimize total cost)            #
         ################################################
 
+        M.Create_CostIndices = BuildAction(rule=CreateCostIndices)
         M.TotalCost = Objective(rule=TotalCost_rule, sense=minimize)
 
         ################################################
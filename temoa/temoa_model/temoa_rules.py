@@ -19,9 +19,10 @@ in LICENSE.txt.  Users uncompressing this from an archive may not have
 received this license file.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+from functools import lru_cache
 from logging import getLogger
 from sys import stderr as SE
-from typing import TYPE_CHECKING, Iterable
+from typing import TYPE_CHECKING, Iterable, NamedTuple
 
 from pyomo.core import Var, Expression
 from pyomo.environ import Constraint, value
@@ -65,6 +66,20 @@ def AdjustedCapacity_Constraint(M: 'TemoaModel', r, p, t, v):
             return M.V_Capacity[r, p, t, v] == M.V_NewCapacity[r, t, v] - retired_cap
 
 
+def get_capacity_factor(M: 'TemoaModel', r, s, d, t, v) -> float:
+    """
+    The capacity factor of a process in a time slice.  Where CapacityFactorProcess is not
+    specified, it falls back to CapacityFactorTech (which defaults to 1).  The fallback is read
+    directly rather than through the CapacityFactorProcess default, which validates every value.
+    """
+    if M.capacityFactorProcessData is None:
+        M.capacityFactorProcessData = dict(M.CapacityFactorProcess.sparse_iteritems())
+    capacity = M.capacityFactorProcessData.get((r, s, d, t, v))
+    if capacity is None:
+        capacity = value(M.CapacityFactorTech[r, s, d, t])
+    return capacity
+
+
 def Capacity_Constraint(M: 'TemoaModel', r, p, s, d, t, v):
     r"""
 This constraint ensures that the capacity of a given process is sufficient
@@ -106,11 +121,7 @@ possibility.
         for S_i in M.processInputs[r, p, t, v]
         for S_o in M.ProcessOutputsByInput[r, p, t, v, S_i]
     )
-    if (r, s, d, t, v) in M.CapacityFactorProcess:
-        # use the data provided
-        capacity = value(M.CapacityFactorProcess[r, s, d, t, v])
-    else:  # use the capacity factor for the tech
-        capacity = value(M.CapacityFactorTech[r, s, d, t])
+    capacity = get_capacity_factor(M, r, s, d, t, v)
 
     if t in M.tech_curtailment:
         # If technologies are present in the curtailment set, then enough
@@ -402,24 +413,36 @@ def loan_cost(
         annuity = capacity * invest_cost * loan_annualize * lifetime_loan_process / lifetime_process
         payments_made = min(lifetime_process, P_e - vintage)
         return annuity * payments_made
+    args = (GDR, P_0, P_e, vintage, lifetime_loan_process, lifetime_process)
+    try:
+        loan_factor, horizon_factor = loan_discount_factors(*args)
+    except TypeError:  # un-hashable pyomo components (Params) are computed without the cache
+        loan_factor, horizon_factor = loan_discount_factors.__wrapped__(*args)
+    res = capacity * (invest_cost * loan_annualize * loan_factor) * horizon_factor
+    return res
+
+
+@lru_cache(maxsize=None)
+def loan_discount_factors(
+    GDR: float,
+    P_0: int,
+    P_e: int,
+    vintage: int,
+    lifetime_loan_process: float | int,
+    lifetime_process: int,
+) -> tuple[float, float]:
+    """
+    The discounting terms of the loan cost, which only depend on the rates and years, so they are
+    cached for re-use across the many processes that share them
+    :return: tuple of (the loan payments discounted to P_0, the fraction of the loan within the
+    horizon)
+    """
     x = 1 + GDR  # a convenience
-    res = (
-        capacity
-        * (
-            invest_cost
-            * loan_annualize
-            * (
-                lifetime_loan_process
-                if not GDR
-                else (x ** (P_0 - vintage + 1) * (1 - x ** (-lifetime_loan_process)) / GDR)
-            )
-        )
-        * (
-            (1 - x ** (-min(lifetime_process, P_e - vintage)))
-            / (1 - x ** (-lifetime_process))
-        )
+    loan_factor = x ** (P_0 - vintage + 1) * (1 - x ** (-lifetime_loan_process)) / GDR
+    horizon_factor = (1 - x ** (-min(lifetime_process, P_e - vintage))) / (
+        1 - x ** (-lifetime_process)
     )
-    return res
+    return loan_factor, horizon_factor
 
 
 def fixed_or_variable_cost(
@@ -441,18 +464,27 @@ def fixed_or_variable_cost(
     :param p: the period under evaluation
     :return:
     """
-    x = 1 + GDR
-    res = cap_or_flow * (
-        cost_factor
-        * (
-            process_lifetime
-            if not GDR
-            else (x ** (P_0 - p + 1) * (1 - x ** (-process_lifetime)) / GDR)
-        )
-    )
+    if not GDR:
+        factor = process_lifetime
+    else:
+        try:
+            factor = discount_factor(GDR, P_0, p, process_lifetime)
+        except TypeError:  # un-hashable pyomo components (Params) are computed without the cache
+            factor = discount_factor.__wrapped__(GDR, P_0, p, process_lifetime)
+    res = cap_or_flow * (cost_factor * factor)
     return res
 
 
+@lru_cache(maxsize=None)
+def discount_factor(GDR: float, P_0: float, p: int, process_lifetime: float) -> float:
+    """
+    The discounting term of the fixed and variable costs, which only depends on the rate, years and
+    lifetime, so it is cached for re-use across the many flows/capacities that share it
+    """
+    x = 1 + GDR
+    return x ** (P_0 - p + 1) * (1 - x ** (-process_lifetime)) / GDR
+
+
 def PeriodCost_rule(M: 'TemoaModel', p):
     P_0 = min(M.time_optimize)
     P_e = M.time_future.last()  # End point of modeled horizon
@@ -474,8 +506,7 @@ def PeriodCost_rule(M: 'TemoaModel', p):
             GDR,
             vintage=S_v,
         )
-        for r, S_t, S_v in M.CostInvest.sparse_iterkeys()
-        if S_v == p
+        for r, S_t, S_v in M.CostInvest_by_v.get(p, ())
     )
 
     fixed_costs = sum(
@@ -487,8 +518,7 @@ def PeriodCost_rule(M: 'TemoaModel', p):
             P_0,
             p=p,
         )
-        for r, S_p, S_t, S_v in M.CostFixed.sparse_iterkeys()
-        if S_p == p
+        for r, S_p, S_t, S_v in M.CostFixed_by_p.get(p, ())
     )
 
     variable_costs = sum(
@@ -500,8 +530,8 @@ def PeriodCost_rule(M: 'TemoaModel', p):
             P_0,
             p,
         )
-        for r, S_p, S_t, S_v in M.CostVariable.sparse_iterkeys()
-        if S_p == p and S_t not in M.tech_annual
+        for r, S_p, S_t, S_v in M.CostVariable_by_p.get(p, ())
+        if S_t not in M.tech_annual
         for S_i in M.processInputs[r, S_p, S_t, S_v]
         for S_o in M.ProcessOutputsByInput[r, S_p, S_t, S_v, S_i]
         for s in M.time_season
@@ -517,8 +547,8 @@ def PeriodCost_rule(M: 'TemoaModel', p):
             P_0,
             p,
         )
-        for r, S_p, S_t, S_v in M.CostVariable.sparse_iterkeys()
-        if S_p == p and S_t in M.tech_annual
+        for r, S_p, S_t, S_v in M.CostVariable_by_p.get(p, ())
+        if S_t in M.tech_annual
         for S_i in M.processInputs[r, S_p, S_t, S_v]
         for S_o in M.ProcessOutputsByInput[r, S_p, S_t, S_v, S_i]
     )
@@ -535,12 +565,7 @@ def PeriodCost_rule(M: 'TemoaModel', p):
     # Flex flows are deducted from V_FlowOut, so it is NOT NEEDED to tax them again.  (See commodity balance constr)
     # Curtailment does not draw any inputs, so it seems logical that curtailed flows not be taxed either
 
-    base = [
-        (r, p, e, i, t, v, o)
-        for (r, e, i, t, v, o) in M.EmissionActivity
-        if (r, p, e) in M.CostEmission  # tightest filter first
-        and (r, p, t, v) in M.processInputs
-    ]
+    base = [(r, p, e, i, t, v, o) for (r, e, i, t, v, o) in M.CostEmission_by_p.get(p, ())]
 
     # then expand the base for the normal (season/tod) set and annual separately:
     normal = [
@@ -817,69 +842,50 @@ reduces computational burden.
     if c in M.commodity_demand:
         return Constraint.Skip
 
+    # the terms are the same in every time slice, so they are looked up once per (r, p, c)
+    template = M.commodityBalanceTemplates.get((r, p, c))
+    if template is None:
+        template = commodity_balance_template(M, r, p, c)
+        M.commodityBalanceTemplates[r, p, c] = template
+
     vflow_in_ToStorage = sum(
-        M.V_FlowIn[r, p, s, d, c, S_t, S_v, S_o]
-        for S_t, S_v in M.commodityDStreamProcess[r, p, c]
-        if S_t in M.tech_storage
-        for S_o in M.ProcessOutputsByInput[r, p, S_t, S_v, c]
+        M.V_FlowIn[r, p, s, d, c, S_t, S_v, S_o] for S_t, S_v, S_o in template.to_storage
     )
 
     # TODO:  This needs CURTAILMENT in the numerator
     vflow_in_ToNonStorage = sum(
-        M.V_FlowOut[r, p, s, d, c, S_t, S_v, S_o] / value(M.Efficiency[r, c, S_t, S_v, S_o])
-        for S_t, S_v in M.commodityDStreamProcess[r, p, c]
-        if S_t not in M.tech_storage and S_t not in M.tech_annual
-        for S_o in M.ProcessOutputsByInput[r, p, S_t, S_v, c]
+        M.V_FlowOut[r, p, s, d, c, S_t, S_v, S_o] / eff
+        for S_t, S_v, S_o, eff in template.to_non_storage
     )
 
     vflow_in_ToNonStorageAnnual = value(M.SegFrac[s, d]) * sum(
-        M.V_FlowOutAnnual[r, p, c, S_t, S_v, S_o] / value(M.Efficiency[r, c, S_t, S_v, S_o])
-        for S_t, S_v in M.commodityDStreamProcess[r, p, c]
-        if S_t not in M.tech_storage and S_t in M.tech_annual
-        for S_o in M.ProcessOutputsByInput[r, p, S_t, S_v, c]
+        M.V_FlowOutAnnual[r, p, c, S_t, S_v, S_o] / eff for S_t, S_v, S_o, eff in template.to_annual
     )
 
-    try:
-        vflow_out = sum(
-            M.V_FlowOut[r, p, s, d, S_i, S_t, S_v, c]
-            for S_t, S_v in M.commodityUStreamProcess[r, p, c]
-            for S_i in M.ProcessInputsByOutput[r, p, S_t, S_v, c]
-        )
-
-        # export of commodity c from region r to other regions
-        interregional_exports = 0
-        if (r, p, c) in M.exportRegions:
-            interregional_exports = sum(
-                M.V_FlowOut[r + '-' + reg, p, s, d, c, S_t, S_v, S_o]
-                / value(M.Efficiency[r + '-' + reg, c, S_t, S_v, S_o])
-                for reg, S_t, S_v, S_o in M.exportRegions[r, p, c]
-            )
+    vflow_out = sum(
+        M.V_FlowOut[r, p, s, d, S_i, S_t, S_v, c] for S_i, S_t, S_v in template.produced
+    )
 
-        # import of commodity c from other regions into region r
-        interregional_imports = 0
-        if (r, p, c) in M.importRegions:
-            interregional_imports = sum(
-                M.V_FlowOut[reg + '-' + r, p, s, d, S_i, S_t, S_v, c]
-                for reg, S_t, S_v, S_i in M.importRegions[r, p, c]
-            )
+    # export of commodity c from region r to other regions
+    interregional_exports = 0
+    if template.exports:
+        interregional_exports = sum(
+            M.V_FlowOut[r_reg, p, s, d, c, S_t, S_v, S_o] / eff
+            for r_reg, S_t, S_v, S_o, eff in template.exports
+        )
 
-        v_out_excess = 0
-        if c in M.flex_commodities:
-            v_out_excess = sum(
-                M.V_Flex[r, p, s, d, S_i, S_t, S_v, c]
-                for S_t, S_v in M.commodityUStreamProcess[r, p, c]
-                if S_t not in M.tech_storage and S_t not in M.tech_annual and S_t in M.tech_flex
-                for S_i in M.ProcessInputsByOutput[r, p, S_t, S_v, c]
-            )
+    # import of commodity c from other regions into region r
+    interregional_imports = 0
+    if template.imports:
+        interregional_imports = sum(
+            M.V_FlowOut[reg_r, p, s, d, S_i, S_t, S_v, c]
+            for reg_r, S_t, S_v, S_i in template.imports
+        )
 
-    except KeyError:
-        raise KeyError(
-            'The commodity "'
-            + str(c)
-            + '" can be produced \
-      by at least one technology in the tech_annual set and one technology \
-      not in the tech_annual set. All the producers of the commodity must \
-      either be in tech_annual or not in tech_annual'
+    v_out_excess = 0
+    if template.flex is not None:
+        v_out_excess = sum(
+            M.V_Flex[r, p, s, d, S_i, S_t, S_v, c] for S_i, S_t, S_v in template.flex
         )
 
     CommodityBalanceConstraintErrorCheck(
@@ -908,6 +914,79 @@ reduces computational burden.
     return expr
 
 
+class CommodityBalanceTemplate(NamedTuple):
+    """
+    The (time slice independent) terms of the CommodityBalance_Constraint for one (r, p, c).
+    The efficiencies are the divisors of the flows that consume the commodity.
+    """
+
+    to_storage: list[tuple]
+    """(t, v, o) of the storage flows in"""
+    to_non_storage: list[tuple]
+    """(t, v, o, efficiency) of the consuming flows out"""
+    to_annual: list[tuple]
+    """(t, v, o, efficiency) of the consuming annual flows out"""
+    produced: list[tuple]
+    """(i, t, v) of the producing flows out"""
+    exports: list[tuple]
+    """(r-reg, t, v, o, efficiency) of the exports"""
+    imports: list[tuple]
+    """(reg-r, t, v, i) of the imports"""
+    flex: list[tuple] | None
+    """(i, t, v) of the flex (excess) flows, or None if c is not a flex commodity"""
+
+
+def commodity_balance_template(M: 'TemoaModel', r, p, c) -> CommodityBalanceTemplate:
+    """
+    Gather the terms of the CommodityBalance_Constraint for (r, p, c), in the order they are
+    summed in the constraint
+    """
+    to_storage, to_non_storage, to_annual = [], [], []
+    for S_t, S_v in M.commodityDStreamProcess[r, p, c]:
+        if S_t in M.tech_storage:
+            to_storage.extend((S_t, S_v, S_o) for S_o in M.ProcessOutputsByInput[r, p, S_t, S_v, c])
+            continue
+        target = to_annual if S_t in M.tech_annual else to_non_storage
+        target.extend(
+            (S_t, S_v, S_o, value(M.Efficiency[r, c, S_t, S_v, S_o]))
+            for S_o in M.ProcessOutputsByInput[r, p, S_t, S_v, c]
+        )
+    try:
+        produced = [
+            (S_i, S_t, S_v)
+            for S_t, S_v in M.commodityUStreamProcess[r, p, c]
+            for S_i in M.ProcessInputsByOutput[r, p, S_t, S_v, c]
+        ]
+        exports = [
+            (r + '-' + reg, S_t, S_v, S_o, value(M.Efficiency[r + '-' + reg, c, S_t, S_v, S_o]))
+            for reg, S_t, S_v, S_o in M.exportRegions.get((r, p, c), ())
+        ]
+        imports = [
+            (reg + '-' + r, S_t, S_v, S_i)
+            for reg, S_t, S_v, S_i in M.importRegions.get((r, p, c), ())
+        ]
+        flex = None
+        if c in M.flex_commodities:
+            flex = [
+                (S_i, S_t, S_v)
+                for S_t, S_v in M.commodityUStreamProcess[r, p, c]
+                if S_t not in M.tech_storage and S_t not in M.tech_annual and S_t in M.tech_flex
+                for S_i in M.ProcessInputsByOutput[r, p, S_t, S_v, c]
+            ]
+    except KeyError:
+        raise KeyError(
+            'The commodity "'
+            + str(c)
+            + '" can be produced \
+      by at least one technology in the tech_annual set and one technology \
+      not in the tech_annual set. All the producers of the commodity must \
+      either be in tech_annual or not in tech_annual'
+        )
+    return CommodityBalanceTemplate(
+        to_storage, to_non_storage, to_annual, produced, exports, imports, flex
+    )
+
+
 def CommodityBalanceAnnual_Constraint(M: 'TemoaModel', r, p, c):
     r"""
 Similar to the CommodityBalance_Constraint, but this version applies only
@@ -38,6 +38,7 @@ import pyomo.opt
 
 from temoa.extensions.modeling_to_generate_alternatives.mga_sequencer import MgaSequencer
 from temoa.extensions.myopic.myopic_sequencer import MyopicSequencer
+from temoa.temoa_model import fast_writer
 from temoa.temoa_model.hybrid_loader import HybridLoader
 from temoa.temoa_model.model_checking.pricing_check import price_checker
 from temoa.temoa_model.run_actions import (
@@ -48,9 +49,17 @@ from temoa.temoa_model.run_actions import (
     check_python_version,
     check_database_version,
 )
+from temoa.temoa_model.solver_profiles import solver_profiles
+from temoa.temoa_model.solver_tuning import (
+    tune_solver,
+    tuning_grid,
+    tuning_table,
+    write_tuning_report,
+)
 from temoa.temoa_model.temoa_config import TemoaConfig
 from temoa.temoa_model.temoa_mode import TemoaMode
 from temoa.temoa_model.temoa_model import TemoaModel
+from temoa.temoa_model.time_slice_aggregation import aggregation_error_report
 from temoa.version_information import (
     DB_MAJOR_VERSION,
     MIN_DB_MINOR_VERSION,
@@ -70,6 +79,7 @@ class TemoaSequencer:
         output_path: str | Path,
         mode_override: TemoaMode | None = None,
         silent: bool = False,
+        use_cache: bool = True,
         **kwargs,
     ):
         """
@@ -79,6 +89,7 @@ class TemoaSequencer:
         :param mode_override: Optional override to execution mode.  If not provided,
         it will be read from config file
         :param silent:  boolean to indicate whether to silence run-time feedback
+        :param use_cache: if False, the data cache is bypassed, regardless of the config
         """
         self.config: TemoaConfig | None = None
         self.temoa_mode: TemoaMode
@@ -102,6 +113,7 @@ class TemoaSequencer:
 
         # for feedback to user
         self.silent = silent
+        self.use_cache = use_cache
 
         # for results catching for perfect_foresight, other modes / testing
         self.pf_results: pyomo.opt.SolverResults | None = None
@@ -115,6 +127,9 @@ class TemoaSequencer:
         self.config = TemoaConfig.build_config(
             config_file=self.config_file, output_path=self.output_path, silent=self.silent
         )
+        if not self.use_cache and self.config.data_cache:
+            self.config.data_cache = False
+            logger.info('Data cache bypassed by request')
 
         # Run some checks...
         good = True
@@ -169,20 +184,26 @@ class TemoaSequencer:
                     logger.info('Price check disabled for BUILD_ONLY')
                 con = sqlite3.connect(self.config.input_database)
                 hybrid_loader = HybridLoader(db_connection=con, config=self.config)
-                data_portal = hybrid_loader.load_data_portal(myopic_index=None)
-                instance = build_instance(data_portal, silent=self.config.silent)
+                data = hybrid_loader.create_data_dict(myopic_index=None)
+                instance = build_instance(
+                    data,
+                    silent=self.config.silent,
+                    profile_path=self.config.output_path if self.config.build_profile else None,
+                )
                 con.close()
                 return instance
 
             case TemoaMode.CHECK:
                 con = sqlite3.connect(self.config.input_database)
                 hybrid_loader = HybridLoader(db_connection=con, config=self.config)
-                data_portal = hybrid_loader.load_data_portal(myopic_index=None)
+                data = hybrid_loader.create_data_dict(myopic_index=None)
                 instance = build_instance(
-                    data_portal,
+                    data,
                     silent=self.config.silent,
                     keep_lp_file=self.config.save_lp_file,
                     lp_path=self.config.output_path,
+                    profile_path=self.config.output_path if self.config.build_profile else None,
+                    lp_export=self.config.lp_export,
                 )
                 # disregard what the config says about price_check and source_trace and just do it...
                 if self.config.price_check is False:
@@ -193,18 +214,36 @@ class TemoaSequencer:
             case TemoaMode.PERFECT_FORESIGHT:
                 con = sqlite3.connect(self.config.input_database)
                 hybrid_loader = HybridLoader(db_connection=con, config=self.config)
-                data_portal = hybrid_loader.load_data_portal(myopic_index=None)
+                data = hybrid_loader.create_data_dict(myopic_index=None)
                 instance = build_instance(
-                    data_portal,
+                    data,
                     silent=self.config.silent,
                     keep_lp_file=self.config.save_lp_file,
                     lp_path=self.config.output_path,
+                    check_domains=not self.config.source_trace,
+                    fast_writer=self.config.fast_writer,
+                    profile_path=self.config.output_path if self.config.build_profile else None,
+                    lp_export=self.config.lp_export,
                 )
                 if self.config.price_check:
                     price_checker(instance)
-                self.pf_solved_instance, self.pf_results = solve_instance(
-                    instance, self.config.solver_name, silent=self.config.silent
-                )
+                if self.config.fast_writer:
+                    self.pf_solved_instance, self.pf_results = fast_writer.solve_instance(
+                        instance,
+                        self.config.solver_name,
+                        silent=self.config.silent,
+                        solver_suffixes=['duals'] if self.config.save_duals else None,
+                        lp_path=self.config.output_path if self.config.save_lp_file else None,
+                        solver_options=self.config.solver_options,
+                        lp_export=self.config.lp_export,
+                    )
+                else:
+                    self.pf_solved_instance, self.pf_results = solve_instance(
+                        instance,
+                        self.config.solver_name,
+                        silent=self.config.silent,
+                        solver_options=self.config.solver_options,
+                    )
                 good_solve, msg = check_solve_status(self.pf_results)
                 if not good_solve:
                     logger.error('The solve result is reported as %s.  Aborting', msg)
@@ -215,8 +254,35 @@ class TemoaSequencer:
                     )
                     sys.exit(-1)
                 handle_results(self.pf_solved_instance, self.pf_results, self.config)
+                if (
+                    self.config.time_slice_aggregation
+                    and self.config.time_slice_aggregation['report']
+                ):
+                    self.report_aggregation_error(hybrid_loader)
+
+                con.close()
 
+            case TemoaMode.TUNE:
+                con = sqlite3.connect(self.config.input_database)
+                hybrid_loader = HybridLoader(db_connection=con, config=self.config)
+                data = hybrid_loader.create_data_dict(myopic_index=None)
                 con.close()
+                instance = build_instance(
+                    data,
+                    model_name=self.config.scenario,
+                    silent=self.config.silent,
+                    check_domains=not self.config.source_trace,
+                )
+                grid = tuning_grid(
+                    self.config.solver_name,
+                    solver_profiles(self.config.solver_name, self.config.solver_settings),
+                )
+                results = tune_solver(
+                    instance, self.config.solver_name, grid, reference=self.config.solver_profile
+                )
+                write_tuning_report(results, self.config.output_path)
+                if not self.config.silent:
+                    print(tuning_table(results))
 
             case TemoaMode.MYOPIC:
                 # create a myopic sequencer and shift control to it
@@ -228,3 +294,33 @@ class TemoaSequencer:
                 mga_sequencer.start()
             case _:
                 raise NotImplementedError('not yet built')
+
+    def report_aggregation_error(self, hybrid_loader: HybridLoader) -> None:
+        """
+        Solve the full resolution model (without writing results) and report the error of the
+        time slice aggregated solution against it
+        :param hybrid_loader: the loader used for the aggregated model
+        :return: None
+        """
+        logger.info('Solving the full resolution model for the time slice aggregation report')
+        data = hybrid_loader.create_data_dict(myopic_index=None, aggregate=False)
+        instance = build_instance(
+            data, silent=self.config.silent, check_domains=not self.config.source_trace
+        )
+        full_instance, results = solve_instance(
+            instance,
+            self.config.solver_name,
+            silent=self.config.silent,
+            solver_options=self.config.solver_options,
+        )
+        good_solve, msg = check_solve_status(results)
+        if not good_solve:
+            logger.warning(
+                'The full resolution model solve is reported as %s.  No aggregation report made',
+                msg,
+            )
+            return
+        report = aggregation_error_report(full_instance, self.pf_solved_instance)
+        with open(self.config.output_path / 'time_slice_aggregation_report.txt', 'w') as f:
+            f.write(report)
+        logger.info(report)
@@ -0,0 +1,355 @@
+"""
+Aggregation of the time slices of the model data into a smaller set of representative seasons
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+The seasons are clustered on their (time of day) profiles of capacity factors and demand
+distribution, so the time of day structure within a season is retained.  Each cluster is
+represented by its member season closest to the cluster centroid, and the data of the
+representative season is re-weighted to cover the cluster:
+
+  - SegFrac and DemandSpecificDistribution are summed over the members, so the year and the demand
+    are fully allocated, as before
+  - the capacity factors are the SegFrac-weighted average over the members
+  - the seasonal activity limits are summed over the members (a Max limit is dropped unless all
+    members are limited)
+"""
+
+from collections import defaultdict
+from logging import getLogger
+
+import numpy as np
+from pyomo.environ import value
+
+from temoa.temoa_model.temoa_model import TemoaModel
+
+logger = getLogger(__name__)
+
+AGGREGATION_METHODS = ('kmeans', 'hierarchical')
+
+
+def aggregate_seasons(
+    data: dict, seasons: int, method: str = 'kmeans', seed: int = 0
+) -> dict[str, list[str]]:
+    """
+    Reduce the seasons in the data to a number of representative seasons, in place
+    :param data: the data dictionary from the HybridLoader (before the index sets are made)
+    :param seasons: the number of representative seasons
+    :param method: the clustering method, one of AGGREGATION_METHODS
+    :param seed: the seed for the (k-means) initialization
+    :return: the clusters {representative season: [member seasons]}
+    """
+    if method not in AGGREGATION_METHODS:
+        raise ValueError(f'time slice aggregation method must be one of {AGGREGATION_METHODS}')
+    all_seasons = list(data['time_season'])
+    if seasons >= len(all_seasons):
+        logger.info(
+            'Time slice aggregation to %d seasons requested for %d seasons.  No aggregation done',
+            seasons,
+            len(all_seasons),
+        )
+        return {s: [s] for s in all_seasons}
+
+    features, weights = season_features(data)
+    if method == 'kmeans':
+        labels = kmeans(features, weights, seasons, seed)
+    else:
+        labels = hierarchical(features, weights, seasons)
+    clusters = _representatives(all_seasons, features, weights, labels)
+    _aggregate_data(data, clusters)
+    logger.info(
+        'Aggregated %d seasons to %d representative seasons by %s: %s',
+        len(all_seasons),
+        len(clusters),
+        method,
+        clusters,
+    )
+    return clusters
+
+
+def season_features(data: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Make the (standardized) feature vectors of the seasons.  Each season is described by the time
+    of day profile of every capacity factor series and demand distribution in the data.
+    :param data: the data dictionary
+    :return: tuple of (features [season, feature], season weights (fraction of the year))
+    """
+    seasons = {s: i for i, s in enumerate(data['time_season'])}
+    tods = {d: i for i, d in enumerate(data['time_of_day'])}
+    shape = len(seasons), len(tods)
+    seg = np.zeros(shape)
+    for (s, d), frac in data['SegFrac'].items():
+        seg[seasons[s], tods[d]] = frac
+
+    cf_tech = defaultdict(lambda: np.ones(shape))
+    for (r, s, d, t), factor in data.get('CapacityFactorTech', {}).items():
+        cf_tech[r, t][seasons[s], tods[d]] = factor
+    cf_process = {}
+    for (r, s, d, t, v), factor in data.get('CapacityFactorProcess', {}).items():
+        if (r, t, v) not in cf_process:
+            # the process falls back to the tech factor where it has no data
+            cf_process[r, t, v] = cf_tech[r, t].copy() if (r, t) in cf_tech else np.ones(shape)
+        cf_process[r, t, v][seasons[s], tods[d]] = factor
+    # the demand distribution is taken as an intensity (per unit of time)
+    demand = defaultdict(lambda: np.zeros(shape))
+    for (r, s, d, dem), dds in data.get('DemandSpecificDistribution', {}).items():
+        if seg[seasons[s], tods[d]] > 0:
+            demand[r, dem][seasons[s], tods[d]] = dds / seg[seasons[s], tods[d]]
+
+    series = [*cf_tech.values(), *cf_process.values(), *demand.values()]
+    if not series:
+        features = seg.copy()
+    else:
+        features = np.hstack(series)
+    std = features.std(axis=0)
+    std[std == 0] = 1
+    features = (features - features.mean(axis=0)) / std
+    return features, seg.sum(axis=1)
+
+
+def kmeans(
+    features: np.ndarray, weights: np.ndarray, k: int, seed: int = 0, max_iter: int = 100
+) -> np.ndarray:
+    """
+    Weighted k-means (Lloyd's algorithm with k-means++ initialization)
+    :param features: the points [n, features]
+    :param weights: the weight of each point
+    :param k: the number of clusters
+    :param seed: the seed for the initialization
+    :param max_iter: the limit on iterations
+    :return: the cluster label of each point
+    """
+    rng = np.random.default_rng(seed)
+    n = len(features)
+    centers = [features[rng.integers(n)]]
+    for _ in range(1, k):
+        dist = ((features[:, None, :] - np.array(centers)[None, :, :]) ** 2).sum(-1).min(1)
+        prob = dist * weights
+        if prob.sum() == 0:
+            centers.append(features[rng.integers(n)])
+        else:
+            centers.append(features[rng.choice(n, p=prob / prob.sum())])
+    centers = np.array(centers)
+
+    labels = np.full(n, -1)
+    for _ in range(max_iter):
+        dist = ((features[:, None, :] - centers[None, :, :]) ** 2).sum(-1)
+        new_labels = dist.argmin(1)
+        # re-seed any empty cluster with the point farthest from its center
+        for j in set(range(k)) - set(new_labels.tolist()):
+            far = dist[np.arange(n), new_labels].argmax()
+            new_labels[far] = j
+            dist[far] = 0
+        if (new_labels == labels).all():
+            break
+        labels = new_labels
+        for j in range(k):
+            members = labels == j
+            w = weights[members]
+            w = w if w.sum() > 0 else np.ones_like(w)
+            centers[j] = np.average(features[members], axis=0, weights=w)
+    return labels
+
+
+def hierarchical(features: np.ndarray, weights: np.ndarray, k: int) -> np.ndarray:
+    """
+    Agglomerative clustering by Ward's (weighted) criterion, using the Lance-Williams update
+    :param features: the points [n, features]
+    :param weights: the weight of each point
+    :param k: the number of clusters
+    :return: the cluster label of each point
+    """
+    n = len(features)
+    w = np.where(weights > 0, weights, 1e-9)
+    # the Ward merge cost of each pair of points
+    sq = ((features[:, None, :] - features[None, :, :]) ** 2).sum(-1)
+    cost = (w[:, None] * w[None, :]) / (w[:, None] + w[None, :]) * sq
+    np.fill_diagonal(cost, np.inf)
+    members = {i: [i] for i in range(n)}
+    while len(members) > k:
+        i, j = np.unravel_index(cost.argmin(), cost.shape)
+        i, j = min(i, j), max(i, j)
+        wi, wj = w[i], w[j]
+        # Lance-Williams update for Ward's method
+        cost[i, :] = ((wi + w) * cost[i, :] + (wj + w) * cost[j, :] - w * cost[i, j]) / (
+            wi + wj + w
+        )
+        cost[:, i] = cost[i, :]
+        cost[i, i] = np.inf
+        cost[j, :] = cost[:, j] = np.inf
+        w[i] = wi + wj
+        members[i].extend(members.pop(j))
+    labels = np.empty(n, dtype=int)
+    for label, idx in enumerate(members.values()):
+        labels[idx] = label
+    return labels
+
+
+def _representatives(
+    seasons: list, features: np.ndarray, weights: np.ndarray, labels: np.ndarray
+) -> dict[str, list[str]]:
+    """pick the member closest to the (weighted) centroid of each cluster, in season order"""
+    clusters = {}
+    for label in np.unique(labels):
+        idx = np.flatnonzero(labels == label)
+        w = weights[idx] if weights[idx].sum() > 0 else None
+        centroid = np.average(features[idx], axis=0, weights=w)
+        rep = idx[((features[idx] - centroid) ** 2).sum(1).argmin()]
+        clusters[rep] = [seasons[i] for i in idx]
+    return {seasons[rep]: clusters[rep] for rep in sorted(clusters)}
+
+
+def _aggregate_data(data: dict, clusters: dict[str, list[str]]) -> None:
+    """re-weight the data of the representative seasons and remove the others"""
+    rep_of = {s: rep for rep, members in clusters.items() for s in members}
+    seg = data['SegFrac']
+    new_seg = defaultdict(float)
+    for (s, d), frac in seg.items():
+        new_seg[rep_of[s], d] += frac
+
+    # demand distribution:  summed over the members
+    if 'DemandSpecificDistribution' in data:
+        dsd = defaultdict(float)
+        for (r, s, d, dem), dds in data['DemandSpecificDistribution'].items():
+            dsd[r, rep_of[s], d, dem] += dds
+        data['DemandSpecificDistribution'] = dict(dsd)
+
+    # capacity factors:  SegFrac-weighted average over the members (with the default values
+    # used where a member has no data)
+    tech_factors = data.get('CapacityFactorTech', {})
+    process_factors = data.get('CapacityFactorProcess', {})
+    order = _key_order(data)
+    if tech_factors:
+        keys = sorted({(r, rep_of[s], d, t) for r, s, d, t in tech_factors}, key=order)
+        data['CapacityFactorTech'] = {
+            (r, rep, d, t): _weighted_average(
+                seg, d, clusters[rep], [tech_factors.get((r, s, d, t), 1) for s in clusters[rep]]
+            )
+            for r, rep, d, t in keys
+        }
+    if process_factors:
+        keys = sorted({(r, rep_of[s], d, t, v) for r, s, d, t, v in process_factors}, key=order)
+        data['CapacityFactorProcess'] = {
+            (r, rep, d, t, v): _weighted_average(
+                seg,
+                d,
+                clusters[rep],
+                [
+                    process_factors.get((r, s, d, t, v), tech_factors.get((r, s, d, t), 1))
+                    for s in clusters[rep]
+                ],
+            )
+            for r, rep, d, t, v in keys
+        }
+
+    # seasonal activity limits:  summed over the members
+    for name in ('MaxSeasonalActivity', 'MinSeasonalActivity'):
+        if not data.get(name):
+            continue
+        limits = defaultdict(float)
+        counts = defaultdict(int)
+        for (r, p, s, t), limit in data[name].items():
+            limits[r, p, rep_of[s], t] += limit
+            counts[r, p, rep_of[s], t] += 1
+        if name == 'MaxSeasonalActivity':
+            # a member without a limit is unlimited, so the cluster is too
+            limits = {k: v for k, v in limits.items() if counts[k] == len(clusters[k[2]])}
+        data[name] = dict(limits)
+
+    data['SegFrac'] = dict(new_seg)
+    data['time_season'] = [s for s in data['time_season'] if s in clusters]
+
+
+def _weighted_average(seg: dict, d, members: list, factors: list[float]) -> float:
+    """the SegFrac-weighted average of the factors of the member seasons at time of day d"""
+    fracs = [seg.get((s, d), 0) for s in members]
+    total = sum(fracs)
+    if total <= 0:
+        return factors[0]
+    return sum(frac * factor for frac, factor in zip(fracs, factors)) / total
+
+
+def _key_order(data: dict):
+    """sort keys of (r, s, d, ...) by region, then season and time of day in sequence"""
+    seasons = {s: i for i, s in enumerate(data['time_season'])}
+    tods = {d: i for i, d in enumerate(data['time_of_day'])}
+    return lambda k: (k[0], seasons[k[1]], tods[k[2]], k[3:])
+
+
+def aggregation_error_report(full: TemoaModel, aggregated: TemoaModel) -> str:
+    """
+    Compare the solution of an aggregated model to the full resolution model
+    :param full: the solved full resolution model
+    :param aggregated: the solved aggregated model
+    :return: the report
+    """
+
+    def capacity(M: TemoaModel) -> dict[tuple, float]:
+        res = defaultdict(float)
+        for (r, p, t), var in M.V_CapacityAvailableByPeriodAndTech.items():
+            res[r, p, t] += value(var) or 0
+        return res
+
+    def rel(a: float, b: float) -> str:
+        return f'{(b - a) / abs(a):+.2%}' if a else 'n/a'
+
+    full_cost, agg_cost = value(full.TotalCost), value(aggregated.TotalCost)
+    lines = [
+        'Time slice aggregation error (aggregated vs. full resolution)\n',
+        f'Seasons: {len(aggregated.time_season)} of {len(full.time_season)}\n\n',
+        '{:<40s} {:>16s} {:>16s} {:>10s}\n'.format('', 'Full', 'Aggregated', 'Error'),
+        '{:<40s} {:>16.2f} {:>16.2f} {:>10s}\n'.format(
+            'Total cost', full_cost, agg_cost, rel(full_cost, agg_cost)
+        ),
+    ]
+    full_cap, agg_cap = capacity(full), capacity(aggregated)
+    keys = sorted(full_cap.keys() | agg_cap.keys())
+    total_full = sum(full_cap.values())
+    total_diff = sum(abs(full_cap.get(k, 0) - agg_cap.get(k, 0)) for k in keys)
+    lines.append(
+        '{:<40s} {:>16.2f} {:>16.2f} {:>10s}\n'.format(
+            'Capacity (total)',
+            total_full,
+            sum(agg_cap.values()),
+            rel(total_full, sum(agg_cap.values())),
+        )
+    )
+    lines.append(
+        '{:<40s} {:>16s} {:>16.2f} {:>10s}\n\n'.format(
+            'Capacity (sum of absolute differences)',
+            '',
+            total_diff,
+            f'{total_diff / total_full:.2%}' if total_full else 'n/a',
+        )
+    )
+    lines.append('Capacity by region, period and tech\n')
+    for r, p, t in keys:
+        a, b = full_cap.get((r, p, t), 0), agg_cap.get((r, p, t), 0)
+        if abs(a) < 1e-9 and abs(b) < 1e-9:
+            continue
+        lines.append(
+            '{:<40s} {:>16.4f} {:>16.4f} {:>10s}\n'.format(f'{r}, {p}, {t}', a, b, rel(a, b))
+        )
+    return ''.join(lines)
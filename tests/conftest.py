@@ -31,6 +31,7 @@ received this license file.  If not, see <http://www.gnu.org/licenses/>.
 import logging
 import os
 import sqlite3
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
@@ -38,6 +39,8 @@ import pytest
 from pyomo.opt import SolverResults
 
 from definitions import PROJECT_ROOT
+from temoa.temoa_model.hybrid_loader import HybridLoader
+from temoa.temoa_model.temoa_config import TemoaConfig
 from temoa.temoa_model.temoa_model import TemoaModel
 from temoa.temoa_model.temoa_sequencer import TemoaSequencer
 
@@ -109,3 +112,30 @@ def system_test_run(
     res = sequencer.pf_results
     mdl = sequencer.pf_solved_instance
     return data_name, res, mdl, sequencer
+
+
+@pytest.fixture(scope='session')
+def load_model_data(tmp_path_factory) -> Callable[..., tuple[TemoaConfig, dict]]:
+    """
+    a loader for the model data of a testing config, to be called with the name of the config
+    file, an optional output path and any config settings to apply before the load:
+
+        config, data = load_model_data('config_utopia.toml', source_trace=True)
+    """
+
+    def load(
+        filename: str, output_path: Path | None = None, **settings
+    ) -> tuple[TemoaConfig, dict]:
+        config = TemoaConfig.build_config(
+            config_file=Path(PROJECT_ROOT, 'tests', 'testing_configs', filename),
+            output_path=output_path or tmp_path_factory.mktemp('model_data'),
+            silent=True,
+        )
+        for attr, setting in settings.items():
+            setattr(config, attr, setting)
+        con = sqlite3.connect(config.input_database)
+        data = HybridLoader(db_connection=con, config=config).create_data_dict()
+        con.close()
+        return config, data
+
+    return load
@@ -0,0 +1,75 @@
+"""
+Tests for the background writer of the output db
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from temoa.temoa_model.background_writer import BackgroundWriter
+
+
+def test_background_writer(tmp_path):
+    """jobs run in order on the writer thread, and a failure stops the writes and is raised"""
+    db = tmp_path / 'out.sqlite'
+    con = sqlite3.connect(db)
+    con.execute('CREATE TABLE T (n INTEGER)')
+    con.commit()
+    writer = BackgroundWriter(db, max_pending=1)
+    threads = set()
+
+    def insert(n):
+        def job(con):
+            threads.add(threading.current_thread().name)
+            con.execute('INSERT INTO T VALUES (?)', (n,))
+            con.commit()
+
+        return job
+
+    for n in range(5):
+        writer.submit(insert(n))
+        assert len(writer._pending) <= 1, 'a submit should wait on the queued job'
+    writer.flush()
+    assert [n for (n,) in con.execute('SELECT n FROM T')] == list(range(5))
+    assert len(threads) == 1 and threading.current_thread().name not in threads
+
+    def fail(con):
+        con.execute('INSERT INTO T VALUES (99)')
+        con.execute('INSERT INTO Missing VALUES (1)')
+
+    writer.submit(fail)
+    with pytest.raises(RuntimeError):
+        # the failure is raised at the next submit (if the job is done) or at the flush
+        writer.submit(insert(5))
+        writer.flush()
+    writer.close()
+    # the failed job is rolled back and no later job is run
+    assert [n for (n,) in con.execute('SELECT n FROM T')] == list(range(5))
+    con.close()
@@ -0,0 +1,56 @@
+"""
+Tests for the model build profiler
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import json
+
+from pyomo.core import Constraint, Var
+
+from temoa.temoa_model.run_actions import build_instance
+
+
+def test_profiled_build(load_model_data, tmp_path):
+    """a profiled build should match a regular build and report on every component"""
+    _, data = load_model_data('config_utopia.toml')
+    regular = build_instance(data, silent=True)
+    profiled = build_instance(data, silent=True, profile_path=tmp_path / 'profile')
+
+    for ctype in (Var, Constraint):
+        assert [(c.name, len(c)) for c in regular.component_objects(ctype)] == [
+            (c.name, len(c)) for c in profiled.component_objects(ctype)
+        ]
+
+    with open(tmp_path / 'profile' / 'build_profile.json') as f:
+        profiles = {prof['name']: prof for prof in json.load(f)}
+    assert (tmp_path / 'profile' / 'build_profile.txt').is_file()
+    for name in ('time_optimize', 'Efficiency', 'V_FlowOut', 'CommodityBalanceConstraint'):
+        assert name in profiles, f'{name} should be profiled'
+    assert profiles['V_FlowOut']['indices'] == len(regular.V_FlowOut)
+    assert profiles['Efficiency']['ctype'] == 'Param'
+    assert all(prof['seconds'] >= 0 for prof in profiles.values())
@@ -0,0 +1,145 @@
+"""
+Tests for the on-disk data cache
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import os
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model import hybrid_loader
+from temoa.temoa_model.data_cache import DataCache
+from temoa.temoa_model.hybrid_loader import HybridLoader
+from temoa.temoa_model.temoa_config import TemoaConfig
+
+
+@pytest.fixture()
+def utopia(tmp_path) -> tuple[TemoaConfig, Path]:
+    """a config pointing at a private copy of the utopia database"""
+    config = TemoaConfig.build_config(
+        config_file=Path(PROJECT_ROOT, 'tests', 'testing_configs', 'config_utopia.toml'),
+        output_path=tmp_path,
+        silent=True,
+    )
+    db_copy = tmp_path / 'utopia.sqlite'
+    shutil.copy(config.input_database, db_copy)
+    return config, db_copy
+
+
+def test_key_tracks_data(utopia):
+    """the key should change with the input data and the load settings, but not the outputs"""
+    config, db = utopia
+    con = sqlite3.connect(db)
+    key = DataCache.make_key(con, config)
+    assert key == DataCache.make_key(con, config), 'key should be repeatable'
+
+    con.execute("INSERT INTO OutputObjective VALUES ('nonsense', 'total_cost', 1.0)")
+    assert key == DataCache.make_key(con, config), 'output tables should not affect the key'
+
+    config.source_trace = not config.source_trace
+    assert key != DataCache.make_key(con, config), 'source trace should affect the key'
+    config.source_trace = not config.source_trace
+
+    con.execute("UPDATE CostVariable SET cost = cost + 1 WHERE tech = 'E01'")
+    assert key != DataCache.make_key(con, config), 'data changes should affect the key'
+    con.close()
+
+
+def test_lru_eviction(tmp_path):
+    cache = DataCache(cache_dir=tmp_path, max_size_mb=0.01)  # ~10 KB
+    payload = {'param': {(1,): 'x' * 4000}}  # room for 2 in the cache
+    for key in ('a', 'b'):
+        cache.put(key, payload)
+    # make 'b' the least recently used
+    os.utime(tmp_path / 'b.pkl', (0, 0))
+    cache.put('c', payload)
+    assert cache.get('b') is None, 'least recently used entry should be evicted'
+    assert cache.get('a') == payload
+    assert cache.get('c') == payload
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = DataCache(cache_dir=tmp_path)
+    (tmp_path / 'bad.pkl').write_bytes(b'not a pickle')
+    assert cache.get('bad') is None
+    assert not (tmp_path / 'bad.pkl').exists()
+
+
+def test_loader_uses_cache(utopia, load_model_data, tmp_path, monkeypatch):
+    """a second load of the same data should come from the cache and match the original"""
+    _, db = utopia
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(
+        hybrid_loader, 'DataCache', lambda max_size_mb: DataCache(cache_dir, max_size_mb)
+    )
+    config, loaded = load_model_data(
+        'config_utopia.toml', input_database=db, source_trace=True, data_cache=True
+    )
+    assert len(list(cache_dir.glob('*.pkl'))) == 1
+
+    con = sqlite3.connect(db)
+    loader = HybridLoader(db_connection=con, config=config)
+    cached = loader.create_data_dict()
+    assert loader.manager is None, 'source trace should not run when the cache is used'
+    assert cached == loaded
+    con.close()
+
+
+def test_cache_hit_outputs(utopia, load_model_data, tmp_path, monkeypatch, caplog):
+    """a load from the cache should still write the presolve report and note the skipped trace"""
+    _, db = utopia
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(
+        hybrid_loader, 'DataCache', lambda max_size_mb: DataCache(cache_dir, max_size_mb)
+    )
+    first = tmp_path / 'first'
+    first.mkdir()
+    config, loaded = load_model_data(
+        'config_utopia.toml',
+        first,
+        input_database=db,
+        source_trace=True,
+        presolve=True,
+        data_cache=True,
+    )
+    assert not any('source trace was not run' in rec.message for rec in caplog.records)
+
+    second = tmp_path / 'second'
+    second.mkdir()
+    config.output_path = second
+    con = sqlite3.connect(db)
+    cached = HybridLoader(db_connection=con, config=config).create_data_dict()
+    con.close()
+    assert cached == loaded
+    report = (second / 'presolve_report.txt').read_text()
+    assert report == (first / 'presolve_report.txt').read_text()
+    assert any('source trace was not run' in rec.message for rec in caplog.records)
@@ -25,10 +25,17 @@ https://westernspark.us
 Created on:  4/25/24
 
 """
+import logging
+import re
+import time
+from operator import itemgetter
+
 import pytest
 
 from temoa.temoa_model.model_checking.element_checker import ViableSet, filter_elements
 
+logger = logging.getLogger(__name__)
+
 params = [
     {
         'name': 'group 1',
@@ -163,3 +170,80 @@ def test_dimension_measurement():
 
     elements = []
     assert ViableSet(elements).dim == 0
+
+
+def test_cached_members():
+    vs = ViableSet(['a', 'b'])
+    assert vs.members is vs.members, 'members should be cached'
+    vs.member_tuples = ['c']
+    assert vs.members == {'c'}, 'cache should be refreshed when the elements change'
+
+
+def _legacy_filter_elements(values, validation, value_locations=(0,)):
+    """the prior, row-by-row implementation of filter_elements, for comparison"""
+    locs = None
+    if validation.val_exceptions:
+        locs = list(value_locations)
+        locs.remove(validation.exception_loc)
+    res = []
+    for item in values:
+        element = itemgetter(*value_locations)(item)
+        if not isinstance(element, tuple):
+            element = (element,)
+        if element in validation.member_tuples:
+            res.append(item)
+        elif validation.val_exceptions:
+            if (
+                validation.non_excepted_items
+                and itemgetter(*locs)(item) not in validation.non_excepted_items
+            ):
+                continue
+            for val_exception in validation.val_exceptions:
+                if re.search(val_exception, str(item[validation.exception_loc])):
+                    res.append(item)
+                    break
+    return res
+
+
+def _param_sized_data() -> tuple[list[tuple], ViableSet, tuple]:
+    """a param-sized data set with a good share of region groups and misses"""
+    regions = ['R1', 'R2', 'R3', 'R1+R2', 'R2+R3', 'global', 'other']
+    techs = [f'T{i}' for i in range(50)]
+    vintages = list(range(2000, 2050, 5))
+    viable = ViableSet(
+        elements=[(r, t, v) for r in regions[:3] for t in techs[:40] for v in vintages[:8]],
+        exception_loc=0,
+        exception_vals=ViableSet.REGION_REGEXES,
+    )
+    values = [
+        (r, p, t, v, 1.0) for r in regions for p in (2020, 2030) for t in techs for v in vintages
+    ]
+    return values, viable, (0, 2, 3)
+
+
+def test_filter_elements_against_legacy():
+    """the batch filter should match the legacy row-by-row filter"""
+    values, viable, locs = _param_sized_data()
+    assert filter_elements(values, viable, locs) == _legacy_filter_elements(values, viable, locs)
+
+
+def test_filter_elements_benchmark():
+    """
+    micro-benchmark of the batch filter against the legacy row-by-row filter.  The timings are
+    logged (see testing_log/testing.log) and not asserted, as they vary with the machine load
+    """
+    values, viable, locs = _param_sized_data()
+
+    def best_time(func) -> float:
+        times = []
+        for _ in range(5):
+            tic = time.perf_counter()
+            func(values, viable, locs)
+            times.append(time.perf_counter() - tic)
+        return min(times)
+
+    legacy = best_time(_legacy_filter_elements)
+    batch = best_time(filter_elements)
+    logger.info(
+        'filter_elements on %d rows:  legacy %0.4f s, batch %0.4f s', len(values), legacy, batch
+    )
@@ -0,0 +1,94 @@
+"""
+Tests for the fast (matrix) writer
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import pytest
+from pyomo.environ import check_optimal_termination, value
+
+from temoa.temoa_model import fast_writer
+from temoa.temoa_model.run_actions import build_instance, solve_instance
+
+params = [
+    ('utopia', 'config_utopia.toml'),
+    ('test_system', 'config_test_system.toml'),
+    ('mediumville', 'config_mediumville.toml'),
+    ('storageville', 'config_storageville.toml'),
+]
+
+
+@pytest.mark.parametrize(
+    argnames='data_name config_file'.split(), argvalues=params, ids=[t[0] for t in params]
+)
+def test_objective_matches_pyomo(data_name, config_file, load_model_data, tmp_path):
+    """the fast writer should reach the same objective value as the pyomo path"""
+    _, data = load_model_data(config_file)
+    instance, results = solve_instance(build_instance(data, silent=True), 'cbc', silent=True)
+    assert check_optimal_termination(results)
+
+    fast_instance, fast_results = fast_writer.solve_instance(
+        build_instance(data, silent=True, fast_writer=True),
+        'cbc',
+        silent=True,
+        solver_suffixes=['duals'],
+        lp_path=tmp_path,
+    )
+    assert check_optimal_termination(fast_results)
+    assert value(fast_instance.TotalCost) == pytest.approx(value(instance.TotalCost), rel=1e-6)
+    assert fast_results['Solution'].Constraint, 'duals should be captured in the results'
+    assert (tmp_path / 'model.mps').is_file()
+
+
+def test_rows_match_pyomo(load_model_data):
+    """the rows generated directly should match those compiled from the pyomo constraints"""
+    _, data = load_model_data('config_utopia.toml')
+    # hold the instances so that the variables stay attached (named)
+    instance = build_instance(data, silent=True)
+    fast_instance = build_instance(data, silent=True, fast_writer=True)
+    pyomo_lp = fast_writer.LinearProgram()
+    fast_writer._add_pyomo_constraints(instance, pyomo_lp)
+    fast_lp = fast_writer.compile_instance(fast_instance)
+
+    def rows(lp: fast_writer.LinearProgram) -> dict[str, tuple]:
+        indptr, indices, data = lp.csr()
+        res = {}
+        for i, name in enumerate(lp.row_names):
+            terms = {
+                lp.columns[j].name: coef
+                for j, coef in zip(
+                    indices[indptr[i] : indptr[i + 1]], data[indptr[i] : indptr[i + 1]]
+                )
+            }
+            res[name] = (lp.row_lb[i], lp.row_ub[i], terms)
+        return res
+
+    pyomo_rows, fast_rows = rows(pyomo_lp), rows(fast_lp)
+    assert pyomo_rows.keys() == fast_rows.keys()
+    for name, (lb, ub, terms) in fast_rows.items():
+        assert (lb, ub) == pyomo_rows[name][:2], f'{name} bounds do not match'
+        assert terms == pytest.approx(pyomo_rows[name][2]), f'{name} terms do not match'
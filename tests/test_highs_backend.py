@@ -0,0 +1,132 @@
+"""
+Tests for the in-memory HiGHS solve
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pyomo.environ import Constraint, value
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model import fast_writer
+from temoa.temoa_model.highs_backend import solve_lp
+from temoa.temoa_model.run_actions import build_instance, solve_instance
+from temoa.temoa_model.temoa_sequencer import TemoaSequencer
+
+
+@pytest.fixture(scope='module')
+def utopia_data(load_model_data):
+    _, data = load_model_data('config_utopia.toml')
+    return data
+
+
+def test_solve_in_memory(utopia_data):
+    """the in-memory solve (of both builds) should match the pyomo cbc solve, with the duals"""
+    reference, _ = solve_instance(build_instance(utopia_data, silent=True), 'cbc', silent=True)
+    instance, results = solve_instance(
+        build_instance(utopia_data, silent=True), 'highs', silent=True, solver_suffixes=['duals']
+    )
+    assert value(instance.TotalCost) == pytest.approx(value(reference.TotalCost), rel=1e-6)
+    assert value(instance.V_Capacity[next(iter(instance.V_Capacity))]) is not None
+    duals = results['Solution'].Constraint
+    assert len(duals) == sum(1 for _ in instance.component_data_objects(Constraint))
+
+    fast_instance, fast_results = fast_writer.solve_instance(
+        build_instance(utopia_data, silent=True, fast_writer=True),
+        'highs',
+        silent=True,
+        solver_suffixes=['duals'],
+    )
+    assert value(fast_instance.TotalCost) == pytest.approx(value(reference.TotalCost), rel=1e-6)
+    assert (
+        'CommodityBalanceConstraint[utopia,1990,winter,day,ELC]'
+        in fast_results['Solution'].Constraint
+    )
+
+
+def test_solution_arrays(utopia_data):
+    """the solution comes back as arrays, and a dual is the change in objective per unit of rhs"""
+    lp = fast_writer.compile_model(build_instance(utopia_data, silent=True))
+    solution = solve_lp(lp, silent=True)
+    assert solution.optimal
+    assert isinstance(solution.primal, np.ndarray) and solution.primal.shape == (lp.num_cols,)
+    assert isinstance(solution.dual, np.ndarray) and solution.dual.shape == (lp.num_rows,)
+
+    # reduced costs:  c - A'y
+    indptr, indices, data = lp.csr()
+    c = np.zeros(lp.num_cols)
+    c[list(lp.objective)] = list(lp.objective.values())
+    a_ty = np.zeros(lp.num_cols)
+    np.add.at(a_ty, indices, data * np.repeat(solution.dual, np.diff(indptr)))
+    assert np.allclose(c - a_ty, solution.reduced_costs, atol=1e-6)
+
+    # shift the (equality) balance of electricity by a little and compare the objective change
+    i = lp.row_names.index('CommodityBalanceConstraint[utopia,1990,winter,day,ELC]')
+    eps = 1e-3
+    lp.row_lb[i] += eps
+    lp.row_ub[i] += eps
+    shifted = solve_lp(lp, silent=True)
+    assert (shifted.objective - solution.objective) / eps == pytest.approx(
+        solution.dual[i], rel=1e-4
+    )
+
+    with pytest.raises(ValueError):
+        solve_lp(lp, {'not_an_option': 1}, silent=True)
+
+
+def test_sequencer_saves_duals(tmp_path):
+    """a perfect foresight run with HiGHS and save_duals should write the duals"""
+    db = tmp_path / 'utopia.sqlite'
+    shutil.copy(Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'utopia.sqlite'), db)
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text(
+        f'scenario = "duals"\n'
+        f'scenario_mode = "perfect_foresight"\n'
+        f'input_database = "{db.as_posix()}"\n'
+        f'output_database = "{db.as_posix()}"\n'
+        f'solver_name = "highs"\n'
+        f'save_excel = false\n'
+        f'save_duals = true\n'
+    )
+    sequencer = TemoaSequencer(config_file=config_file, output_path=tmp_path, silent=True)
+    sequencer.start()
+
+    con = sqlite3.connect(db)
+    duals = dict(
+        con.execute(
+            "SELECT constraint_name, dual FROM OutputDualVariable WHERE scenario = 'duals'"
+        ).fetchall()
+    )
+    con.close()
+    rows = sum(1 for _ in sequencer.pf_solved_instance.component_data_objects(Constraint))
+    assert len(duals) == rows
+    assert 'CommodityBalanceConstraint[utopia,1990,winter,day,ELC]' in duals
@@ -0,0 +1,182 @@
+"""
+Tests for the HybridLoader
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model.hybrid_loader import HybridLoader, DeferredQuery
+from temoa.temoa_model.model_checking.element_checker import ViableSet, filter_elements
+
+# the source-traced (filtered) data sets
+params = [
+    ('utopia', 'config_utopia.toml'),
+    ('test_system', 'config_test_system.toml'),
+]
+
+
+@pytest.mark.parametrize(
+    argnames='data_name config_file'.split(), argvalues=params, ids=[t[0] for t in params]
+)
+def test_sql_filtering_matches_python_filtering(data_name, config_file, load_model_data):
+    """
+    The data screened in the database should be identical (contents and order) to the data
+    screened in python
+    """
+    _, python_screened = load_model_data(config_file, source_trace=True, sql_filtering=False)
+    _, sql_screened = load_model_data(config_file, source_trace=True, sql_filtering=True)
+    # an empty result may be omitted, rather than loaded empty
+    python_screened = {k: v for k, v in python_screened.items() if v}
+    sql_screened = {k: v for k, v in sql_screened.items() if v}
+    assert python_screened.keys() == sql_screened.keys()
+    for name, values in python_screened.items():
+        assert values == sql_screened[name], f'{name} does not match'
+        assert list(values) == list(sql_screened[name]), f'{name} is out of order'
+
+
+def test_screening_tables_are_detached(load_model_data):
+    """the viable sets screened in the database should not outlive the load on the connection"""
+    config, _ = load_model_data('config_utopia.toml', source_trace=True, sql_filtering=True)
+    con = sqlite3.connect(config.input_database)
+    HybridLoader(db_connection=con, config=config).create_data_dict()
+    databases = {name for _, name, _ in con.execute('PRAGMA database_list')}
+    con.close()
+    assert 'viable' not in databases
+
+
+@pytest.mark.parametrize(
+    argnames='data_name config_file'.split(), argvalues=params, ids=[t[0] for t in params]
+)
+@pytest.mark.parametrize('sql_filtering', [False, True], ids=['python', 'sql'])
+def test_parallel_reads_match_sequential_reads(
+    data_name, config_file, sql_filtering, load_model_data
+):
+    """
+    The data read on a pool of reader threads should be identical (contents and order) to the
+    data read on the main connection
+    """
+    settings = {'source_trace': True, 'sql_filtering': sql_filtering}
+    _, sequential = load_model_data(config_file, reader_threads=1, **settings)
+    _, parallel = load_model_data(config_file, reader_threads=4, **settings)
+    assert sequential.keys() == parallel.keys()
+    for name, values in sequential.items():
+        assert list(values) == list(parallel[name]), f'{name} does not match'
+        if isinstance(values, dict):
+            assert list(values.values()) == list(parallel[name].values()), f'{name} does not match'
+
+
+def test_window_cache(load_model_data):
+    """
+    Loads that share a window cache should re-use the invariant tables and produce the same data
+    """
+    config, uncached = load_model_data('config_utopia.toml', source_trace=True)
+    con = sqlite3.connect(config.input_database)
+    window_cache = {}
+    first = HybridLoader(con, config, window_cache=window_cache).create_data_dict()
+    assert window_cache, 'the invariant tables should be captured'
+    assert all(HybridLoader.is_window_invariant(q) for q in window_cache)
+    # poison the database so that a re-read would be detected
+    con.execute('DELETE FROM main.CapacityToActivity')
+    second = HybridLoader(con, config, window_cache=window_cache).create_data_dict()
+    con.rollback()
+    con.close()
+    assert first == uncached
+    assert second == uncached
+
+
+def test_window_invariance():
+    assert HybridLoader.is_window_invariant(DeferredQuery('SELECT tech FROM main.Technology'))
+    assert not HybridLoader.is_window_invariant(
+        DeferredQuery('SELECT * FROM main.Demand WHERE period >= ?', (2000,))
+    )
+    assert not HybridLoader.is_window_invariant(
+        DeferredQuery('SELECT region, tech, vintage FROM main.MyopicEfficiency')
+    )
+
+
+def test_region_exceptions_in_sql():
+    """
+    region groups and 'global' labels should be screened the same in the database as they are
+    by filter_elements
+    """
+    con = sqlite3.connect(':memory:')
+    con.execute('CREATE TABLE LoanLifetimeTech (region TEXT, tech TEXT, lifetime REAL)')
+    rows = [
+        ('R1', 'a', 1.0),
+        ('R2', 'a', 2.0),
+        ('R1', 'b', 3.0),
+        ('R1+R2', 'a', 4.0),
+        ('R1+R2', 'c', 5.0),
+        ('global', 'b', 6.0),
+        ('globalish', 'a', 7.0),
+    ]
+    con.executemany('INSERT INTO LoanLifetimeTech VALUES (?, ?, ?)', rows)
+    viable_rt = ViableSet(
+        elements={('R1', 'a'), ('R1', 'b')},
+        exception_loc=0,
+        exception_vals=ViableSet.REGION_REGEXES,
+    )
+    loader = HybridLoader(db_connection=con, config=None)
+    loader.viable_rt = viable_rt
+    loader._create_viable_tables()
+    screened = loader._fetch_viable(
+        con,
+        DeferredQuery('SELECT region, tech, lifetime FROM main.LoanLifetimeTech'),
+        validation=viable_rt,
+        val_loc=(0, 1),
+    )
+    loader._drop_viable_tables()
+    expected = filter_elements(values=rows, validation=viable_rt, value_locations=(0, 1))
+    assert screened == expected
+    assert screened == [
+        ('R1', 'a', 1.0),
+        ('R1', 'b', 3.0),
+        ('R1+R2', 'a', 4.0),
+        ('global', 'b', 6.0),
+    ]
+
+
+@pytest.mark.parametrize('reader_threads', [1, 2], ids=['sequential', 'parallel'])
+def test_db_without_unlim_cap(reader_threads, load_model_data, tmp_path):
+    """a database from before the unlim_cap column should load, with no uncapacitated techs"""
+    db = tmp_path / 'old_schema.sqlite'
+    shutil.copy(Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'utopia.sqlite'), db)
+    con = sqlite3.connect(db)
+    con.execute('ALTER TABLE Technology DROP COLUMN unlim_cap')
+    con.commit()
+    con.close()
+    _, data = load_model_data(
+        'config_utopia.toml', input_database=db, reader_threads=reader_threads
+    )
+    assert data['tech_production']
+    assert not data.get('tech_uncap')
@@ -0,0 +1,105 @@
+"""
+Tests for the compact (compressed) export of the model and the loading of external solutions
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import gzip
+import shutil
+import subprocess
+
+import highspy
+import pytest
+from pyomo.environ import value
+
+from temoa.temoa_model.fast_writer import load_solution
+from temoa.temoa_model.lp_export import read_names, validate_export_settings
+from temoa.temoa_model.run_actions import build_instance, solve_instance
+
+
+@pytest.fixture(scope='module')
+def utopia_data(load_model_data):
+    _, data = load_model_data('config_utopia.toml')
+    return data
+
+
+def test_export_settings():
+    assert validate_export_settings({}) == {'format': 'mps', 'compression': 'gzip'}
+    with pytest.raises(ValueError):
+        validate_export_settings({'format': 'xyz'})
+    with pytest.raises(ValueError):
+        validate_export_settings({'compression': 'bz2'})
+
+
+@pytest.mark.skipif(shutil.which('cbc') is None, reason='requires the cbc executable')
+def test_export_and_load_solution(utopia_data, tmp_path):
+    """an exported model solved elsewhere should load back to the same solution"""
+    reference, _ = solve_instance(build_instance(utopia_data, silent=True), 'cbc', silent=True)
+
+    instance = build_instance(
+        utopia_data,
+        silent=True,
+        keep_lp_file=True,
+        lp_path=tmp_path,
+        lp_export={'format': 'mps', 'compression': 'gzip'},
+    )
+    model_file, names_file = tmp_path / 'model.mps.gz', tmp_path / 'model_names.txt.gz'
+    assert model_file.is_file() and names_file.is_file()
+    assert not (tmp_path / 'model.lp').exists()
+    names = read_names(names_file)
+    assert names['c0'].startswith('V_')
+
+    # the "cluster" side:  unpack and solve the file, and send back the compressed solution
+    mps_file, solution_file = tmp_path / 'model.mps', tmp_path / 'model.sol'
+    mps_file.write_bytes(gzip.decompress(model_file.read_bytes()))
+    subprocess.run(['cbc', str(mps_file), '-solve', '-solution', str(solution_file)], check=True)
+    compressed_solution = tmp_path / 'model.sol.gz'
+    compressed_solution.write_bytes(gzip.compress(solution_file.read_bytes()))
+
+    results = load_solution(instance, names_file, compressed_solution, solver_suffixes=['duals'])
+    assert str(results.solver.termination_condition) == 'optimal'
+    assert value(instance.TotalCost) == pytest.approx(value(reference.TotalCost), rel=1e-6)
+    assert len(results['Solution'].Constraint) == sum(1 for k in names if k[0] == 'r')
+
+
+def test_lp_format(utopia_data, tmp_path):
+    """the LP format export should give the same objective as the pyomo solve"""
+    reference, _ = solve_instance(build_instance(utopia_data, silent=True), 'highs', silent=True)
+    build_instance(
+        utopia_data,
+        silent=True,
+        keep_lp_file=True,
+        lp_path=tmp_path,
+        lp_export={'format': 'lp', 'compression': 'none'},
+    )
+    h = highspy.Highs()
+    h.silent()
+    h.readModel(str(tmp_path / 'model.lp'))
+    h.run()
+    assert h.getInfo().objective_function_value == pytest.approx(
+        value(reference.TotalCost), rel=1e-6
+    )
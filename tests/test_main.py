@@ -57,3 +57,11 @@ def test_parse_args(tmp_path, capsys):
     # options setting
     options = main.parse_args(f'--config {config_file} --output_path {tmp_path} -s -d -b'.split())
     assert all((options.silent, options.debug, options.build_only))
+
+    # cache bypass
+    options = main.parse_args(f'--config {config_file} --output_path {tmp_path} --no-cache'.split())
+    assert options.no_cache
+
+    # solver tuning
+    options = main.parse_args(f'--config {config_file} --output_path {tmp_path} --tune'.split())
+    assert options.tune
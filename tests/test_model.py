@@ -29,8 +29,15 @@ received this license file.  If not, see <http://www.gnu.org/licenses/>.
 import pathlib
 import pickle
 
+import pytest
+from pyomo.core.expr import identify_variables
+from pyomo.dataportal import DataPortal
+from pyomo.environ import value
+
 from definitions import PROJECT_ROOT
+from temoa.temoa_model.run_actions import build_instance
 from temoa.temoa_model.temoa_mode import TemoaMode
+from temoa.temoa_model.temoa_rules import get_capacity_factor
 from temoa.temoa_model.temoa_sequencer import TemoaSequencer
 
 
@@ -57,3 +64,87 @@ def test_serialization():
 
     recovered_model = pickle.loads(pickled_model)
     assert recovered_model, 'unable to recover model.'
+
+
+@pytest.mark.parametrize('config_file', ['config_utopia.toml', 'config_test_system.toml'])
+def test_direct_build_matches_data_portal_build(config_file, load_model_data, tmp_path):
+    """
+    The instance constructed directly from the data dictionary should produce the same LP as
+    the instance created from a DataPortal
+    """
+    _, data = load_model_data(config_file)
+
+    portal_instance = build_instance(DataPortal(data_dict={None: data}), silent=True)
+    direct_instance = build_instance(data, silent=True, check_domains=False)
+
+    lp_files = []
+    for name, instance in (('portal', portal_instance), ('direct', direct_instance)):
+        lp_file = tmp_path / f'{name}.lp'
+        instance.write(str(lp_file), format='lp', io_options={'symbolic_solver_labels': True})
+        lp_files.append(lp_file.read_text())
+    assert lp_files[0] == lp_files[1], 'the LP from the direct build should match'
+
+
+@pytest.mark.parametrize('config_file', ['config_utopia.toml', 'config_test_system.toml'])
+def test_cost_indices(config_file, tmp_path):
+    """the period buckets of cost keys should match a filter of the full keys, in order"""
+    ts = TemoaSequencer(
+        config_file=pathlib.Path(PROJECT_ROOT, 'tests', 'testing_configs', config_file),
+        output_path=tmp_path,
+        mode_override=TemoaMode.BUILD_ONLY,
+        silent=True,
+    )
+    M = ts.start()
+    for p in M.time_optimize:
+        assert M.CostInvest_by_v.get(p, []) == [
+            k for k in M.CostInvest.sparse_iterkeys() if k[2] == p
+        ]
+        assert M.CostFixed_by_p.get(p, []) == [
+            k for k in M.CostFixed.sparse_iterkeys() if k[1] == p
+        ]
+        assert M.CostVariable_by_p.get(p, []) == [
+            k for k in M.CostVariable.sparse_iterkeys() if k[1] == p
+        ]
+        assert M.CostEmission_by_p.get(p, []) == [
+            (r, e, i, t, v, o)
+            for (r, e, i, t, v, o) in M.EmissionActivity
+            if (r, p, e) in M.CostEmission and (r, p, t, v) in M.processInputs
+        ]
+
+
+def test_commodity_balance_templates(tmp_path):
+    """each (r, p, c) template should be made once and cover the variables of every time slice"""
+    ts = TemoaSequencer(
+        config_file=pathlib.Path(PROJECT_ROOT, 'tests', 'testing_configs', 'config_utopia.toml'),
+        output_path=tmp_path,
+        mode_override=TemoaMode.BUILD_ONLY,
+        silent=True,
+    )
+    M = ts.start()
+    assert M.commodityBalanceTemplates.keys() == {
+        (r, p, c)
+        for r, p, s, d, c in M.CommodityBalanceConstraint_rpsdc
+        if c not in M.commodity_demand
+    }
+    for (r, p, s, d, c), con in M.CommodityBalanceConstraint.items():
+        template = M.commodityBalanceTemplates[r, p, c]
+        size = sum(len(terms or ()) for terms in template)
+        assert len(list(identify_variables(con.body))) == size
+
+
+def test_capacity_factor_fallback(tmp_path):
+    """only the given process capacity factors are stored, the rest fall back to the tech"""
+    ts = TemoaSequencer(
+        config_file=pathlib.Path(PROJECT_ROOT, 'tests', 'testing_configs', 'config_utopia.toml'),
+        output_path=tmp_path,
+        mode_override=TemoaMode.BUILD_ONLY,
+        silent=True,
+    )
+    M = ts.start()
+    specified = dict(M.CapacityFactorProcess.sparse_iteritems())
+    assert M.capacityFactorProcessData == specified
+    for r, p, s, d, t, v in M.CapacityConstraint_rpsdtv:
+        expected = specified.get((r, s, d, t, v), value(M.CapacityFactorTech[r, s, d, t]))
+        assert get_capacity_factor(M, r, s, d, t, v) == expected
+        assert value(M.CapacityFactorProcess[r, s, d, t, v]) == expected
+    assert len(list(M.CapacityFactorProcess.sparse_iterkeys())) == len(specified)
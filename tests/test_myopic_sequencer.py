@@ -26,9 +26,101 @@ Created on:  1/20/24
 
 """
 
+import shutil
+import sqlite3
+from pathlib import Path
+
 import pytest
+from pyomo.environ import ConcreteModel, Constraint, Objective, Var
+
+from definitions import PROJECT_ROOT
+from temoa.extensions.myopic.persistent_window_solver import PersistentWindowSolver
+from temoa.temoa_model.temoa_sequencer import TemoaSequencer
 
 
 @pytest.mark.skip(reason='Not implemented')
 def test_characterize_run():
     assert False
+
+
+def _run_myopic(
+    tmp_path: Path, name: str, solver_name: str, myopic_extras: str = '', config_extras: str = ''
+) -> tuple[float, ...]:
+    """run myopic utopia on a copy of the db and return the summed output costs"""
+    folder = tmp_path / name
+    folder.mkdir()
+    db = folder / 'myo_utopia.sqlite'
+    shutil.copy(Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'myo_utopia.sqlite'), db)
+    config_file = folder / 'config.toml'
+    config_file.write_text(
+        f'scenario = "{name}"\n'
+        f'scenario_mode = "myopic"\n'
+        f'input_database = "{db.as_posix()}"\n'
+        f'output_database = "{db.as_posix()}"\n'
+        f'solver_name = "{solver_name}"\n'
+        f'save_excel = false\n'
+        f'{config_extras}\n'
+        f'[myopic]\n'
+        f'view_depth = 2\n'
+        f'step_size = 1\n'
+        f'{myopic_extras}\n'
+    )
+    TemoaSequencer(config_file=config_file, output_path=folder, silent=True).start()
+    con = sqlite3.connect(db)
+    res = con.execute('SELECT SUM(d_invest), SUM(d_fixed), SUM(d_var) FROM OutputCost').fetchone()
+    con.close()
+    return res
+
+
+def test_persistent_solver(tmp_path):
+    """the persistent solver, updated window to window, should match the window-by-window solves"""
+    expected = _run_myopic(tmp_path, 'regular', 'appsi_highs')
+    persistent = _run_myopic(tmp_path, 'persistent', 'appsi_highs', 'persistent_solver = true')
+    assert persistent == pytest.approx(expected, rel=1e-6)
+
+
+def test_persistent_solver_constant_rows():
+    """a row with no variables is not sent to the solver, but a violated one makes it infeasible"""
+    m = ConcreteModel()
+    m.x = Var(bounds=(0, None))
+    m.y = Var()
+    m.y.fix(5)
+    m.demand = Constraint(expr=m.x >= 1)
+    m.cap = Constraint(expr=m.y <= 6)
+    m.obj = Objective(expr=m.x)
+    solver = PersistentWindowSolver('appsi_highs')
+    assert solver.solve(m) == (True, '')
+    assert not solver.infeasible_rows
+    m.y.fix(7)
+    optimal, status = solver.solve(m)
+    assert not optimal and 'infeasible' in status
+    assert solver.infeasible_rows == [('cap', None)]
+
+
+def test_window_solve_times(tmp_path, caplog):
+    """the solve time of each window and the total for the sequence are logged"""
+    caplog.set_level('INFO')
+    _run_myopic(tmp_path, 'timed', 'cbc')
+    messages = [rec.message for rec in caplog.records]
+    assert any(msg.startswith('Myopic window') and 'solve time' in msg for msg in messages)
+    assert sum(msg.startswith('Myopic sequence total solve time') for msg in messages) == 1
+
+
+def test_background_write(tmp_path):
+    """writing the windows on the background writer should not change the results"""
+    expected = _run_myopic(tmp_path, 'foreground', 'cbc')
+    background = _run_myopic(tmp_path, 'background', 'cbc', config_extras='background_write = true')
+    assert background == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.parametrize('background', [False, True], ids=['foreground', 'background'])
+def test_bulk_write_keeps_journal_mode(background, tmp_path, caplog):
+    """the myopic output db is also the input db (held open by the run) and is kept out of WAL"""
+    extras = 'bulk_write = true\n' + ('background_write = true' if background else '')
+    expected = _run_myopic(tmp_path, 'regular', 'cbc')
+    bulk = _run_myopic(tmp_path, 'bulk', 'cbc', config_extras=extras)
+    assert bulk == pytest.approx(expected, rel=1e-9)
+    con = sqlite3.connect(tmp_path / 'bulk' / 'myo_utopia.sqlite')
+    assert con.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    con.close()
+    assert not any('Could not restore' in rec.message for rec in caplog.records)
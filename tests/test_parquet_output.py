@@ -0,0 +1,126 @@
+"""
+Tests for the parquet output backend
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+from urllib.parse import quote
+
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model.parquet_writer import PARQUET_TABLES, ParquetSink, pyarrow_available
+from temoa.temoa_model.run_actions import build_instance, solve_instance
+from temoa.temoa_model.table_writer import TableWriter
+from temoa.temoa_model.temoa_config import TemoaConfig
+from temoa.temoa_model.temoa_sequencer import TemoaSequencer
+
+config_file = Path(PROJECT_ROOT, 'tests', 'testing_configs', 'config_utopia.toml')
+
+
+def test_output_format_selection(tmp_path):
+    config = TemoaConfig.build_config(config_file=config_file, output_path=tmp_path, silent=True)
+    assert config.output_format == 'sqlite'
+    with pytest.raises(ValueError):
+        TemoaConfig(
+            scenario='parquet',
+            scenario_mode='perfect_foresight',
+            input_database=config.input_database,
+            output_database=config.output_database,
+            output_path=tmp_path,
+            solver_name='cbc',
+            output_format='csv',
+        )
+
+
+@pytest.mark.skipif(not pyarrow_available(), reason='requires the pyarrow package')
+def test_parquet_matches_sqlite(load_model_data, tmp_path):
+    """both backends should hold the same rows"""
+    config, data = load_model_data('config_utopia.toml', tmp_path)
+    output_db = tmp_path / 'output.sqlite'
+    output_db.write_bytes(config.output_database.read_bytes())
+    config.output_database, config.output_format = output_db, 'both'
+    M, results = solve_instance(
+        build_instance(data, silent=True), 'highs', silent=True, solver_suffixes=['duals']
+    )
+
+    writer = TableWriter(config)
+    writer.write_results(M, results=results)
+    writer.finish()
+    # the partitions are by scenario and period (the names are uri-encoded)
+    scenario_folder = tmp_path / 'parquet' / 'OutputFlowOut' / f'scenario={quote(config.scenario)}'
+    assert any(scenario_folder.glob('period=*/*.parquet'))
+    for table in PARQUET_TABLES:
+        sqlite_rows = writer.con.execute(
+            f'SELECT * FROM {table} WHERE scenario = ?', (config.scenario,)
+        ).fetchall()
+        parquet_rows = writer.parquet.read_table(table)
+        assert sorted(parquet_rows, key=str) == sorted(sqlite_rows, key=str), table
+    assert writer.parquet.read_table('OutputFlowOut')
+
+    # a re-write replaces the scenario
+    writer.write_results(M)
+    assert len(writer.parquet.read_table('OutputDualVariable')) == 0
+
+
+@pytest.mark.skipif(not pyarrow_available(), reason='requires the pyarrow package')
+@pytest.mark.parametrize('background', [False, True], ids=['foreground', 'background'])
+def test_parquet_matches_sqlite_myopic(background, tmp_path):
+    """the windows of a myopic run (appended writes, cleared overlaps) should match in both"""
+    db = tmp_path / 'myo_utopia.sqlite'
+    shutil.copy(Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'myo_utopia.sqlite'), db)
+    myopic_config = tmp_path / 'config.toml'
+    myopic_config.write_text(
+        f'scenario = "myopic parquet"\n'
+        f'scenario_mode = "myopic"\n'
+        f'input_database = "{db.as_posix()}"\n'
+        f'output_database = "{db.as_posix()}"\n'
+        f'solver_name = "cbc"\n'
+        f'save_excel = false\n'
+        f'output_format = "both"\n'
+        f'background_write = {str(background).lower()}\n'
+        f'[myopic]\n'
+        f'view_depth = 2\n'
+        f'step_size = 1\n'
+    )
+    TemoaSequencer(config_file=myopic_config, output_path=tmp_path, silent=True).start()
+
+    con = sqlite3.connect(db)
+    sink = ParquetSink(tmp_path / 'parquet', con)
+    for table in PARQUET_TABLES:
+        sqlite_rows = con.execute(
+            f'SELECT * FROM {table} WHERE scenario = ?', ('myopic parquet',)
+        ).fetchall()
+        parquet_rows = sink.read_table(table)
+        assert sorted(parquet_rows, key=str) == sorted(sqlite_rows, key=str), table
+    # the windows overlap, so some periods were written by more than one window
+    assert sink.read_table('OutputBuiltCapacity')
+    assert len({row[3] for row in sink.read_table('OutputNetCapacity')}) > 2
+    con.close()
@@ -0,0 +1,109 @@
+"""
+Tests for the presolve of the model data
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import pytest
+from pyomo.environ import check_optimal_termination, value
+
+from temoa.temoa_model.hybrid_loader import HybridLoader
+from temoa.temoa_model.presolve import presolve
+from temoa.temoa_model.run_actions import build_instance, solve_instance
+
+params = [
+    ('utopia', 'config_utopia.toml'),
+    ('test_system', 'config_test_system.toml'),
+    ('mediumville', 'config_mediumville.toml'),
+    ('storageville', 'config_storageville.toml'),
+]
+
+
+def _solve(data: dict) -> float:
+    instance, results = solve_instance(build_instance(data, silent=True), 'cbc', silent=True)
+    assert check_optimal_termination(results)
+    return value(instance.TotalCost)
+
+
+@pytest.mark.parametrize(
+    argnames=['data_name', 'config_file'], argvalues=params, ids=[t[0] for t in params]
+)
+def test_presolve_objective(data_name, config_file, load_model_data, tmp_path):
+    """the presolved data should reach the same objective value"""
+    _, data = load_model_data(config_file, tmp_path)
+    full = _solve(data)
+    _, data = load_model_data(config_file, tmp_path, presolve=True)
+    presolved = _solve(data)
+    assert presolved == pytest.approx(full, rel=1e-6)
+    assert (tmp_path / 'presolve_report.txt').is_file()
+
+
+def test_inactive_processes(load_model_data):
+    """processes that can never be active are removed with their data"""
+    _, data = load_model_data('config_utopia.toml')
+    # an existing vintage with no existing capacity
+    r, i, t, _, o = next(k for k in data['Efficiency'] if k[2] == 'E31')
+    data['Efficiency'][r, i, t, 1970, o] = 0.3
+    data['CostFixed'][r, 1990, t, 1970] = 1.0
+    report = presolve(data)
+
+    removed = {p for processes in report.removed.values() for p in processes}
+    assert (r, t, 1970) in removed
+    assert (r, i, t, 1970, o) not in data['Efficiency']
+    assert (r, 1990, t, 1970) not in data['CostFixed']
+    # RHE has a MaxCapacity of zero in 1990, its only active period
+    assert ('utopia', 'RHE', 1990) in removed
+    assert ('utopia', 'RHE', 1990) not in data['CostInvest']
+    assert ('utopia', 1990, 'RHE') not in data['MaxCapacity']
+    assert 'utopia, RHE, 1990' in str(report)
+
+
+def test_merge_pass_through(load_model_data):
+    """a pass-through tech placed in front of the diesel consumers is merged away"""
+    _, data = load_model_data('config_utopia.toml')
+    base = _solve(dict(data))
+
+    # route the diesel through a pass-through tech
+    _, data = load_model_data('config_utopia.toml')
+    for key in [k for k in data['Efficiency'] if k[1] == 'DSL']:
+        data['Efficiency'][(key[0], 'DSL_X') + key[2:]] = data['Efficiency'].pop(key)
+    for key in [k for k in data['EmissionActivity'] if k[2] == 'DSL']:
+        new_key = key[:2] + ('DSL_X',) + key[3:]
+        data['EmissionActivity'][new_key] = data['EmissionActivity'].pop(key)
+    data['Efficiency']['utopia', 'DSL', 'PASS', 1990, 'DSL_X'] = 1.0
+    data['LifetimeTech']['utopia', 'PASS'] = 100
+    data['tech_production'].append('PASS')
+    data['tech_uncap'].append('PASS')
+    data['commodity_physical'].append('DSL_X')
+    assert _solve(dict(data)) == pytest.approx(base, rel=1e-6)
+
+    report = presolve(data, merge_pass_through=True)
+    assert report.merged == [('utopia', 'PASS', 'DSL', 'DSL_X')]
+    assert not any('DSL_X' in k or 'PASS' in k for k in data['Efficiency'])
+    assert 'PASS' not in data['tech_production']
+    data.update(HybridLoader(db_connection=None, config=None).load_param_idx_sets(data))
+    assert _solve(data) == pytest.approx(base, rel=1e-6)
@@ -0,0 +1,107 @@
+"""
+Tests for the solver profiles and the solver tuning
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+from pathlib import Path
+
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model.run_actions import build_instance
+from temoa.temoa_model.solver_profiles import (
+    DEFAULT_PROFILES,
+    solver_options,
+    solver_profiles,
+    validate_settings,
+)
+from temoa.temoa_model.solver_tuning import tune_solver, tuning_grid, write_tuning_report
+from temoa.temoa_model.temoa_config import TemoaConfig
+
+
+def test_solver_options():
+    """the selected profile is found among the built-in and the configured profiles"""
+    assert solver_options('gurobi') == DEFAULT_PROFILES['gurobi']['default']
+    assert solver_options('some_solver') == {}
+
+    settings = {
+        'profile': 'fast',
+        'gurobi': {'fast': {'Method': 1}, 'default': {'Threads': 2}},
+        'cbc': {'fast': {'presolve': 'off'}},
+    }
+    validate_settings(settings)
+    assert solver_options('gurobi', settings) == {'Method': 1}
+    assert solver_options('cbc', settings) == {'presolve': 'off'}
+    # configured profiles replace the built-in ones of the same name
+    assert solver_profiles('gurobi', settings)['default'] == {'Threads': 2}
+    with pytest.raises(ValueError):
+        solver_options('cplex', settings)
+    with pytest.raises(ValueError):
+        validate_settings({'gurobi': {'Method': 1}})
+
+
+def test_config_solver_section(tmp_path):
+    """the [solver] section of the config file selects the options"""
+    db = Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'utopia.sqlite')
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text(
+        f'scenario = "profiles"\n'
+        f'scenario_mode = "perfect_foresight"\n'
+        f'input_database = "{db.as_posix()}"\n'
+        f'output_database = "{db.as_posix()}"\n'
+        f'solver_name = "cbc"\n'
+        f'save_excel = false\n'
+        f'[solver]\n'
+        f'profile = "tight"\n'
+        f'[solver.cbc.tight]\n'
+        f'primalTolerance = 1e-9\n'
+    )
+    config = TemoaConfig.build_config(config_file=config_file, output_path=tmp_path, silent=True)
+    assert config.solver_profile == 'tight'
+    assert config.solver_options == {'primalTolerance': 1e-9}
+    assert 'Solver profile' in repr(config)
+
+
+def test_tune_solver(load_model_data, tmp_path):
+    """each profile is solved (in its own process) and ranked, with the objective compared"""
+    _, data = load_model_data('config_utopia.toml')
+    instance = build_instance(data, silent=True)
+
+    grid = {'default': {}, 'no_presolve': {'presolve': 'off'}, 'broken': {'bad option': 1}}
+    results = tune_solver(instance, 'cbc', grid, reference='default')
+    assert [res.profile for res in results][-1] == 'broken'
+    assert not results[-1].solved
+    solved = results[:2]
+    assert {res.profile for res in solved} == {'default', 'no_presolve'}
+    assert solved[0].seconds <= solved[1].seconds
+    assert all(res.delta == pytest.approx(0, abs=1e-6) for res in solved)
+
+    write_tuning_report(results, tmp_path)
+    assert 'no_presolve' in (tmp_path / 'solver_tuning.txt').read_text()
+    # the configured profiles come first in the tuning grid
+    assert next(iter(tuning_grid('cbc', {'mine': {}}))) == 'mine'
@@ -0,0 +1,121 @@
+"""
+Tests for the sparse dictionaries made by CreateSparseDicts, against values cached from a
+prior, known-good implementation
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model.temoa_model import TemoaModel
+from temoa.temoa_model.temoa_sequencer import TemoaMode, TemoaSequencer
+
+# the dictionaries and sets produced by CreateSparseDicts
+sparse_dict_names = (
+    'processInputs',
+    'processOutputs',
+    'commodityDStreamProcess',
+    'commodityUStreamProcess',
+    'ProcessOutputsByInput',
+    'ProcessInputsByOutput',
+    'processTechs',
+    'processVintages',
+    'curtailmentVintages',
+    'baseloadVintages',
+    'storageVintages',
+    'rampVintages',
+    'inputsplitVintages',
+    'inputsplitaverageVintages',
+    'outputsplitVintages',
+    'ProcessByPeriodAndOutput',
+    'processReservePeriods',
+    'exportRegions',
+    'importRegions',
+    'flex_commodities',
+    'activeFlow_rpsditvo',
+    'activeFlow_rpitvo',
+    'activeFlex_rpsditvo',
+    'activeFlex_rpitvo',
+    'activeFlowInStorage_rpsditvo',
+    'activeCurtailment_rpsditvo',
+    'activeActivity_rptv',
+    'activeRegionsForTech',
+    'activeCapacity_rtv',
+    'activeCapacityAvailable_rpt',
+    'activeCapacityAvailable_rptv',
+)
+
+params = [
+    ('utopia', 'config_utopia.toml', 'utopia_sparse_dicts.json'),
+    ('test_system', 'config_test_system.toml', 'test_system_sparse_dicts.json'),
+    ('mediumville', 'config_mediumville.toml', 'mediumville_sparse_dicts.json'),
+    ('storageville', 'config_storageville.toml', 'storageville_sparse_dicts.json'),
+]
+
+
+def sparse_dict_contents(instance: TemoaModel) -> dict[str, list]:
+    """
+    Capture the contents of the sparse dictionaries and sets in a json-friendly form.  Members
+    are captured by repr (to distinguish types) and sorted.
+    """
+    res = {}
+    for name in sparse_dict_names:
+        item = getattr(instance, name)
+        if isinstance(item, dict):
+            res[name] = sorted([repr(k), sorted(map(repr, v))] for k, v in item.items())
+        else:
+            res[name] = sorted(map(repr, item))
+    return res
+
+
+def build_instance(config_file: str, output_path: Path) -> TemoaModel:
+    ts = TemoaSequencer(
+        config_file=Path(PROJECT_ROOT, 'tests', 'testing_configs', config_file),
+        output_path=output_path,
+        mode_override=TemoaMode.BUILD_ONLY,
+        silent=True,
+    )
+    return ts.start()
+
+
+@pytest.mark.parametrize(
+    argnames='data_name config_file cache_file'.split(),
+    argvalues=params,
+    ids=[t[0] for t in params],
+)
+def test_sparse_dicts(data_name, config_file, cache_file, tmp_path):
+    instance = build_instance(config_file, tmp_path)
+    with open(Path(PROJECT_ROOT, 'tests', 'testing_data', cache_file)) as src:
+        cached = json.load(src)
+    contents = sparse_dict_contents(instance)
+    assert contents.keys() == cached.keys()
+    for name, values in cached.items():
+        assert contents[name] == values, f'{name} does not match the cached values'
@@ -26,9 +26,14 @@ Created on:  3/1/24
 
 """
 
+import sqlite3
+
 import pytest
+from pyomo.environ import value
 
 from temoa.temoa_model import table_writer
+from temoa.temoa_model.run_actions import build_instance, solve_instance
+from temoa.temoa_model.temoa_config import TemoaConfig
 
 params = [
     {
@@ -100,3 +105,144 @@ def test_loan_costs_with_zero_GDR(param):
     model_cost, undiscounted_cost = table_writer.TableWriter.loan_costs(**param)
     assert model_cost == pytest.approx(param['model_cost'], abs=0.01)
     assert undiscounted_cost == pytest.approx(param['undiscounted_cost'], abs=0.01)
+
+
+def test_calculate_flows(load_model_data):
+    """the flows pulled from the solved variables should match the variable values"""
+    config, data = load_model_data('config_mediumville.toml')
+    M, _ = solve_instance(build_instance(data, silent=True), 'cbc', silent=True)
+    writer = table_writer.TableWriter(config)
+    flows = writer.calculate_flows(M)
+    writer.con.close()
+    FI, FT = table_writer.FI, table_writer.FlowType
+
+    for key in M.V_FlowOut:
+        val = value(M.V_FlowOut[key])
+        fi = FI(*key)
+        if val < writer.epsilon or fi.t in M.tech_flex:
+            continue
+        eff = value(M.Efficiency[fi.r, fi.i, fi.t, fi.v, fi.o])
+        assert flows[fi][FT.OUT] == pytest.approx(val)
+        if fi.t not in M.tech_storage:
+            assert flows[fi][FT.IN] == pytest.approx(val / eff)
+            assert flows[fi][FT.LOST] == pytest.approx((1 - eff) * val / eff)
+
+    # the annual flows are spread over the time slices
+    assert len(M.V_FlowOutAnnual) > 0
+    for r, p, i, t, v, o in M.V_FlowOutAnnual:
+        spread = sum(
+            flows[FI(r, p, s, d, i, t, v, o)][FT.OUT] for s in M.time_season for d in M.time_of_day
+        )
+        assert spread == pytest.approx(value(M.V_FlowOutAnnual[r, p, i, t, v, o]))
+    assert writer.check_flow_balance(M)
+
+
+def test_bulk_write(load_model_data, tmp_path):
+    """a bulk write should give the same rows, keep the output indexes and restore the journal"""
+    config, data = load_model_data('config_utopia.toml')
+    M, _ = solve_instance(build_instance(data, silent=True), 'cbc', silent=True)
+
+    tables = {}
+    source = config.output_database
+    for bulk in (False, True):
+        db = tmp_path / f'bulk_{bulk}.sqlite'
+        db.write_bytes(source.read_bytes())
+        con = sqlite3.connect(db)
+        con.execute('CREATE INDEX flow_out_tech ON OutputFlowOut (tech)')
+        con.close()
+        config.output_database, config.bulk_write, config.vacuum_policy = db, bulk, 'end'
+        writer = table_writer.TableWriter(config)
+        writer.write_results(M)
+        writer.finish()
+        con = writer.con
+        assert con.execute("SELECT name FROM sqlite_master WHERE name = 'flow_out_tech'").fetchone()
+        assert con.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+        tables[bulk] = {
+            table: sorted(con.execute(f'SELECT * FROM {table}').fetchall())
+            for table in table_writer.all_output_tables
+        }
+    assert tables[True] == tables[False]
+    assert tables[True]['OutputFlowOut']
+
+    # on the background writer, the journal is restored once the writer's connection is closed
+    db = tmp_path / 'bulk_background.sqlite'
+    db.write_bytes(source.read_bytes())
+    config.output_database, config.background_write = db, True
+    writer = table_writer.TableWriter(config)
+    writer.write_results(M)
+    writer.finish()
+    assert writer.con.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    background_rows = {
+        table: sorted(writer.con.execute(f'SELECT * FROM {table}').fetchall())
+        for table in table_writer.all_output_tables
+    }
+    writer.con.close()
+    assert background_rows == tables[True]
+
+    with pytest.raises(ValueError):
+        TemoaConfig(
+            scenario='bulk',
+            scenario_mode='perfect_foresight',
+            input_database=config.input_database,
+            output_database=config.output_database,
+            output_path=tmp_path,
+            solver_name='cbc',
+            vacuum_policy=0,
+        )
+
+
+def test_vacuum_policy_counts_full_writes(load_model_data, tmp_path, caplog):
+    """the partial writes (MGA capacity tables) should not count toward the vacuum policy"""
+    config, data = load_model_data('config_utopia.toml')
+    M, _ = solve_instance(build_instance(data, silent=True), 'cbc', silent=True)
+    db = tmp_path / 'vacuum.sqlite'
+    db.write_bytes(config.output_database.read_bytes())
+    config.output_database, config.vacuum_policy = db, 1
+    writer = table_writer.TableWriter(config)
+    caplog.set_level('INFO')
+
+    def vacuums() -> int:
+        return sum('Vacuumed' in rec.message for rec in caplog.records)
+
+    writer.write_results(M)
+    assert vacuums() == 1
+    for iteration in range(1, 4):
+        writer.write_capacity_tables(M=M, iteration=iteration)
+        writer.commit_write()
+    assert vacuums() == 1
+    writer.write_results(M)
+    assert vacuums() == 2
+    writer.con.close()
+
+
+def test_stream_flows(load_model_data, tmp_path):
+    """the flows written by (region, period) chunk should match the flows of the full register"""
+    config, data = load_model_data('config_mediumville.toml')
+    M, _ = solve_instance(build_instance(data, silent=True), 'cbc', silent=True)
+
+    # the chunks partition the register
+    writer = table_writer.TableWriter(config)
+    register = writer.calculate_flows(M)
+    chunked = {}
+    for (r, p), flows in writer.iter_flow_chunks(M):
+        assert all((fi.r, fi.p) == (r, p) for fi in flows)
+        assert not chunked.keys() & flows.keys()
+        chunked.update(flows)
+    assert chunked == register
+    writer.con.close()
+
+    tables = {}
+    source = config.output_database
+    for stream in (False, True):
+        db = tmp_path / f'stream_{stream}.sqlite'
+        db.write_bytes(source.read_bytes())
+        config.output_database, config.stream_flows = db, stream
+        writer = table_writer.TableWriter(config)
+        writer.write_results(M)
+        tables[stream] = {
+            table: sorted(writer.con.execute(f'SELECT * FROM {table}').fetchall())
+            for table in ('OutputFlowIn', 'OutputFlowOut', 'OutputCurtailment')
+        }
+        writer.con.close()
+    assert tables[True] == tables[False]
+    assert tables[True]['OutputFlowOut']
@@ -0,0 +1,124 @@
+"""
+Tests for the aggregation of time slices into representative seasons
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+"""
+
+import shutil
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model.hybrid_loader import HybridLoader
+from temoa.temoa_model.run_actions import build_instance
+from temoa.temoa_model.temoa_sequencer import TemoaSequencer
+from temoa.temoa_model.time_slice_aggregation import (
+    AGGREGATION_METHODS,
+    aggregate_seasons,
+    hierarchical,
+    kmeans,
+)
+
+
+def _demand_totals(data: dict) -> dict[tuple, float]:
+    res = defaultdict(float)
+    for (r, s, d, dem), dds in data['DemandSpecificDistribution'].items():
+        res[r, dem] += dds
+    return res
+
+
+@pytest.mark.parametrize('method', AGGREGATION_METHODS)
+def test_aggregate_seasons(method, load_model_data):
+    """the aggregated data should cover the year and the demand, with representative seasons"""
+    _, data = load_model_data('config_test_system.toml')
+    demand = _demand_totals(data)
+    clusters = aggregate_seasons(data, seasons=2, method=method)
+
+    assert len(clusters) == 2
+    assert sorted(s for members in clusters.values() for s in members) == sorted(
+        ['spring', 'summer', 'fall', 'winter']
+    )
+    assert set(data['time_season']) == clusters.keys()
+    assert sum(data['SegFrac'].values()) == pytest.approx(1.0)
+    assert _demand_totals(data) == pytest.approx(demand)
+    for name in ('SegFrac', 'DemandSpecificDistribution', 'CapacityFactorTech'):
+        assert {k[1] if len(k) > 2 else k[0] for k in data[name]} <= clusters.keys()
+
+    # the index sets are made from the aggregated data and the model should build
+    data.update(HybridLoader(db_connection=None, config=None).load_param_idx_sets(data))
+    instance = build_instance(data, silent=True)
+    assert set(instance.time_season) == clusters.keys()
+
+
+def test_no_aggregation_needed(load_model_data):
+    """asking for as many seasons as there are should leave the data alone"""
+    _, data = load_model_data('config_utopia.toml')
+    seg = dict(data['SegFrac'])
+    clusters = aggregate_seasons(data, seasons=3)
+    assert clusters == {s: [s] for s in data['time_season']}
+    assert data['SegFrac'] == seg
+
+
+@pytest.mark.parametrize('method', AGGREGATION_METHODS)
+def test_clustering(method):
+    """obvious groups should be found by either method"""
+    rng = np.random.default_rng(42)
+    centers = np.array([[0.0, 0.0], [10.0, 10.0], [-10.0, 10.0]])
+    features = np.vstack([c + rng.normal(scale=0.5, size=(5, 2)) for c in centers])
+    weights = np.ones(len(features))
+    if method == 'kmeans':
+        labels = kmeans(features, weights, 3, seed=1)
+    else:
+        labels = hierarchical(features, weights, 3)
+    groups = {tuple(labels[i : i + 5]) for i in range(0, 15, 5)}
+    assert all(len(set(g)) == 1 for g in groups), 'each group should share a label'
+    assert len({g[0] for g in groups}) == 3, 'the groups should have different labels'
+
+
+def test_aggregation_report(tmp_path):
+    """an aggregated run should solve and report the error against the full resolution model"""
+    db = tmp_path / 'utopia.sqlite'
+    shutil.copy(Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'utopia.sqlite'), db)
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text(
+        f'scenario = "aggregated"\n'
+        f'scenario_mode = "perfect_foresight"\n'
+        f'input_database = "{db.as_posix()}"\n'
+        f'output_database = "{db.as_posix()}"\n'
+        f'solver_name = "cbc"\n'
+        f'save_excel = false\n'
+        f'time_slice_aggregation = {{ seasons = 2, method = "hierarchical", report = true }}\n'
+    )
+    sequencer = TemoaSequencer(config_file=config_file, output_path=tmp_path, silent=True)
+    sequencer.start()
+    assert len(sequencer.pf_solved_instance.time_season) == 2
+    report = (tmp_path / 'time_slice_aggregation_report.txt').read_text()
+    assert 'Total cost' in report
+    assert 'Seasons: 2 of 3' in report
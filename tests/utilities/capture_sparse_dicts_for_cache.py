@@ -0,0 +1,61 @@
+"""
+Quick utility to capture the sparse dictionaries made by CreateSparseDicts to enable later
+comparison.
+
+This file should not need to be run again unless model schema changes
+
+Written by:  J. F. Hyink
+jeff@westernspark.us
+https://westernspark.us
+Created on:  10/17/24
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from definitions import PROJECT_ROOT
+from tests.conftest import refresh_databases
+from tests.test_sparse_dicts import build_instance, params, sparse_dict_contents
+
+print(
+    'WARNING:  Continuing to execute this file will '
+    'update the cached sparse dictionaries in the testing_data folder '
+    'from the sqlite databases in the same folder.  '
+    'This should only need to be done if the schema or '
+    'model have changed and that database has been updated.'
+)
+
+t = input('Type "Y" to continue, any other key to exit now.')
+if t not in {'y', 'Y'}:
+    sys.exit(0)
+
+output_path = Path(PROJECT_ROOT, 'tests', 'testing_log')  # capture the log here
+
+# make new copies of the DB's from source...
+refresh_databases()
+
+for _, config_file, cache_file in params:
+    instance = build_instance(config_file, output_path)
+    # stash the result in a json file...
+    with open(Path(PROJECT_ROOT, 'tests', 'testing_data', cache_file), 'w') as f_out:
+        json.dump(sparse_dict_contents(instance), f_out, indent=2)